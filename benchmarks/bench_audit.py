@@ -0,0 +1,98 @@
+"""Microbenchmark: `LLMGateway.complete` with and without the `AuditLog` middleware.
+
+Calls a zero-latency mock provider, so gateway overhead is all that is
+measured. Requests arrive at a fixed rate of `RATE` per second and the
+per-call latency is reported; a closed-loop run then shows peak
+throughput, i.e. the CPU the writer takes from a saturated event loop.
+
+Run with `python benchmarks/bench_audit.py`.
+"""
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+
+from aicp.gateway.audit import AuditLog, AuditReader
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.middleware import PIIRedactor, PromptGuard
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+from aicp.gateway.providers.mock import MockProvider
+from aicp.observability import metrics
+from aicp.observability.logging import setup_logging
+
+REQUESTS = 20_000
+RATE = 3000
+CONCURRENCY = 32
+PROMPT = "Please review the attached quarterly figures and reach me at jane.doe@example.com. " * 4
+
+def request(i: int) -> CompletionRequest:
+    return CompletionRequest(model="m", messages=[Message(role=Role.USER, content=f"{i} {PROMPT}")])
+
+async def paced(gateway: LLMGateway):
+    latencies = []
+
+    async def call(i):
+        started = time.perf_counter()
+        await gateway.complete(request(i))
+        latencies.append(time.perf_counter() - started)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    tasks = []
+    for i in range(REQUESTS):
+        delay = started + i / RATE - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(call(i)))
+    await asyncio.gather(*tasks)
+    return latencies, loop.time() - started
+
+async def saturated(gateway: LLMGateway):
+    latencies = []
+    pending = iter(range(REQUESTS))
+
+    async def caller():
+        for i in pending:
+            started = time.perf_counter()
+            await gateway.complete(request(i))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(CONCURRENCY)))
+    return latencies, time.perf_counter() - started
+
+def run(label: str, audit_path=None, **options):
+    middlewares = [PromptGuard(), PIIRedactor()]
+    if audit_path is not None:
+        middlewares.insert(0, AuditLog(audit_path, **options))
+    gateway = LLMGateway([MockProvider(name="primary")], middlewares=middlewares)
+    latencies, _ = asyncio.run(paced(gateway))
+    latencies.sort()
+    _, elapsed = asyncio.run(saturated(gateway))
+    gateway.close()
+    print(
+        f"{label:<24} at {RATE} req/s: p50 {statistics.median(latencies) * 1e6:>6.1f} us"
+        f"  p99 {latencies[int(len(latencies) * 0.99)] * 1e6:>7.1f} us"
+        f"  | peak {REQUESTS / elapsed:>6.0f} req/s",
+        file=sys.stderr
+    )
+
+def main():
+    metrics.set_enabled(False)
+    setup_logging("CRITICAL")
+    run("no audit")
+    with tempfile.TemporaryDirectory() as root:
+        run("audit, fsync interval", f"{root}/interval")
+        run("audit, fsync always", f"{root}/always", fsync="always")
+        run("audit, no compression", f"{root}/plain", compression="none")
+        for name in ("interval", "always", "plain"):
+            segments = AuditReader(f"{root}/{name}").segments()
+            print(
+                f"{name:<10} {sum(s['records'] for s in segments):>6} records"
+                f" in {sum(s['bytes'] for s in segments) / 1e6:.2f} MB",
+                file=sys.stderr
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Startup cost of each `aicp` command: wall time and `-X importtime` totals.
+
+Every command runs in a fresh interpreter, as it does from a shell loop.
+`chat --daemon` talks to an `aicp daemon` started for the run.
+
+Run with `python benchmarks/bench_cli_startup.py`.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 5
+
+def run(args, env):
+    """(wall seconds, import seconds, modules imported) for one invocation."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "aicp.cli", *args],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    wall = time.perf_counter() - started
+    # Lines look like "import time:  self [us] | cumulative | name"; self times add up to the total
+    rows = [line.split("|") for line in proc.stderr.splitlines() if line.startswith("import time:")]
+    rows = [r for r in rows if r[0].split(":")[1].strip().isdigit()]
+    return wall, sum(int(r[0].split(":")[1]) for r in rows) / 1e6, len(rows)
+
+def measure(label, args, env):
+    samples = [run(args, env) for _ in range(RUNS)]
+    wall = statistics.median(s[0] for s in samples)
+    imports = statistics.median(s[1] for s in samples)
+    print(f"{label:<22} {wall * 1000:>7.1f} ms wall {imports * 1000:>7.1f} ms importing {samples[0][2]:>5} modules")
+
+def main():
+    with tempfile.TemporaryDirectory() as store:
+        env = dict(os.environ, AICP_STORE=store)
+        config = os.path.join(store, "invalid.yaml")
+        with open(config, "w") as f:
+            # Fails validation after `serve` has imported everything it needs, before it binds
+            f.write("providers: [{type: none}]\n")
+        socket_path = os.path.join(store, "gateway.sock")
+
+        measure("--help", ["--help"], env)
+        measure("chat", ["chat", "hello"], env)
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "aicp.cli", "daemon", "--socket", socket_path],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while not os.path.exists(socket_path) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            measure("chat --daemon", ["chat", "hello", "--daemon", socket_path], env)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+        measure("run-eval", ["run-eval"], env)
+        measure("runs list", ["runs", "list"], env)
+        measure("serve (config check)", ["serve", "--config", config], env)
+        measure("bench", ["bench", "--requests", "50", "--warmup", "0", "--json"], env)
+
+if __name__ == "__main__":
+    main()
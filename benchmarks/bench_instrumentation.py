@@ -0,0 +1,60 @@
+"""Microbenchmark: per-request cost of metrics and tracing instrumentation.
+
+Run with `python benchmarks/bench_instrumentation.py`.
+"""
+import asyncio
+import time
+
+from opentelemetry.sdk.trace import TracerProvider
+
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.middleware import PIIRedactor, PromptGuard
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+from aicp.gateway.providers.mock import MockProvider
+from aicp.observability import metrics, tracing
+from aicp.observability.metrics import REQUESTS_TOTAL, child
+from aicp.observability.logging import setup_logging
+
+REQUESTS = 20_000
+
+def per_request_us(gateway: LLMGateway, request: CompletionRequest) -> float:
+    async def loop():
+        for _ in range(REQUESTS // 10):
+            await gateway.complete(request)
+        started = time.perf_counter()
+        for _ in range(REQUESTS):
+            await gateway.complete(request)
+        return time.perf_counter() - started
+    return min(asyncio.run(loop()) for _ in range(3)) / REQUESTS * 1e6
+
+def main():
+    setup_logging("CRITICAL")
+    gateway = LLMGateway([MockProvider(name="bench")], middlewares=[PromptGuard(), PIIRedactor()])
+    request = CompletionRequest(model="bench", messages=[Message(role=Role.USER, content="Summarise the report.")])
+
+    metrics.set_enabled(False)
+    baseline = per_request_us(gateway, request)
+    metrics.set_enabled(True)
+    with_metrics = per_request_us(gateway, request)
+    tracing.tracer = TracerProvider().get_tracer("aicp")
+    tracing.set_enabled(True)
+    with_tracing = per_request_us(gateway, request)
+    tracing.set_enabled(False)
+
+    print(f"{'configuration':<28} {'us/request':>10} {'overhead':>10}")
+    for label, value in (("uninstrumented", baseline), ("metrics", with_metrics), ("metrics + OTel spans", with_tracing)):
+        print(f"{label:<28} {value:>10.1f} {value - baseline:>+10.1f}")
+
+    n = 200_000
+    started = time.perf_counter()
+    for _ in range(n):
+        REQUESTS_TOTAL.labels("bench", "bench", "success").inc()
+    labels = (time.perf_counter() - started) / n * 1e9
+    started = time.perf_counter()
+    for _ in range(n):
+        child(REQUESTS_TOTAL, "bench", "bench", "success").inc()
+    cached = (time.perf_counter() - started) / n * 1e9
+    print(f"\ncounter inc via .labels(): {labels:.0f} ns, via cached child(): {cached:.0f} ns")
+
+if __name__ == "__main__":
+    main()
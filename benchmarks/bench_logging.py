@@ -0,0 +1,37 @@
+"""Microbenchmark: cost of a log call on the event loop, synchronous vs batched sink.
+
+Run with `python benchmarks/bench_logging.py > /dev/null`; results go to stderr.
+"""
+import os
+import sys
+import time
+
+import structlog
+
+from aicp.observability.logging import setup_logging
+
+EVENTS = 50_000
+
+def per_event_us(**options) -> float:
+    with open(os.devnull, "w") as stream:
+        sink = setup_logging(stream=stream, **options)
+        log = structlog.get_logger()
+        started = time.perf_counter()
+        for i in range(EVENTS):
+            log.info("attempting_request", provider="primary", attempt=1, i=i)
+        elapsed = time.perf_counter() - started
+        if sink is not None:
+            sink.close()
+    return elapsed / EVENTS * 1e6
+
+def main():
+    results = (
+        ("synchronous", per_event_us()),
+        ("batched", per_event_us(batched=True, max_buffer=EVENTS)),
+        ("batched, 1% sampled", per_event_us(batched=True, sample_rates={"attempting_request": 0.01})),
+    )
+    for label, value in results:
+        print(f"{label:<22} {value:>6.2f} us/event on the calling thread", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
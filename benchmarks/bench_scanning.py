@@ -0,0 +1,66 @@
+"""Microbenchmark: single-pass scanning vs. per-pattern regex calls.
+
+Run with `python benchmarks/bench_scanning.py`.
+"""
+import asyncio
+import re
+import timeit
+
+from aicp.gateway.middleware import PIIRedactor, PromptGuard
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+
+FILLER = (
+    "The quarterly report covers revenue, churn and the roadmap for the next release. "
+    "Please summarise the key risks and list follow-up actions for each team. "
+)
+PII = "Reach Jane at jane.doe@example.com or +1 555-123-4567 about invoice 123-45-6789. "
+
+def make_prompt(size: int, with_pii: bool) -> str:
+    text = (FILLER * (size // len(FILLER) + 1))[:size]
+    if with_pii:
+        middle = len(text) // 2
+        text = text[:middle] + PII + text[middle:]
+    return text
+
+def legacy_redact(content: str, entities) -> str:
+    for entity in entities:
+        content = re.sub(PIIRedactor.PII_PATTERNS[entity], f"[{entity}_REDACTED]", content)
+    return content
+
+def legacy_guard(content: str):
+    return [p for p in PromptGuard.INJECTION_PATTERNS if re.search(p, content, re.IGNORECASE)]
+
+def bench(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+def main():
+    redactor = PIIRedactor()
+    guard = PromptGuard()
+    entities = redactor.entities
+
+    print(f"{'size':>8} {'pii':>5} | {'redact old':>11} {'redact new':>11} | {'guard old':>10} {'guard new':>10}  (us/op)")
+    for size in (256, 2_048, 16_384, 131_072):
+        number = max(10, 200_000 // size)
+        for with_pii in (False, True):
+            text = make_prompt(size, with_pii)
+            assert legacy_redact(text, entities) == redactor.redact(text)
+            results = (
+                bench(lambda: legacy_redact(text, entities), number),
+                bench(lambda: redactor.redact(text), number),
+                bench(lambda: legacy_guard(text), number),
+                bench(lambda: list(guard.scanner.finditer(text)), number),
+            )
+            print(f"{size:>8} {str(with_pii):>5} | {results[0]:>11.1f} {results[1]:>11.1f} | {results[2]:>10.1f} {results[3]:>10.1f}")
+
+    # End-to-end middleware cost on a 20-message conversation without PII
+    request = CompletionRequest(
+        model="bench",
+        messages=[Message(role=Role.USER, content=make_prompt(1_024, False)) for _ in range(20)],
+    )
+    loop = asyncio.new_event_loop()
+    per_call = bench(lambda: loop.run_until_complete(redactor.pre_process(request)), 200)
+    print(f"\nPIIRedactor.pre_process, 20 x 1KB messages, no hits: {per_call:.1f} us/op")
+    loop.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Load generator for measuring LLMGateway overhead and saturation.
+
+Drives a gateway backed by simulated `MockProvider`s with a closed-loop
+workload (`concurrency` callers issuing requests back to back) and reports
+throughput, latency percentiles and where the time went per layer.
+"""
+import asyncio
+import platform
+import random
+import sys
+import time
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional
+from .gateway.gateway import LLMGateway
+from .gateway.middleware import PIIRedactor, PromptGuard
+from .gateway.providers.base import CompletionRequest, Message, Role
+from .gateway.providers.mock import MockProvider
+
+FILLER = "Summarise the incident timeline and list the follow-up actions for each owning team. "
+PII_SNIPPET = " Escalate to jane.doe@example.com or 555-123-4567."
+
+class RequestMix:
+    """Distribution of generated requests."""
+
+    def __init__(
+        self,
+        prompt_chars: int = 512,
+        messages: int = 1,
+        pii_ratio: float = 0.0,
+        repeat_ratio: float = 0.0,
+        temperature: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.prompt_chars = prompt_chars
+        self.messages = messages
+        self.pii_ratio = pii_ratio
+        # Share of requests reusing one fixed prompt (cache / coalescing friendly)
+        self.repeat_ratio = repeat_ratio
+        self.temperature = temperature
+        self.rng = random.Random(seed)
+        self._counter = 0
+
+    def next_request(self) -> CompletionRequest:
+        self._counter += 1
+        repeated = self.rng.random() < self.repeat_ratio
+        text = (FILLER * (self.prompt_chars // len(FILLER) + 1))[:self.prompt_chars]
+        if not repeated:
+            text = f"[{self._counter}] {text}"
+        if self.rng.random() < self.pii_ratio:
+            text += PII_SNIPPET
+        return CompletionRequest(
+            model="bench-model",
+            temperature=self.temperature,
+            messages=[Message(role=Role.USER, content=text) for _ in range(self.messages)]
+        )
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "prompt_chars": self.prompt_chars,
+            "messages": self.messages,
+            "pii_ratio": self.pii_ratio,
+            "repeat_ratio": self.repeat_ratio,
+            "temperature": self.temperature,
+        }
+
+class LayerTimer:
+    """Accumulates wall time spent inside each gateway layer."""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def wrap(self, layer: str, func: Callable) -> Callable:
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.totals[layer] = self.totals.get(layer, 0.0) + time.perf_counter() - started
+                self.counts[layer] = self.counts.get(layer, 0) + 1
+        return timed
+
+def instrument(gateway: LLMGateway, timer: LayerTimer):
+    """Wrap the gateway's layers in place so their time is attributed separately."""
+    gateway.pipeline.run_pre = timer.wrap("middleware", gateway.pipeline.run_pre)
+    gateway.pipeline.run_post = timer.wrap("middleware", gateway.pipeline.run_post)
+    gateway.reliability.execute_with_fallback = timer.wrap("reliability", gateway.reliability.execute_with_fallback)
+    for provider in gateway.reliability.providers:
+        provider.complete = timer.wrap("provider", provider.complete)
+
+def build_gateway(
+    providers: int = 1,
+    latency: float = 0.0,
+    latency_distribution: str = "fixed",
+    failure_rate: float = 0.0,
+    timeout_rate: float = 0.0,
+    hang_seconds: float = 1.0,
+    middlewares: bool = True,
+    seed: Optional[int] = None,
+    **gateway_kwargs
+) -> LLMGateway:
+    mocks = [
+        MockProvider(
+            name=f"bench-{i}",
+            latency=latency,
+            latency_distribution=latency_distribution,
+            failure_rate=failure_rate,
+            timeout_rate=timeout_rate,
+            hang_seconds=hang_seconds,
+            seed=None if seed is None else seed + i
+        )
+        for i in range(providers)
+    ]
+    stack = [PromptGuard(), PIIRedactor()] if middlewares else []
+    gateway_kwargs.setdefault("max_retries", 1)
+    gateway = LLMGateway(mocks, middlewares=stack, **gateway_kwargs)
+    gateway.reliability.base_delay = 0.0
+    return gateway
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+async def run_benchmark(
+    gateway: LLMGateway,
+    mix: Optional[RequestMix] = None,
+    concurrency: int = 16,
+    duration: float = 10.0,
+    max_requests: Optional[int] = None,
+    warmup: float = 0.0
+) -> Dict[str, Any]:
+    """Run a closed-loop load test and return a JSON-serialisable report."""
+    mix = mix or RequestMix()
+    timer = LayerTimer()
+    instrument(gateway, timer)
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    issued = 0
+
+    async def caller(deadline: float, record: bool):
+        nonlocal issued
+        while time.perf_counter() < deadline:
+            if max_requests is not None and issued >= max_requests:
+                return
+            issued += 1
+            request = mix.next_request()
+            started = time.perf_counter()
+            try:
+                await gateway.complete(request)
+                if record:
+                    latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                if record:
+                    name = type(e).__name__
+                    errors[name] = errors.get(name, 0) + 1
+
+    if warmup > 0:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(caller(deadline, record=False) for _ in range(concurrency)))
+        timer.totals.clear()
+        timer.counts.clear()
+        issued = 0
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(caller(deadline, record=True) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    completed = len(latencies)
+    total = completed + sum(errors.values())
+    ordered = sorted(latencies)
+
+    def per_request(layer: str) -> float:
+        return timer.totals.get(layer, 0.0) / total * 1000 if total else 0.0
+
+    middleware_ms = per_request("middleware")
+    reliability_ms = per_request("reliability")
+    provider_ms = per_request("provider")
+    end_to_end_ms = sum(latencies) / completed * 1000 if completed else 0.0
+
+    return {
+        "version": _version(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {
+            "concurrency": concurrency,
+            "duration_s": duration,
+            "max_requests": max_requests,
+            "providers": [
+                {
+                    "name": p.provider_name,
+                    "latency_s": getattr(p, "latency", None),
+                    "distribution": getattr(p, "latency_distribution", None),
+                    "failure_rate": getattr(p, "failure_rate", None),
+                    "timeout_rate": getattr(p, "timeout_rate", None),
+                }
+                for p in gateway.reliability.providers
+            ],
+            "middlewares": [type(m).__name__ for m in gateway.pipeline.middlewares],
+            "mix": mix.describe(),
+        },
+        "requests": total,
+        "completed": completed,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(end_to_end_ms, 4),
+            "p50": round(percentile(ordered, 50) * 1000, 4),
+            "p95": round(percentile(ordered, 95) * 1000, 4),
+            "p99": round(percentile(ordered, 99) * 1000, 4),
+            "max": round(ordered[-1] * 1000, 4) if ordered else 0.0,
+        },
+        # Mean time per request attributed to each layer; reliability excludes provider time
+        "layers_ms": {
+            "middleware": round(middleware_ms, 4),
+            "reliability": round(max(0.0, reliability_ms - provider_ms), 4),
+            "provider": round(provider_ms, 4),
+            "gateway_other": round(max(0.0, end_to_end_ms - middleware_ms - reliability_ms), 4),
+        },
+    }
+
+def _version() -> str:
+    try:
+        return metadata.version("aicp")
+    except metadata.PackageNotFoundError:
+        return "unknown"
@@ -1,37 +1,80 @@
+import os
+from datetime import datetime
+from typing import Optional
 import typer
-import asyncio
-from rich.console import Console
-from rich.table import Table
-from .gateway.gateway import LLMGateway
-from .gateway.providers.mock import MockProvider
-from .gateway.providers.base import CompletionRequest, Message, Role
-from .gateway.middleware import PIIRedactor, PromptGuard
-from .pipeline.engine import stage, Pipeline
-from .observability.logging import setup_logging
+
+# Commands import what they use when they run: `aicp chat` is called in tight
+# loops, and loading the gateway, pipeline and metrics stack for every command
+# would dominate its run time.
 
 app = typer.Typer(help="Production AI Control Plane CLI")
-console = Console()
+runs_app = typer.Typer(help="Inspect recorded pipeline runs")
+app.add_typer(runs_app, name="runs")
+
+# Run history (`runs.db`) and spilled stage outputs (`artifacts/`) live here
+DEFAULT_STORE = os.environ.get("AICP_STORE", ".aicp")
+DEFAULT_DAEMON_SOCKET = os.path.join(DEFAULT_STORE, "gateway.sock")
+
+def get_console():
+    from rich.console import Console
+    return Console()
+
+def open_history(store: str):
+    from .pipeline.history import RunHistory
+    return RunHistory(os.path.join(store, "runs.db"))
+
+def chat_gateway(redact: bool = True):
+    """The gateway behind `aicp chat`, built in-process or once by `aicp daemon`."""
+    from .gateway.gateway import LLMGateway
+    from .gateway.middleware import PIIRedactor, PromptGuard
+    from .gateway.providers.mock import MockProvider
+    providers = [
+        MockProvider(name="primary", response_content="Hello! My email is test@example.com.")
+    ]
+    middlewares = [PromptGuard()]
+    if redact:
+        middlewares.append(PIIRedactor())
+    return LLMGateway(providers=providers, middlewares=middlewares)
+
+def print_reply(reply: dict):
+    if "error" in reply:
+        typer.echo(f"{typer.style('Error:', fg='red', bold=True)} {reply['error']}")
+        return
+    typer.echo(f"\n{typer.style('Response:', fg='green', bold=True)} {reply['content']}")
+    typer.secho(f"Usage: {reply['total_tokens']} tokens", dim=True)
 
 @app.command()
 def chat(
     message: str = typer.Argument(..., help="Message to send to the LLM"),
     redact: bool = typer.Option(True, help="Enable PII redaction"),
-    mock_error: bool = typer.Option(False, help="Simulate a provider error")
+    mock_error: bool = typer.Option(False, help="Simulate a provider error"),
+    daemon: Optional[str] = typer.Option(
+        None, envvar="AICP_DAEMON", help="Socket of a running `aicp daemon`; runs in-process if unreachable"
+    )
 ):
     """Chat with the LLM Gateway."""
+    if daemon:
+        from .server.daemon_client import DaemonError, request as daemon_request
+        try:
+            reply = daemon_request(daemon, {"message": message, "redact": redact})
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            # Nothing was sent, so running the request here cannot call the provider twice
+            typer.secho(f"Daemon at {daemon} unavailable ({e}); running in-process", err=True, dim=True)
+        except (OSError, DaemonError) as e:
+            # The daemon may already have called the provider; report instead of retrying
+            print_reply({"error": f"Daemon at {daemon} failed: {str(e) or type(e).__name__}"})
+            raise typer.Exit(1)
+        else:
+            print_reply(reply)
+            return
+
+    import asyncio
+    from .gateway.providers.base import CompletionRequest, Message, Role
+    from .observability.logging import setup_logging
     setup_logging()
-    
+
     async def _chat():
-        providers = [
-            MockProvider(name="primary", response_content="Hello! My email is test@example.com.")
-        ]
-        
-        middlewares = [PromptGuard()]
-        if redact:
-            middlewares.append(PIIRedactor())
-            
-        gateway = LLMGateway(providers=providers, middlewares=middlewares)
-        
+        gateway = chat_gateway(redact)
         request = CompletionRequest(
             model="gpt-4",
             messages=[Message(role=Role.USER, content=message)]
@@ -39,16 +82,39 @@ def chat(
         
         try:
             response = await gateway.complete(request)
-            console.print(f"\n[bold green]Response:[/bold green] {response.content}")
-            console.print(f"[dim]Usage: {response.usage.total_tokens} tokens[/dim]")
+            print_reply({"content": response.content, "total_tokens": response.usage.total_tokens})
         except Exception as e:
-            console.print(f"[bold red]Error:[/bold red] {str(e)}")
+            print_reply({"error": str(e)})
 
     asyncio.run(_chat())
 
+@app.command("daemon")
+def run_daemon(
+    socket: str = typer.Option(DEFAULT_DAEMON_SOCKET, help="Unix socket to listen on"),
+    log_level: str = typer.Option("WARNING", help="Log level")
+):
+    """Keep a warm gateway running for `aicp chat --daemon SOCKET`."""
+    import asyncio
+    from .observability.logging import setup_logging
+    from .server.daemon import GatewayDaemon
+    setup_logging(log_level)
+    typer.echo(f"Gateway daemon listening on {socket} (use `aicp chat --daemon {socket}` or AICP_DAEMON)")
+    asyncio.run(GatewayDaemon(socket, chat_gateway).serve_until_signalled())
+
 @app.command()
-def run_eval(prompt: str = typer.Argument("Explain production AI.", help="Prompt to evaluate")):
+def run_eval(
+    prompt: str = typer.Argument("Explain production AI.", help="Prompt to evaluate"),
+    record: bool = typer.Option(False, help="Record the run in the store for `aicp runs`"),
+    store: str = typer.Option(DEFAULT_STORE, help="Run history and artifact directory")
+):
     """Run a sample model evaluation pipeline."""
+    import asyncio
+    from rich.table import Table
+    from .gateway.gateway import LLMGateway
+    from .gateway.providers.base import CompletionRequest, Message, Role
+    from .gateway.providers.mock import MockProvider
+    from .observability.logging import setup_logging
+    from .pipeline.engine import Pipeline, stage
     setup_logging()
     
     async def _run():
@@ -65,7 +131,14 @@ def run_eval(prompt: str = typer.Argument("Explain production AI.", help="Prompt
                 raise ValueError("Response too short")
             return {"valid": True, "length": len(generate_response)}
 
-        p = Pipeline("eval-pipeline")
+        if record:
+            from .pipeline.artifacts import ArtifactStore
+            p = Pipeline(
+                "eval-pipeline", history=open_history(store),
+                artifacts=ArtifactStore(os.path.join(store, "artifacts"))
+            )
+        else:
+            p = Pipeline("eval-pipeline")
         p.add_stage(generate_response)
         p.add_stage(validate_output)
         
@@ -80,9 +153,184 @@ def run_eval(prompt: str = typer.Argument("Explain production AI.", help="Prompt
             status_color = "green" if res.status == "completed" else "red"
             table.add_row(name, f"[{status_color}]{res.status}[/{status_color}]", str(res.output or res.error))
             
-        console.print(table)
+        get_console().print(table)
 
     asyncio.run(_run())
 
+@runs_app.command("list")
+def runs_list(
+    pipeline: Optional[str] = typer.Option(None, help="Only runs of this pipeline"),
+    status: Optional[str] = typer.Option(None, help="Only runs with this status"),
+    since: Optional[datetime] = typer.Option(None, help="Only runs started at or after this time"),
+    until: Optional[datetime] = typer.Option(None, help="Only runs started before this time"),
+    limit: int = typer.Option(50, help="Maximum runs to show"),
+    store: str = typer.Option(DEFAULT_STORE, help="Run history and artifact directory")
+):
+    """List recorded pipeline runs, newest first."""
+    from rich.table import Table
+    from .pipeline.models import StageStatus
+    if status is not None and status not in {s.value for s in StageStatus}:
+        raise typer.BadParameter(
+            f"{status!r} is not one of {', '.join(s.value for s in StageStatus)}", param_hint="--status"
+        )
+    history = open_history(store)
+    try:
+        runs = history.list_runs(pipeline=pipeline, status=status, since=since, until=until, limit=limit)
+    finally:
+        history.close()
+
+    table = Table(title=f"Pipeline runs ({store})")
+    # Keep run ids whole so they can be pasted into `aicp runs show`
+    table.add_column("Run", no_wrap=True)
+    for column in ("Pipeline", "Status", "Started", "Duration", "Stages"):
+        table.add_column(column)
+    for r in runs:
+        duration = ""
+        if r["end_time"]:
+            seconds = (datetime.fromisoformat(r["end_time"]) - datetime.fromisoformat(r["start_time"])).total_seconds()
+            duration = f"{seconds:.2f}s"
+        color = "green" if r["status"] == "completed" else "red" if r["status"] == "failed" else "yellow"
+        table.add_row(
+            r["run_id"], r["pipeline"], f"[{color}]{r['status']}[/{color}]",
+            r["start_time"][:19], duration, str(r["stages"])
+        )
+    get_console().print(table)
+
+@runs_app.command("show")
+def runs_show(
+    run_id: str = typer.Argument(..., help="Run to inspect"),
+    store: str = typer.Option(DEFAULT_STORE, help="Run history and artifact directory")
+):
+    """Show a run's stages, errors and (possibly spilled) outputs."""
+    from rich.table import Table
+    from .pipeline.artifacts import ArtifactRef
+    console = get_console()
+    history = open_history(store)
+    try:
+        run = history.get_run(run_id)
+    finally:
+        history.close()
+    if run is None:
+        console.print(f"[bold red]No run {run_id} in {store}[/bold red]")
+        raise typer.Exit(1)
+
+    console.print(f"[bold]{run.pipeline_name}[/bold] {run.run_id}: {run.status.value}")
+    if run.resumed_from:
+        console.print(f"[dim]Resumed from {run.resumed_from}[/dim]")
+    table = Table()
+    for column in ("Stage", "Status", "Output/Error"):
+        table.add_column(column)
+    for name, res in run.results.items():
+        if res.error:
+            detail = res.error
+        elif isinstance(res.output, ArtifactRef):
+            detail = f"artifact {res.output.key[:12]} ({res.output.size} bytes)"
+        else:
+            detail = repr(res.output)
+            detail = detail if len(detail) <= 200 else detail[:197] + "..."
+        color = "green" if res.status.value == "completed" else "red"
+        table.add_row(name, f"[{color}]{res.status.value}[/{color}]", detail)
+    console.print(table)
+
+@app.command()
+def serve(
+    config: Optional[str] = typer.Option(None, help="YAML config with server, gateway, providers and middlewares"),
+    host: Optional[str] = typer.Option(None, help="Bind address (overrides the config)"),
+    port: Optional[int] = typer.Option(None, help="Listen port (overrides the config)"),
+    workers: Optional[int] = typer.Option(None, help="Worker processes sharing the socket (overrides the config)"),
+    log_level: str = typer.Option("INFO", help="Log level")
+):
+    """Serve the gateway over an OpenAI-compatible HTTP API."""
+    from .config import ConfigError, load_config
+    from .observability.logging import setup_logging
+    from .server.workers import serve as run_server
+    setup_logging(log_level)
+
+    try:
+        settings = load_config(config)
+        code = run_server(settings, host=host, port=port, workers=workers)
+    except ConfigError as e:
+        get_console().print(f"[bold red]Config error:[/bold red] {e}")
+        raise typer.Exit(2)
+    raise typer.Exit(code)
+
+@app.command()
+def bench(
+    concurrency: int = typer.Option(16, help="Concurrent closed-loop callers"),
+    duration: float = typer.Option(10.0, help="Measured run length in seconds"),
+    requests: Optional[int] = typer.Option(None, help="Stop after this many requests"),
+    warmup: float = typer.Option(1.0, help="Unmeasured warm-up in seconds"),
+    providers: int = typer.Option(1, help="Number of mock providers"),
+    latency: float = typer.Option(0.0, help="Mean simulated provider latency in seconds"),
+    distribution: str = typer.Option("fixed", help="Latency distribution: fixed, uniform, exponential, lognormal"),
+    failure_rate: float = typer.Option(0.0, help="Share of provider calls that fail"),
+    timeout_rate: float = typer.Option(0.0, help="Share of provider calls that hang, then fail"),
+    attempt_timeout: Optional[float] = typer.Option(None, help="Cut off provider calls after this many seconds"),
+    max_retries: int = typer.Option(1, help="Attempts per provider"),
+    retry_budget: Optional[float] = typer.Option(None, help="Cap retries at this fraction of requests"),
+    prompt_chars: int = typer.Option(512, help="Prompt size in characters"),
+    messages: int = typer.Option(1, help="Messages per request"),
+    pii_ratio: float = typer.Option(0.0, help="Share of prompts containing PII"),
+    repeat_ratio: float = typer.Option(0.0, help="Share of requests repeating one prompt"),
+    middlewares: bool = typer.Option(True, help="Enable PromptGuard and PIIRedactor"),
+    seed: Optional[int] = typer.Option(None, help="Seed for reproducible runs"),
+    instrument: bool = typer.Option(True, "--metrics/--no-metrics", help="Record Prometheus metrics during the run"),
+    as_json: bool = typer.Option(False, "--json", help="Print the report as JSON"),
+    output: Optional[str] = typer.Option(None, help="Also write the JSON report to this file")
+):
+    """Load-test the gateway against simulated providers."""
+    import asyncio
+    import json
+    from rich.table import Table
+    from .bench import RequestMix, build_gateway, run_benchmark
+    from .gateway.retries import RetryBudget
+    from .observability import metrics
+    from .observability.logging import setup_logging
+    metrics.set_enabled(instrument)
+    # Injected failures are expected; per-request error logs would skew the numbers and the JSON
+    setup_logging("CRITICAL")
+
+    gateway = build_gateway(
+        providers=providers,
+        latency=latency,
+        latency_distribution=distribution,
+        failure_rate=failure_rate,
+        timeout_rate=timeout_rate,
+        middlewares=middlewares,
+        seed=seed,
+        attempt_timeout=attempt_timeout,
+        max_retries=max_retries,
+        retry_budget=RetryBudget(ratio=retry_budget) if retry_budget is not None else None
+    )
+    mix = RequestMix(
+        prompt_chars=prompt_chars,
+        messages=messages,
+        pii_ratio=pii_ratio,
+        repeat_ratio=repeat_ratio,
+        seed=seed
+    )
+    report = asyncio.run(run_benchmark(
+        gateway, mix, concurrency=concurrency, duration=duration, max_requests=requests, warmup=warmup
+    ))
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return
+
+    table = Table(title=f"aicp bench ({report['version']})")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    table.add_row("requests", str(report["requests"]))
+    table.add_row("errors", str(sum(report["errors"].values())))
+    table.add_row("throughput (req/s)", f"{report['throughput_rps']:.1f}")
+    for name, value in report["latency_ms"].items():
+        table.add_row(f"latency {name} (ms)", f"{value:.3f}")
+    for name, value in report["layers_ms"].items():
+        table.add_row(f"layer {name} (ms/req)", f"{value:.3f}")
+    get_console().print(table)
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,143 @@
+"""YAML configuration for `aicp serve`.
+
+Example::
+
+    server:
+      host: 0.0.0.0
+      port: 8080
+      workers: 4
+      drain_timeout: 30
+    gateway:
+      max_retries: 2
+      timeout: 60
+      attempt_timeout: 20
+      cache: {max_entries: 10000, ttl: 600}
+    providers:
+      - {type: openai, name: openai, base_url: https://api.openai.com/v1}
+      - {type: mock, name: fallback}
+    middlewares:
+      # First, so it records requests and responses after redaction
+      - {type: audit_log, path: /var/log/aicp/audit, fsync: interval}
+      - {type: prompt_guard}
+      - {type: pii_redactor, entities: [EMAIL, PHONE]}
+    state:
+      # Share circuit breakers between workers: mmap (one host) or socket (state server)
+      backend: mmap
+      path: /dev/shm/aicp-gateway.state
+      breaker: {failure_rate_threshold: 0.5, minimum_calls: 20, window_size: 30}
+
+Anything not set falls back to `DEFAULT_CONFIG`, which serves a single
+`MockProvider` so the server can be tried locally without credentials.
+"""
+import copy
+import inspect
+from typing import Any, Dict, List, Optional
+import yaml
+from .gateway.gateway import LLMGateway
+from .gateway.audit import AuditLog
+from .gateway.cache import ResponseCache
+from .gateway.middleware import Middleware, PIIRedactor, PromptGuard
+from .gateway.providers.base import LLMProvider
+from .gateway.providers.mock import MockProvider
+from .gateway.providers.openai import OpenAIProvider
+from .gateway.state import SharedCircuitBreaker, open_backend
+
+class ConfigError(Exception):
+    """Raised when a gateway configuration is invalid."""
+    pass
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "server": {
+        "host": "127.0.0.1",
+        "port": 8080,
+        "workers": 1,
+        "drain_timeout": 30.0,
+        "backlog": 1024,
+    },
+    "gateway": {},
+    "providers": [{"type": "mock", "name": "mock-provider"}],
+    "middlewares": [{"type": "prompt_guard"}, {"type": "pii_redactor"}],
+    "state": None,
+}
+
+PROVIDER_TYPES = {
+    "mock": MockProvider,
+    "openai": OpenAIProvider,
+}
+
+MIDDLEWARE_TYPES = {
+    "prompt_guard": PromptGuard,
+    "pii_redactor": PIIRedactor,
+    "audit_log": AuditLog,
+}
+
+GATEWAY_OPTIONS = ("max_retries", "timeout", "attempt_timeout", "coalesce", "provider_concurrency")
+
+def load_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """Read `path` and merge it over `DEFAULT_CONFIG`; without a path return the defaults."""
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if path is None:
+        return config
+    with open(path) as f:
+        loaded = yaml.safe_load(f) or {}
+    if not isinstance(loaded, dict):
+        raise ConfigError(f"{path}: expected a mapping at the top level")
+    for section in ("server", "gateway"):
+        config[section].update(loaded.get(section) or {})
+    for section in ("providers", "middlewares", "state"):
+        if section in loaded:
+            config[section] = loaded[section] or []
+    return config
+
+def _build(kind: str, types: Dict[str, type], spec: Dict[str, Any]):
+    options = dict(spec)
+    name = options.pop("type", None)
+    if name not in types:
+        raise ConfigError(f"Unknown {kind} type: {name!r} (expected one of {', '.join(types)})")
+    try:
+        return types[name](**options)
+    except (TypeError, ValueError) as e:
+        raise ConfigError(f"Invalid {kind} options for {name!r}: {e}") from e
+
+def build_providers(config: Dict[str, Any]) -> List[LLMProvider]:
+    providers = [_build("provider", PROVIDER_TYPES, spec) for spec in config.get("providers") or []]
+    if not providers:
+        raise ConfigError("At least one provider is required")
+    return providers
+
+def build_middlewares(config: Dict[str, Any]) -> List[Middleware]:
+    return [_build("middleware", MIDDLEWARE_TYPES, spec) for spec in config.get("middlewares") or []]
+
+def build_gateway(config: Dict[str, Any]) -> LLMGateway:
+    options = dict(config.get("gateway") or {})
+    cache = options.pop("cache", None)
+    unknown = set(options) - set(GATEWAY_OPTIONS)
+    if unknown:
+        raise ConfigError(f"Unknown gateway options: {', '.join(sorted(unknown))}")
+    state = config.get("state")
+    if state:
+        state = dict(state)
+        breaker = state.pop("breaker", None) or {}
+        backend = None
+        try:
+            backend = open_backend(state.pop("backend", "mmap"), state.pop("path", None), **state)
+            inspect.signature(SharedCircuitBreaker).bind("check", backend, **breaker)
+            options["breaker_factory"] = SharedCircuitBreaker.factory(backend, **breaker)
+        except (TypeError, ValueError) as e:
+            if backend is not None:
+                backend.close()
+            raise ConfigError(f"Invalid state options: {e}") from e
+        options["state_backend"] = backend
+    try:
+        providers = build_providers(config)
+        middlewares = build_middlewares(config)
+    except ConfigError:
+        if options.get("state_backend") is not None:
+            options["state_backend"].close()
+        raise
+    return LLMGateway(
+        providers=providers,
+        middlewares=middlewares,
+        cache=ResponseCache(**(cache if isinstance(cache, dict) else {})) if cache else None,
+        **options
+    )
@@ -0,0 +1,471 @@
+"""Append-only audit log of gateway traffic.
+
+`AuditLog` middleware queues every finished exchange and, once per event
+loop iteration, serializes the queued ones into an `AuditWriter`, whose
+background thread appends them to segment files as compressed blocks and
+indexes them by request id and time. `AuditReader` replays segments and
+looks records up.
+
+Layout of the log directory::
+
+    index.db              SQLite: segments, blocks by time, request ids -> block
+    <writer>-<seq>.seg    segments; sealed segments are never written again
+
+A segment starts with `SEGMENT_MAGIC` and a codec byte, followed by blocks:
+a `BLOCK_HEADER` (payload length, CRC32, record count) and the payload, one
+batch of records as a JSON array, compressed with the segment's codec. A
+block torn by a crash fails its length or CRC check; readers stop at it.
+"""
+import asyncio
+import atexit
+import json
+import os
+import socket
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from pydantic_core import to_json
+import structlog
+from .context import RequestContext, ResponseContext
+from .middleware import Middleware, StreamProcessor
+from .providers.base import CompletionChunk, CompletionRequest, CompletionResponse
+
+logger = structlog.get_logger()
+
+SEGMENT_MAGIC = b"AICPAUD1"
+BLOCK_HEADER = struct.Struct("<III")
+CODECS = {"none": 0, "zlib": 1}
+FSYNC_POLICIES = ("always", "interval", "never")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    name TEXT PRIMARY KEY,
+    writer TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    codec TEXT NOT NULL,
+    first_ts REAL,
+    last_ts REAL,
+    records INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    sealed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    first_ts REAL NOT NULL,
+    last_ts REAL NOT NULL,
+    records INTEGER NOT NULL,
+    PRIMARY KEY (segment, offset)
+);
+CREATE INDEX IF NOT EXISTS blocks_by_time ON blocks (last_ts, first_ts);
+CREATE TABLE IF NOT EXISTS records (
+    request_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_by_id ON records (request_id);
+"""
+
+def _connect(root: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False, timeout=30.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+class AuditWriter:
+    """Batched, append-only writer of audit records.
+
+    `append` serializes the record (a dict with at least `ts`, and
+    `request_id` to be found by `AuditReader.lookup`) in one native call
+    and queues the bytes; a background thread writes `batch_size` records
+    at a time as one block and indexes them. `fsync` is "always" (after
+    every block), "interval" (at most every `fsync_interval` seconds, and
+    on rotation) or "never". Segments are sealed once they reach
+    `max_segment_bytes` or `max_segment_age` seconds. When `max_buffer`
+    records are waiting, or after `close`, new ones are dropped and
+    counted in `dropped`.
+
+    Several processes may share one directory; each needs its own
+    `writer_id` (hostname and pid by default). Nothing is opened and no
+    thread runs until the first record is appended.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        writer_id: Optional[str] = None,
+        compression: str = "zlib",
+        compression_level: int = 6,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        max_segment_age: float = 3600.0,
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        batch_size: int = 128,
+        flush_interval: float = 0.2,
+        max_buffer: int = 100_000
+    ):
+        if compression not in CODECS:
+            raise ValueError(f"Unknown compression {compression!r} (expected one of {', '.join(CODECS)})")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r} (expected one of {', '.join(FSYNC_POLICIES)})")
+        self.root = root
+        # Defaults to hostname and pid, taken when the writer starts
+        self.writer_id = writer_id
+        self.compression = compression
+        self.compression_level = compression_level
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.written = 0
+        self.dropped = 0
+        self.segments = 0
+
+        self._index: Optional[sqlite3.Connection] = None
+        self._seq = 0
+        self._file = None
+        self._segment: Optional[str] = None
+        self._segment_opened = 0.0
+        self._segment_size = 0
+        self._synced = 0.0
+        self._unsynced = False
+        self._buffer: deque = deque()
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _start(self) -> bool:
+        # Deferred to the first record, so building a gateway (e.g. only to validate
+        # its config before forking workers) starts no thread and opens no files
+        with self._start_lock:
+            if self._started or self._closed:
+                return self._started
+            self.writer_id = self.writer_id or f"{socket.gethostname()}-{os.getpid()}"
+            os.makedirs(self.root, exist_ok=True)
+            self._index = _connect(self.root)
+            with self._index:
+                # Segments left open by an earlier writer with this id are never appended to again
+                self._index.execute("UPDATE segments SET sealed = 1 WHERE writer = ?", (self.writer_id,))
+                row = self._index.execute("SELECT MAX(seq) FROM segments WHERE writer = ?", (self.writer_id,)).fetchone()
+            self._seq = row[0] + 1 if row[0] is not None else 0
+            self._thread = threading.Thread(target=self._run, name="aicp-audit-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+            self._started = True
+            return True
+
+    def append(self, record: Dict[str, Any]):
+        if self._closed or len(self._buffer) >= self.max_buffer or not (self._started or self._start()):
+            self.dropped += 1
+            return
+        # Serializing here keeps the writer thread on work that releases the GIL
+        # (compression, file and index writes), so it barely competes with the event loop
+        try:
+            payload = to_json(record, fallback=str)
+        except Exception as e:
+            self.dropped += 1
+            logger.warn("audit_record_unserializable", error=str(e))
+            return
+        self._buffer.append((record["ts"], record.get("request_id"), payload))
+        if len(self._buffer) >= self.batch_size and not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything queued so far from the calling thread."""
+        with self._write_lock:
+            while self._buffer:
+                batch = []
+                while self._buffer and len(batch) < self.batch_size:
+                    batch.append(self._buffer.popleft())
+                self._write(batch)
+
+    def close(self, timeout: float = 5.0):
+        with self._start_lock:
+            if self._closed:
+                return
+            self._closed = True
+        if not self._started:
+            return
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self.flush()
+        with self._write_lock:
+            self._seal()
+            self._index.close()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                with self._write_lock:
+                    if self._file is None:
+                        continue
+                    now = time.time()
+                    # Time-based rotation also applies to idle segments
+                    if now - self._segment_opened >= self.max_segment_age:
+                        self._seal()
+                    elif self.fsync == "interval" and self._unsynced and now - self._synced >= self.fsync_interval:
+                        self._sync()
+            except Exception as e:
+                logger.error("audit_write_failed", error=str(e))
+
+    def _write(self, batch: List[Tuple[float, Optional[str], bytes]]):
+        payload = b"[" + b",".join(p for _, _, p in batch) + b"]"
+        if self.compression == "zlib":
+            payload = zlib.compress(payload, self.compression_level)
+        now = time.time()
+        if self._file is not None and (
+            self._segment_size + BLOCK_HEADER.size + len(payload) > self.max_segment_bytes
+            or now - self._segment_opened >= self.max_segment_age
+        ):
+            self._seal()
+        if self._file is None:
+            self._open_segment(now)
+
+        offset = self._segment_size
+        self._file.write(BLOCK_HEADER.pack(len(payload), zlib.crc32(payload), len(batch)) + payload)
+        self._file.flush()
+        self._segment_size += BLOCK_HEADER.size + len(payload)
+        self._unsynced = True
+        if self.fsync == "always" or (self.fsync == "interval" and now - self._synced >= self.fsync_interval):
+            self._sync()
+
+        first, last = min(ts for ts, _, _ in batch), max(ts for ts, _, _ in batch)
+        with self._index:
+            self._index.executemany(
+                "INSERT INTO records VALUES (?, ?, ?, ?)",
+                [(request_id, ts, self._segment, offset) for ts, request_id, _ in batch if request_id is not None]
+            )
+            self._index.execute(
+                "INSERT INTO blocks VALUES (?, ?, ?, ?, ?)", (self._segment, offset, first, last, len(batch))
+            )
+            self._index.execute(
+                "UPDATE segments SET first_ts = COALESCE(first_ts, ?), last_ts = MAX(COALESCE(last_ts, ?), ?),"
+                " records = records + ?, bytes = ? WHERE name = ?",
+                (first, last, last, len(batch), self._segment_size, self._segment)
+            )
+        self.written += len(batch)
+
+    def _open_segment(self, now: float):
+        self._segment = f"{self.writer_id}-{self._seq:06d}.seg"
+        self._seq += 1
+        self._file = open(os.path.join(self.root, self._segment), "xb")
+        self._file.write(SEGMENT_MAGIC + bytes([CODECS[self.compression]]))
+        self._segment_size = len(SEGMENT_MAGIC) + 1
+        self._segment_opened = now
+        self.segments += 1
+        with self._index:
+            self._index.execute(
+                "INSERT INTO segments (name, writer, seq, codec, bytes) VALUES (?, ?, ?, ?, ?)",
+                (self._segment, self.writer_id, self._seq - 1, self.compression, self._segment_size)
+            )
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._synced = time.time()
+        self._unsynced = False
+
+    def _seal(self):
+        if self._file is None:
+            return
+        if self.fsync != "never":
+            self._sync()
+        self._file.close()
+        self._file = None
+        with self._index:
+            self._index.execute("UPDATE segments SET sealed = 1 WHERE name = ?", (self._segment,))
+        logger.info("audit_segment_sealed", segment=self._segment, bytes=self._segment_size)
+
+class AuditReader:
+    """Replays and looks up records written by `AuditWriter`s to `root`.
+
+    Records come back in segment order (segments by first timestamp, then
+    name); each writer's records are in the order they were appended.
+    Segments still being written are read up to their last complete block.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._index = _connect(root)
+
+    def close(self):
+        self._index.close()
+
+    def segments(self) -> List[Dict[str, Any]]:
+        cursor = self._index.execute("SELECT * FROM segments ORDER BY first_ts IS NULL, first_ts, name")
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.records()
+
+    def records(self, since: Optional[float] = None, until: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Records with `since <= ts < until` (epoch seconds; either bound may be omitted)."""
+        if since is None and until is None:
+            for segment in self.segments():
+                for _, records in self._blocks(segment["name"]):
+                    yield from records
+            return
+
+        # Only the blocks whose time range overlaps the query are read
+        order = {s["name"]: i for i, s in enumerate(self.segments())}
+        blocks = self._index.execute(
+            "SELECT segment, offset FROM blocks WHERE last_ts >= ? AND first_ts < ?",
+            (since if since is not None else float("-inf"), until if until is not None else float("inf"))
+        ).fetchall()
+        for segment, offset in sorted(blocks, key=lambda b: (order.get(b[0], len(order)), b[1])):
+            for record in self._block_at(segment, offset):
+                if (since is None or record["ts"] >= since) and (until is None or record["ts"] < until):
+                    yield record
+
+    def lookup(self, request_id: str) -> List[Dict[str, Any]]:
+        """Every record for `request_id`, oldest first (cache hits repeat a response id)."""
+        rows = self._index.execute(
+            "SELECT DISTINCT segment, offset FROM records WHERE request_id = ? ORDER BY ts", (request_id,)
+        ).fetchall()
+        found = []
+        for segment, offset in rows:
+            found.extend(r for r in self._block_at(segment, offset) if r.get("request_id") == request_id)
+        return found
+
+    def _block_at(self, segment: str, offset: int) -> List[Dict[str, Any]]:
+        with open(os.path.join(self.root, segment), "rb") as f:
+            codec = self._codec(f)
+            f.seek(offset)
+            block = self._read_block(f, codec)
+        return block if block is not None else []
+
+    def _blocks(self, segment: str) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        with open(os.path.join(self.root, segment), "rb") as f:
+            codec = self._codec(f)
+            while True:
+                offset = f.tell()
+                block = self._read_block(f, codec)
+                if block is None:
+                    return
+                yield offset, block
+
+    @staticmethod
+    def _codec(f) -> int:
+        header = f.read(len(SEGMENT_MAGIC) + 1)
+        if header[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            raise ValueError(f"{f.name} is not an audit segment")
+        return header[-1]
+
+    @staticmethod
+    def _read_block(f, codec: int) -> Optional[List[Dict[str, Any]]]:
+        header = f.read(BLOCK_HEADER.size)
+        if len(header) < BLOCK_HEADER.size:
+            return None
+        length, crc, _ = BLOCK_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        if codec == CODECS["zlib"]:
+            payload = zlib.decompress(payload)
+        return json.loads(payload)
+
+def exchange_record(
+    ts: float,
+    request: Optional[CompletionRequest],
+    response: Union[CompletionResponse, CompletionChunk],
+    content: str
+) -> Dict[str, Any]:
+    """Audit record of one exchange; `response` is the last chunk of a stream, whose text is `content`."""
+    usage = response.usage
+    record = {
+        "ts": ts,
+        "request_id": response.id,
+        "model": response.model,
+        "stream": isinstance(response, CompletionChunk),
+        "request": None,
+        "response": {"content": content, "finish_reason": response.finish_reason},
+        "usage": {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens
+        } if usage is not None else None,
+        "provider": response.provider_metadata.get("provider"),
+        "provider_metadata": response.provider_metadata,
+    }
+    if request is not None:
+        record["request"] = {
+            "model": request.model,
+            "tenant_id": request.tenant_id,
+            "messages": [{"role": m.role.value, "content": m.content} for m in request.messages],
+            "temperature": request.temperature,
+            "max_tokens": request.max_tokens,
+        }
+    return record
+
+class AuditLog(Middleware):
+    """Middleware recording every exchange that reaches post-processing to `path`.
+
+    Place it first in the middleware list: its response hook then runs
+    last, so both the request and the response are recorded as the other
+    middleware (e.g. `PIIRedactor`) left them. Cache hits are recorded too;
+    failed calls never reach post-processing and are not. Options are
+    passed to `AuditWriter`.
+
+    The hook only queues the exchange; records are built and serialized
+    once per event loop iteration, after the responses have been returned.
+    """
+
+    def __init__(self, path: str, **options):
+        self.writer = AuditWriter(path, **options)
+        self._pending: List[Tuple[float, Optional[CompletionRequest], Any, str]] = []
+
+    async def process_request(self, ctx: RequestContext):
+        pass
+
+    async def process_response(self, ctx: ResponseContext):
+        response = ctx.response
+        self.record(ctx.request, response, response.content)
+
+    def record(self, request: Optional[CompletionRequest], response: Union[CompletionResponse, CompletionChunk], content: str):
+        if not self._pending:
+            try:
+                asyncio.get_running_loop().call_soon(self.drain)
+            except RuntimeError:
+                self.writer.append(exchange_record(time.time(), request, response, content))
+                return
+        self._pending.append((time.time(), request, response, content))
+
+    def drain(self):
+        pending, self._pending = self._pending, []
+        for exchange in pending:
+            self.writer.append(exchange_record(*exchange))
+
+    def stream_processor(self) -> StreamProcessor:
+        return _AuditStream(self)
+
+    def close(self):
+        self.drain()
+        self.writer.close()
+
+class _AuditStream(StreamProcessor):
+    def __init__(self, audit: AuditLog):
+        self.audit = audit
+        self.parts: List[str] = []
+
+    def feed(self, text: str) -> str:
+        if text:
+            self.parts.append(text)
+        return text
+
+    def close(self, request: Optional[CompletionRequest], last: CompletionChunk):
+        self.audit.record(request, last, "".join(self.parts))
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import structlog
+from .providers.base import CompletionRequest, CompletionResponse
+
+logger = structlog.get_logger()
+
+CacheRule = Callable[[CompletionRequest], bool]
+
+def request_key(request: CompletionRequest) -> str:
+    """Canonical hash of the fields that determine a completion."""
+    payload = {
+        "model": request.model,
+        "messages": [m.model_dump(mode="json") for m in request.messages],
+        "temperature": request.temperature,
+        "max_tokens": request.max_tokens,
+        "stop": request.stop,
+        "extra_params": request.extra_params,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def max_temperature(limit: float = 0.0) -> CacheRule:
+    """Only cache requests whose sampling temperature is at most `limit`."""
+    def rule(request: CompletionRequest) -> bool:
+        return request.temperature <= limit
+    return rule
+
+def no_streaming(request: CompletionRequest) -> bool:
+    return not request.stream
+
+class DiskCacheTier:
+    """Second-level cache storing one JSON file per key."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return record["expires_at"], record["response"]
+
+    def set(self, key: str, expires_at: float, payload: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"expires_at": expires_at, "response": payload}, f)
+        os.replace(tmp, path)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+class ResponseCache:
+    """Exact-match completion cache with LRU, TTL and byte-size eviction."""
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = 3600.0,
+        rules: Optional[List[CacheRule]] = None,
+        disk_path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.rules = rules if rules is not None else [max_temperature(0.0), no_streaming]
+        self.disk = DiskCacheTier(disk_path) if disk_path else None
+        # key -> (expires_at, size, response)
+        self._entries: "OrderedDict[str, Tuple[float, int, CompletionResponse]]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+
+    def is_cacheable(self, request: CompletionRequest) -> bool:
+        return all(rule(request) for rule in self.rules)
+
+    def get(self, key: str) -> Optional[CompletionResponse]:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, response = entry
+            if expires_at >= now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return response
+            self._remove(key)
+
+        if self.disk is not None:
+            record = self.disk.get(key)
+            if record is not None:
+                expires_at, payload = record
+                if expires_at >= now:
+                    response = CompletionResponse.model_validate_json(payload)
+                    self._store(key, expires_at, len(payload), response)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return response
+                self.disk.delete(key)
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, response: CompletionResponse):
+        payload = response.model_dump_json()
+        expires_at = time.time() + self.ttl if self.ttl is not None else float("inf")
+        self._store(key, expires_at, len(payload), response)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, expires_at, payload)
+            except OSError as e:
+                logger.warn("response_cache_disk_write_failed", error=str(e))
+
+    def _store(self, key: str, expires_at: float, size: int, response: CompletionResponse):
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, size, response)
+        self.current_bytes += size
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_hits": self.disk_hits,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+        }
@@ -0,0 +1,103 @@
+from typing import Any, Dict, List, Optional, Sequence, Set
+from .providers.base import CompletionRequest, CompletionResponse, Message
+
+class RequestContext:
+    """Copy-on-write view of a request shared by the middleware chain.
+
+    Middleware reads `messages` and records edits with `set_content` or
+    `update`; nothing is copied until the first edit, and the pydantic
+    request is rebuilt once, when `request` is read, however many
+    middlewares changed it.
+    """
+
+    def __init__(self, request: CompletionRequest):
+        self._request = request
+        self._messages: Optional[List[Message]] = None
+        # Indices of messages this context already copied and may edit in place
+        self._owned: Set[int] = set()
+        self._updates: Dict[str, Any] = {}
+
+    @property
+    def messages(self) -> Sequence[Message]:
+        # Treat as read-only; edit through `set_content`
+        return self._messages if self._messages is not None else self._request.messages
+
+    def set_content(self, index: int, content: str):
+        if self._messages is None:
+            self._messages = list(self._request.messages)
+        if index in self._owned:
+            self._messages[index].content = content
+            return
+        self._messages[index] = self._messages[index].model_copy(update={"content": content})
+        self._owned.add(index)
+
+    def get(self, field: str) -> Any:
+        if field == "messages":
+            return self.messages
+        return self._updates[field] if field in self._updates else getattr(self._request, field)
+
+    def update(self, **fields):
+        if "messages" in fields:
+            self._messages = list(fields.pop("messages"))
+            self._owned = set()
+        self._updates.update(fields)
+
+    @property
+    def changed(self) -> bool:
+        return self._messages is not None or bool(self._updates)
+
+    @property
+    def request(self) -> CompletionRequest:
+        if self._messages is not None:
+            self._updates["messages"] = self._messages
+            self._messages = None
+            self._owned = set()
+        if self._updates:
+            self._request = self._request.model_copy(update=self._updates)
+            self._updates = {}
+        return self._request
+
+    def replace(self, request: CompletionRequest):
+        self._request = request
+        self._messages = None
+        self._owned = set()
+        self._updates = {}
+
+class ResponseContext:
+    """Copy-on-write view of a response passed back through the middleware chain.
+
+    `request` is the request as pre-processing left it, when the caller knows it.
+    """
+
+    def __init__(self, response: CompletionResponse, request: Optional[CompletionRequest] = None):
+        self._response = response
+        self._updates: Dict[str, Any] = {}
+        self.request = request
+
+    @property
+    def content(self) -> str:
+        return self._updates.get("content", self._response.content)
+
+    def set_content(self, content: str):
+        self._updates["content"] = content
+
+    def get(self, field: str) -> Any:
+        return self._updates[field] if field in self._updates else getattr(self._response, field)
+
+    def update(self, **fields):
+        self._updates.update(fields)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self._updates)
+
+    @property
+    def response(self) -> CompletionResponse:
+        if self._updates:
+            self._response = self._response.model_copy(update=self._updates)
+            self._updates = {}
+        return self._response
+
+    def replace(self, response: CompletionResponse):
+        self._response = response
+        self._updates = {}
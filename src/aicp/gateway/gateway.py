@@ -1,26 +1,270 @@
-from typing import List, Optional
-from .providers.base import LLMProvider, CompletionRequest, CompletionResponse
-from .reliability import ReliabilityLayer
+import asyncio
+import itertools
+import time
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Tuple, Union
+from .providers.base import LLMProvider, CompletionRequest, CompletionResponse, CompletionChunk
+from .reliability import ReliabilityLayer, HedgingPolicy, CircuitBreaker, DeadlineExceededError
+from .retries import RetryBudget
+from .routing import RoutingStrategy
+from .ratelimit import AdmissionController
 from .middleware import Middleware, MiddlewarePipeline
+from .cache import ResponseCache, request_key
+from .coalescing import RequestCoalescer
+from .state import StateBackend
+from ..observability import metrics, tracing
+from ..observability.metrics import GATEWAY_LATENCY_SECONDS, GATEWAY_REQUESTS_TOTAL, child
 
 class LLMGateway:
     def __init__(
         self,
         providers: List[LLMProvider],
         middlewares: Optional[List[Middleware]] = None,
-        max_retries: int = 3
+        max_retries: int = 3,
+        cache: Optional[ResponseCache] = None,
+        coalesce: bool = False,
+        hedging: Optional[HedgingPolicy] = None,
+        routing: Optional[RoutingStrategy] = None,
+        admission: Optional[AdmissionController] = None,
+        provider_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        attempt_timeout: Optional[float] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        provider_retry_budget: Optional[Callable[[], RetryBudget]] = None,
+        breaker_factory: Optional[Callable[[str], CircuitBreaker]] = None,
+        state_backend: Optional[StateBackend] = None
     ):
-        self.reliability = ReliabilityLayer(providers, max_retries=max_retries)
+        self.reliability = ReliabilityLayer(
+            providers, max_retries=max_retries, hedging=hedging, routing=routing,
+            admission=admission, provider_concurrency=provider_concurrency,
+            attempt_timeout=attempt_timeout, retry_budget=retry_budget,
+            provider_retry_budget=provider_retry_budget, breaker_factory=breaker_factory
+        )
+        # Default time budget per call when neither the call nor the request sets one
+        self.timeout = timeout
         self.pipeline = MiddlewarePipeline(middlewares or [])
+        self.cache = cache
+        self.coalescer = RequestCoalescer() if coalesce else None
+        self.admission = admission
+        # Backend of the shared breakers, owned by this gateway and closed with it
+        self.state_backend = state_backend
 
-    async def complete(self, request: CompletionRequest) -> CompletionResponse:
+    async def complete(self, request: CompletionRequest, timeout: Optional[float] = None) -> CompletionResponse:
+        """Complete `request` within `timeout` seconds (else `request.timeout`, else the gateway default).
+
+        Raises `DeadlineExceededError` once the budget is spent; in-flight
+        provider calls are cancelled.
+        """
+        deadline = self._deadline(request, timeout)
+        if not (metrics.ENABLED or tracing.ENABLED):
+            return await self._complete(request, deadline)
+
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with tracing.span("gateway.complete", model=request.model):
+                response = await self._complete(request, deadline)
+            outcome = "cache_hit" if response.provider_metadata.get("cache_hit") else "success"
+            return response
+        finally:
+            if metrics.ENABLED:
+                child(GATEWAY_REQUESTS_TOTAL, request.model, outcome).inc()
+                child(GATEWAY_LATENCY_SECONDS, request.model).observe(time.perf_counter() - started)
+
+    def close(self):
+        """Flush and release middleware resources (e.g. an `AuditLog`) and the state backend; the gateway is unusable afterwards."""
+        for mw in self.pipeline.middlewares:
+            mw.close()
+        if self.state_backend is not None:
+            self.state_backend.close()
+            self.state_backend = None
+
+    def _deadline(self, request: CompletionRequest, timeout: Optional[float] = None) -> Optional[float]:
+        for budget in (timeout, request.timeout, self.timeout):
+            if budget is not None:
+                return asyncio.get_running_loop().time() + budget
+        return None
+
+    async def _complete(self, request: CompletionRequest, deadline: Optional[float] = None) -> CompletionResponse:
+        if deadline is None:
+            return await self._run(request, None)
+        # Also bounds middleware and admission waits; provider attempts get their own, tighter timeouts
+        cm = asyncio.timeout_at(deadline)
+        try:
+            async with cm:
+                return await self._run(request, deadline)
+        except TimeoutError as e:
+            # A per-attempt timeout that outlived the retries is the provider's failure, not ours
+            if not cm.expired():
+                raise
+            raise DeadlineExceededError("deadline exceeded") from e
+
+    async def _run(self, request: CompletionRequest, deadline: Optional[float]) -> CompletionResponse:
         # 1. Run pre-processing middleware (Security, PII, etc.)
         processed_request = await self.pipeline.run_pre(request)
-        
-        # 2. Execute with reliability patterns (Retries, Circuit Breakers, Fallbacks)
-        response = await self.reliability.execute_with_fallback(processed_request)
-        
-        # 3. Run post-processing middleware
-        final_response = await self.pipeline.run_post(response)
-        
+
+        # 2. Serve repeated requests from the cache, keyed on the processed request
+        key, cacheable, cached = self._lookup(processed_request)
+        if cached is not None:
+            return await self.pipeline.run_post(cached, processed_request)
+
+        # Cache hits are free; everything else counts against the tenant's rate limits
+        if self.admission is not None:
+            await self.admission.admit_tenant(processed_request)
+
+        # 3. Execute with reliability patterns (Retries, Circuit Breakers, Fallbacks)
+        #    Identical in-flight requests share a single upstream call when coalescing.
+        #    Waiters may have different budgets, so the shared call runs without a
+        #    deadline; each waiter's own `timeout_at` in `_complete` bounds its wait.
+        if self.coalescer is not None:
+            response = await self.coalescer.run(
+                key, lambda: self._execute(processed_request, key if cacheable else None, None)
+            )
+        else:
+            response = await self._execute(processed_request, key if cacheable else None, deadline)
+
+        # 4. Run post-processing middleware
+        final_response = await self.pipeline.run_post(response, processed_request)
+
         return final_response
+
+    async def stream(self, request: CompletionRequest, timeout: Optional[float] = None) -> AsyncIterator[CompletionChunk]:
+        deadline = self._deadline(request, timeout)
+        processed_request = await self.pipeline.run_pre(request)
+        if self.admission is not None:
+            await self.admission.admit_tenant(processed_request)
+        chunks = self.reliability.execute_stream(processed_request, deadline)
+        async for chunk in self.pipeline.run_stream(chunks, processed_request):
+            yield chunk
+
+    async def complete_many(
+        self,
+        requests: Iterable[CompletionRequest],
+        max_concurrency: int = 16,
+        batch_size: int = 1
+    ) -> List[Union[CompletionResponse, Exception]]:
+        """Complete a batch of requests; results keep the input order.
+
+        A failed item holds its exception instead of failing the whole call.
+        """
+        results: List[Union[CompletionResponse, Exception, None]] = []
+        async for index, result in self.complete_iter(requests, max_concurrency, batch_size):
+            results.extend([None] * (index + 1 - len(results)))
+            results[index] = result
+        return results
+
+    async def complete_iter(
+        self,
+        requests: Iterable[CompletionRequest],
+        max_concurrency: int = 16,
+        batch_size: int = 1
+    ) -> AsyncIterator[Tuple[int, Union[CompletionResponse, Exception]]]:
+        """Yield `(index, response_or_exception)` pairs as requests finish.
+
+        At most `max_concurrency` workers pull from `requests` lazily, so the
+        input may be a large generator. With `batch_size > 1` each worker
+        takes micro-batches that go to providers accepting batches in one
+        call (see `LLMProvider.max_batch_size`).
+        """
+        items = iter(enumerate(requests))
+        results: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency * batch_size)
+        done = object()
+        errors: List[Exception] = []
+
+        async def worker():
+            try:
+                while True:
+                    batch = list(itertools.islice(items, batch_size))
+                    if not batch:
+                        break
+                    indices = [i for i, _ in batch]
+                    if len(batch) == 1:
+                        outcomes = [await self._complete_isolated(batch[0][1])]
+                    else:
+                        outcomes = await self._complete_batch([r for _, r in batch])
+                    for item in zip(indices, outcomes):
+                        await results.put(item)
+            except Exception as e:
+                # Only iterating `requests` itself can fail here; items are isolated
+                errors.append(e)
+            await results.put(done)
+
+        workers = [asyncio.create_task(worker()) for _ in range(max_concurrency)]
+        try:
+            running = len(workers)
+            while running:
+                item = await results.get()
+                if item is done:
+                    running -= 1
+                    continue
+                yield item
+            if errors:
+                raise errors[0]
+        finally:
+            for w in workers:
+                w.cancel()
+
+    async def _complete_isolated(self, request: CompletionRequest) -> Union[CompletionResponse, Exception]:
+        try:
+            return await self.complete(request)
+        except Exception as e:
+            return e
+
+    async def _complete_batch(self, requests: List[CompletionRequest]) -> List[Union[CompletionResponse, Exception]]:
+        outcomes: List[Union[CompletionResponse, Exception, None]] = [None] * len(requests)
+        pending: List[Tuple[int, CompletionRequest, Optional[str]]] = []
+
+        for i, request in enumerate(requests):
+            try:
+                processed_request = await self.pipeline.run_pre(request)
+                key, cacheable, cached = self._lookup(processed_request)
+                if cached is not None:
+                    outcomes[i] = await self.pipeline.run_post(cached, processed_request)
+                    continue
+                if self.admission is not None:
+                    await self.admission.admit_tenant(processed_request)
+                pending.append((i, processed_request, key if cacheable else None))
+            except Exception as e:
+                outcomes[i] = e
+
+        if pending:
+            # One upstream call serves the batch, so it runs under the tightest member deadline
+            deadlines = [d for d in (self._deadline(r) for _, r, _ in pending) if d is not None]
+            responses = await self.reliability.execute_batch(
+                [r for _, r, _ in pending], min(deadlines) if deadlines else None
+            )
+            for (i, processed_request, cache_key), response in zip(pending, responses):
+                if isinstance(response, Exception):
+                    outcomes[i] = response
+                    continue
+                if cache_key is not None:
+                    self.cache.set(cache_key, response)
+                try:
+                    outcomes[i] = await self.pipeline.run_post(response, processed_request)
+                except Exception as e:
+                    outcomes[i] = e
+
+        return outcomes
+
+    def _lookup(self, request: CompletionRequest) -> Tuple[Optional[str], bool, Optional[CompletionResponse]]:
+        key = None
+        cacheable = self.cache is not None and self.cache.is_cacheable(request)
+        if cacheable or self.coalescer is not None:
+            key = request_key(request)
+        if cacheable:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return key, cacheable, cached.model_copy(
+                    update={"provider_metadata": {**cached.provider_metadata, "cache_hit": True}}
+                )
+        return key, cacheable, None
+
+    async def _execute(
+        self,
+        request: CompletionRequest,
+        cache_key: Optional[str],
+        deadline: Optional[float] = None
+    ) -> CompletionResponse:
+        response = await self.reliability.execute_with_fallback(request, deadline)
+        if cache_key is not None:
+            self.cache.set(cache_key, response)
+        return response
@@ -1,17 +1,62 @@
 import re
-from typing import List, Optional
+import time
+from typing import AsyncIterator, List, Optional, Tuple
 import structlog
-from .providers.base import CompletionRequest, CompletionResponse
+from .providers.base import CompletionRequest, CompletionResponse, CompletionChunk
+from .context import RequestContext, ResponseContext
+from .scanning import LiteralScanner, PatternScanner, is_literal
+from ..observability import metrics, tracing
+from ..observability.metrics import MIDDLEWARE_LATENCY_SECONDS, child
 
 logger = structlog.get_logger()
 
+class StreamProcessor:
+    """Incremental counterpart of `Middleware.post_process` for one streamed response."""
+
+    def feed(self, text: str) -> str:
+        return text
+
+    def flush(self) -> str:
+        return ""
+
+    def close(self, request: Optional[CompletionRequest], last: CompletionChunk):
+        """Called once the stream has ended, with the final chunk as emitted."""
+        pass
+
 class Middleware:
+    """Request/response hook run by `MiddlewarePipeline`.
+
+    Override `pre_process`/`post_process` to return (possibly new) pydantic
+    objects, or `process_request`/`process_response` to read and edit a
+    shared copy-on-write context without rebuilding the request per middleware.
+    """
+
     async def pre_process(self, request: CompletionRequest) -> CompletionRequest:
         return request
 
     async def post_process(self, response: CompletionResponse) -> CompletionResponse:
         return response
 
+    async def process_request(self, ctx: RequestContext):
+        request = ctx.request
+        result = await self.pre_process(request)
+        if result is not request:
+            ctx.replace(result)
+
+    async def process_response(self, ctx: ResponseContext):
+        response = ctx.response
+        result = await self.post_process(response)
+        if result is not response:
+            ctx.replace(result)
+
+    def stream_processor(self) -> Optional[StreamProcessor]:
+        """Return a per-stream processor, or None to pass chunks through untouched."""
+        return None
+
+    def close(self):
+        """Release resources such as files or background threads; called when the gateway shuts down."""
+        pass
+
 class PIIRedactor(Middleware):
     # Simplified regex-based PII detection for the MVP
     PII_PATTERNS = {
@@ -20,30 +65,80 @@ class PIIRedactor(Middleware):
         "SSN": r"\d{3}-\d{2}-\d{4}",
         "CREDIT_CARD": r"\b(?:\d[ -]*?){13,16}\b"
     }
+    # First character every match of a pattern must start with (see PatternScanner)
+    PII_GUARDS = {
+        "PHONE": r"[+(\d]",
+        "SSN": r"[+(\d]",
+        "CREDIT_CARD": r"[+(\d]"
+    }
 
-    def __init__(self, entities: Optional[List[str]] = None):
+    def __init__(self, entities: Optional[List[str]] = None, stream_holdback: int = 64):
         self.entities = entities or list(self.PII_PATTERNS.keys())
+        # Characters withheld at the tail of a stream so PII split across chunks is still caught
+        self.stream_holdback = stream_holdback
+        self.scanner = PatternScanner(
+            {e: self.PII_PATTERNS[e] for e in self.entities if e in self.PII_PATTERNS},
+            guards=self.PII_GUARDS
+        )
+
+    def redact(self, content: str) -> str:
+        content, _ = self.scanner.sub(content, lambda entity: f"[{entity}_REDACTED]")
+        return content
+
+    def match_spans(self, content: str) -> List[Tuple[int, int]]:
+        return self.scanner.spans(content)
 
     async def pre_process(self, request: CompletionRequest) -> CompletionRequest:
-        new_messages = []
-        for msg in request.messages:
-            content = msg.content
-            for entity in self.entities:
-                pattern = self.PII_PATTERNS.get(entity)
-                if pattern:
-                    content = re.sub(pattern, f"[{entity}_REDACTED]", content)
-            new_messages.append(msg.model_copy(update={"content": content}))
-        
-        return request.model_copy(update={"messages": new_messages})
+        ctx = RequestContext(request)
+        await self.process_request(ctx)
+        return ctx.request
 
     async def post_process(self, response: CompletionResponse) -> CompletionResponse:
-        content = response.content
-        for entity in self.entities:
-            pattern = self.PII_PATTERNS.get(entity)
-            if pattern:
-                content = re.sub(pattern, f"[{entity}_REDACTED]", content)
-        
-        return response.model_copy(update={"content": content})
+        ctx = ResponseContext(response)
+        await self.process_response(ctx)
+        return ctx.response
+
+    async def process_request(self, ctx: RequestContext):
+        for i, msg in enumerate(ctx.messages):
+            content = self.redact(msg.content)
+            if content is not msg.content:
+                ctx.set_content(i, content)
+
+    async def process_response(self, ctx: ResponseContext):
+        content = self.redact(ctx.content)
+        if content is not ctx.content:
+            ctx.set_content(content)
+
+    def stream_processor(self) -> StreamProcessor:
+        return _RedactingStream(self)
+
+class _RedactingStream(StreamProcessor):
+    def __init__(self, redactor: PIIRedactor):
+        self.redactor = redactor
+        self.buffer = ""
+
+    def feed(self, text: str) -> str:
+        self.buffer += text
+        boundary = len(self.buffer) - self.redactor.stream_holdback
+        if boundary <= 0:
+            return ""
+
+        # Never cut through (or right after) a match: it may still grow with the next chunk
+        spans = self.redactor.match_spans(self.buffer)
+        moved = True
+        while moved:
+            moved = False
+            for start, end in spans:
+                if start < boundary <= end:
+                    boundary = start
+                    moved = True
+
+        emitted, self.buffer = self.buffer[:boundary], self.buffer[boundary:]
+        return self.redactor.redact(emitted)
+
+    def flush(self) -> str:
+        emitted, self.buffer = self.buffer, ""
+        return self.redactor.redact(emitted)
 
 class PromptGuard(Middleware):
     INJECTION_PATTERNS = [
@@ -54,25 +149,107 @@ class PromptGuard(Middleware):
         r"do not mention"
     ]
 
+    def __init__(self, patterns: Optional[List[str]] = None):
+        self.patterns = patterns or list(self.INJECTION_PATTERNS)
+        if all(is_literal(p) for p in self.patterns):
+            self.scanner = LiteralScanner(self.patterns)
+        else:
+            self.scanner = PatternScanner({p: p for p in self.patterns}, re.IGNORECASE)
+
     async def pre_process(self, request: CompletionRequest) -> CompletionRequest:
-        for msg in request.messages:
-            for pattern in self.INJECTION_PATTERNS:
-                if re.search(pattern, msg.content, re.IGNORECASE):
+        self.inspect(request.messages)
+        return request
+
+    async def process_request(self, ctx: RequestContext):
+        # Read-only: never materialises a request
+        self.inspect(ctx.messages)
+
+    async def process_response(self, ctx: ResponseContext):
+        pass
+
+    def inspect(self, messages):
+        for msg in messages:
+            seen = set()
+            for pattern, _ in self.scanner.finditer(msg.content):
+                if pattern not in seen:
+                    seen.add(pattern)
                     logger.warn("potential_prompt_injection_detected", pattern=pattern)
                     # We could raise an error here or just log it
                     # For now, we'll just log
-        return request
 
 class MiddlewarePipeline:
     def __init__(self, middlewares: List[Middleware]):
         self.middlewares = middlewares
 
     async def run_pre(self, request: CompletionRequest) -> CompletionRequest:
+        ctx = RequestContext(request)
+        instrumented = metrics.ENABLED or tracing.ENABLED
         for mw in self.middlewares:
-            request = await mw.pre_process(request)
-        return request
+            if instrumented:
+                await self._timed(mw, "pre_process", mw.process_request, ctx)
+            else:
+                await mw.process_request(ctx)
+        return ctx.request
 
-    async def run_post(self, response: CompletionResponse) -> CompletionResponse:
+    async def run_post(self, response: CompletionResponse, request: Optional[CompletionRequest] = None) -> CompletionResponse:
+        ctx = ResponseContext(response, request)
+        instrumented = metrics.ENABLED or tracing.ENABLED
         for mw in reversed(self.middlewares):
-            response = await mw.post_process(response)
-        return response
+            if instrumented:
+                await self._timed(mw, "post_process", mw.process_response, ctx)
+            else:
+                await mw.process_response(ctx)
+        return ctx.response
+
+    @staticmethod
+    async def _timed(mw: Middleware, hook: str, func, ctx):
+        name = type(mw).__name__
+        started = time.perf_counter()
+        try:
+            with tracing.span(f"middleware.{hook}", middleware=name):
+                await func(ctx)
+        finally:
+            if metrics.ENABLED:
+                child(MIDDLEWARE_LATENCY_SECONDS, name, hook).observe(time.perf_counter() - started)
+
+    async def run_stream(
+        self,
+        chunks: AsyncIterator[CompletionChunk],
+        request: Optional[CompletionRequest] = None
+    ) -> AsyncIterator[CompletionChunk]:
+        processors = [p for p in (mw.stream_processor() for mw in reversed(self.middlewares)) if p is not None]
+        if not processors:
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        last = None
+        emitted = None
+        async for chunk in chunks:
+            last = chunk
+            text = chunk.delta
+            for processor in processors:
+                text = processor.feed(text)
+            if chunk.finish_reason is not None:
+                text += self._flush(processors)
+            if text or chunk.finish_reason is not None or chunk.usage is not None:
+                emitted = chunk.model_copy(update={"delta": text})
+                yield emitted
+
+        # Upstream ended without a final chunk: release whatever is still held back
+        if last is not None and last.finish_reason is None:
+            tail = self._flush(processors)
+            if tail:
+                emitted = last.model_copy(update={"delta": tail})
+                yield emitted
+
+        if emitted is not None:
+            for processor in processors:
+                processor.close(request, emitted)
+
+    @staticmethod
+    def _flush(processors: List[StreamProcessor]) -> str:
+        text = ""
+        for processor in processors:
+            text = processor.feed(text) + processor.flush()
+        return text
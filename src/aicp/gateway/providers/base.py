@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, AsyncIterator
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -21,6 +21,11 @@ class CompletionRequest(BaseModel):
     stream: bool = False
     stop: Optional[Union[str, List[str]]] = None
     extra_params: Dict[str, Any] = Field(default_factory=dict)
+    # Gateway-side routing hints; never forwarded to providers
+    tenant_id: Optional[str] = None
+    priority: int = 0
+    # Total time budget in seconds for the gateway call, retries and fallbacks included
+    timeout: Optional[float] = None
 
 class Usage(BaseModel):
     prompt_tokens: int
@@ -36,14 +41,43 @@ class CompletionResponse(BaseModel):
     finish_reason: Optional[str] = None
     provider_metadata: Dict[str, Any] = Field(default_factory=dict)
 
+class CompletionChunk(BaseModel):
+    id: str
+    model: str
+    delta: str = ""
+    role: Role = Role.ASSISTANT
+    finish_reason: Optional[str] = None
+    usage: Optional[Usage] = None
+    provider_metadata: Dict[str, Any] = Field(default_factory=dict)
+
 from abc import ABC, abstractmethod
 
 class LLMProvider(ABC):
+    # Largest micro-batch `complete_batch` accepts in one upstream call; 1 means no native batching
+    max_batch_size: int = 1
+
     @abstractmethod
     async def complete(self, request: CompletionRequest) -> CompletionResponse:
         """Execute a completion request."""
         pass
 
+    async def complete_batch(self, requests: List[CompletionRequest]) -> List[CompletionResponse]:
+        """Execute several requests in one upstream call, preserving order."""
+        return [await self.complete(r) for r in requests]
+
+    async def stream(self, request: CompletionRequest) -> AsyncIterator[CompletionChunk]:
+        """Stream a completion. Providers without native streaming yield one chunk."""
+        response = await self.complete(request)
+        yield CompletionChunk(
+            id=response.id,
+            model=response.model,
+            delta=response.content,
+            role=response.role,
+            finish_reason=response.finish_reason or "stop",
+            usage=response.usage,
+            provider_metadata=response.provider_metadata
+        )
+
     @property
     @abstractmethod
     def provider_name(self) -> str:
@@ -1,13 +1,73 @@
+import asyncio
+import math
+import random
 import uuid
-from .base import LLMProvider, CompletionRequest, CompletionResponse, Usage, Role
+from typing import AsyncIterator, Optional
+from .base import LLMProvider, CompletionRequest, CompletionResponse, CompletionChunk, Usage, Role
 import structlog
 
 logger = structlog.get_logger()
 
+class MockProviderError(Exception):
+    """Failure injected by MockProvider."""
+    pass
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
 class MockProvider(LLMProvider):
-    def __init__(self, name: str = "mock-provider", response_content: str = "This is a mock response."):
+    def __init__(
+        self,
+        name: str = "mock-provider",
+        response_content: str = "This is a mock response.",
+        chunk_size: int = 4,
+        chunk_delay: float = 0.0,
+        latency: float = 0.0,
+        latency_distribution: str = "fixed",
+        latency_spread: float = 0.5,
+        failure_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_seconds: float = 30.0,
+        seed: Optional[int] = None
+    ):
         self.name = name
         self.response_content = response_content
+        # Streaming: emit `chunk_size` characters every `chunk_delay` seconds
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        # Simulated upstream behaviour: `latency` is the mean (median for lognormal),
+        # `latency_spread` the relative width (uniform) or sigma (lognormal)
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.latency = latency
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.failure_rate = failure_rate
+        # Timeouts hang for `hang_seconds` before failing, like a stuck upstream
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.rng = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        if self.latency_distribution == "uniform":
+            return self.rng.uniform(self.latency * (1 - self.latency_spread), self.latency * (1 + self.latency_spread))
+        if self.latency_distribution == "exponential":
+            return self.rng.expovariate(1.0 / self.latency)
+        if self.latency_distribution == "lognormal":
+            return self.rng.lognormvariate(math.log(self.latency), self.latency_spread)
+        return self.latency
+
+    async def _simulate_upstream(self):
+        delay = self.sample_latency()
+        if delay:
+            await asyncio.sleep(delay)
+        roll = self.rng.random() if (self.failure_rate or self.timeout_rate) else 1.0
+        if roll < self.timeout_rate:
+            await asyncio.sleep(self.hang_seconds)
+            raise MockProviderError(f"{self.name}: upstream timed out")
+        if roll < self.timeout_rate + self.failure_rate:
+            raise MockProviderError(f"{self.name}: injected failure")
 
     @property
     def provider_name(self) -> str:
@@ -15,25 +75,48 @@ class MockProvider(LLMProvider):
 
     async def complete(self, request: CompletionRequest) -> CompletionResponse:
         # Log the received messages to verify middleware redaction
-        for msg in request.messages:
-            logger.info("mock_provider_received", role=msg.role, content=msg.content)
+        logger.debug("mock_provider_received", messages=request.messages)
 
         # Simulate local latency if needed
+        await self._simulate_upstream()
         content = f"{self.response_content}"
-        
-        # Calculate mock usage
-        prompt_len = sum(len(m.content) for m in request.messages)
-        completion_len = len(content)
-        
+
         return CompletionResponse(
             id=f"mock-{uuid.uuid4()}",
             model=request.model,
             content=content,
             role=Role.ASSISTANT,
-            usage=Usage(
-                prompt_tokens=prompt_len // 4,  # Rough token estimate
-                completion_tokens=completion_len // 4,
-                total_tokens=(prompt_len + completion_len) // 4
-            ),
+            usage=self._usage(request, content),
             provider_metadata={"mock": True}
         )
+
+    async def stream(self, request: CompletionRequest) -> AsyncIterator[CompletionChunk]:
+        logger.debug("mock_provider_received", messages=request.messages)
+
+        await self._simulate_upstream()
+        response_id = f"mock-{uuid.uuid4()}"
+        content = self.response_content
+        step = max(1, self.chunk_size)
+        for start in range(0, len(content), step):
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield CompletionChunk(id=response_id, model=request.model, delta=content[start:start + step])
+
+        yield CompletionChunk(
+            id=response_id,
+            model=request.model,
+            finish_reason="stop",
+            usage=self._usage(request, content),
+            provider_metadata={"mock": True}
+        )
+
+    @staticmethod
+    def _usage(request: CompletionRequest, content: str) -> Usage:
+        # Calculate mock usage
+        prompt_len = sum(len(m.content) for m in request.messages)
+        completion_len = len(content)
+        return Usage(
+            prompt_tokens=prompt_len // 4,  # Rough token estimate
+            completion_tokens=completion_len // 4,
+            total_tokens=(prompt_len + completion_len) // 4
+        )
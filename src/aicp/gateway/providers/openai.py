@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import weakref
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import httpx
+import structlog
+from .base import LLMProvider, CompletionRequest, CompletionResponse, CompletionChunk, Usage, Role
+
+logger = structlog.get_logger()
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One pooled client per (base URL, protocol) and event loop: connections cannot cross loops
+_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, bool], httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+
+def shared_client(
+    base_url: str,
+    http2: bool = False,
+    limits: Optional[httpx.Limits] = None,
+    timeout: Optional[httpx.Timeout] = None
+) -> httpx.AsyncClient:
+    """Return the process-wide pooled client for `base_url`, creating it on first use.
+
+    Pool limits and timeouts are taken from the first caller for a given URL.
+    """
+    if http2 and not HTTP2_AVAILABLE:
+        logger.warn("http2_unavailable", base_url=base_url, hint="pip install 'aicp[http2]'")
+        http2 = False
+    clients = _CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    key = (base_url.rstrip("/"), http2)
+    client = clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=key[0],
+            http2=http2,
+            limits=limits or httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0),
+            timeout=timeout or httpx.Timeout(60.0, connect=5.0),
+        )
+        clients[key] = client
+    return client
+
+async def close_shared_clients():
+    """Close the pooled clients owned by the running event loop."""
+    clients = _CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+class OpenAIProvider(LLMProvider):
+    """Adapter for any OpenAI-compatible `/chat/completions` endpoint."""
+
+    def __init__(
+        self,
+        name: str = "openai",
+        base_url: str = "https://api.openai.com/v1",
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        http2: bool = False,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        # Overrides the request model, e.g. to map a logical model onto a deployment
+        self.model = model
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    @property
+    def provider_name(self) -> str:
+        return self.name
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return shared_client(self.base_url, self.http2, self.limits, self.timeout)
+
+    def payload(self, request: CompletionRequest, stream: bool = False) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "model": self.model or request.model,
+            "messages": [
+                {"role": m.role.value, "content": m.content, **({"name": m.name} if m.name else {})}
+                for m in request.messages
+            ],
+            "temperature": request.temperature,
+        }
+        if request.max_tokens is not None:
+            payload["max_tokens"] = request.max_tokens
+        if request.stop is not None:
+            payload["stop"] = request.stop
+        if stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        payload.update(request.extra_params)
+        return payload
+
+    async def complete(self, request: CompletionRequest) -> CompletionResponse:
+        response = await self.client.post("/chat/completions", json=self.payload(request), headers=self.headers)
+        response.raise_for_status()
+        body = response.json()
+        choice = body["choices"][0]
+        usage = body.get("usage") or {}
+        return CompletionResponse(
+            id=body.get("id", ""),
+            model=body.get("model", request.model),
+            content=choice["message"].get("content") or "",
+            role=Role(choice["message"].get("role", "assistant")),
+            usage=Usage(
+                prompt_tokens=usage.get("prompt_tokens", 0),
+                completion_tokens=usage.get("completion_tokens", 0),
+                total_tokens=usage.get("total_tokens", 0)
+            ),
+            finish_reason=choice.get("finish_reason"),
+            provider_metadata={"provider": self.name, "http_version": response.http_version}
+        )
+
+    async def stream(self, request: CompletionRequest) -> AsyncIterator[CompletionChunk]:
+        async with self.client.stream(
+            "POST", "/chat/completions", json=self.payload(request, stream=True), headers=self.headers
+        ) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            # Server-sent events: parse `data:` lines as they arrive instead of buffering the body
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                choices = event.get("choices") or [{}]
+                usage = event.get("usage")
+                yield CompletionChunk(
+                    id=event.get("id", ""),
+                    model=event.get("model", request.model),
+                    delta=(choices[0].get("delta") or {}).get("content") or "",
+                    finish_reason=choices[0].get("finish_reason"),
+                    usage=Usage(**{k: usage.get(k, 0) for k in ("prompt_tokens", "completion_tokens", "total_tokens")}) if usage else None,
+                    provider_metadata={"provider": self.name}
+                )
@@ -0,0 +1,220 @@
+import asyncio
+import bisect
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+import structlog
+from .providers.base import CompletionRequest
+from ..observability import metrics
+from ..observability.metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_WAIT_SECONDS, child
+
+logger = structlog.get_logger()
+
+class RateLimitExceededError(Exception):
+    """Raised when a request cannot be admitted within its maximum wait."""
+    pass
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        # Waiters queued on this bucket; new arrivals may not jump ahead of them
+        self.queued = 0
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (requests larger than capacity wait for a full bucket)."""
+        self._refill(time.monotonic())
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float):
+        self._refill(time.monotonic())
+        self.tokens -= min(amount, self.capacity)
+
+class RateLimit:
+    """Requests/sec and estimated tokens/min limits for one tenant or provider."""
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        request_burst: Optional[float] = None,
+        token_burst: Optional[float] = None
+    ):
+        self.requests = TokenBucket(requests_per_second, request_burst) if requests_per_second else None
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, token_burst or tokens_per_minute) if tokens_per_minute else None
+
+    def needs(self, tokens: int) -> List[Tuple[TokenBucket, float]]:
+        needs = []
+        if self.requests is not None:
+            needs.append((self.requests, 1.0))
+        if self.tokens is not None:
+            needs.append((self.tokens, float(tokens)))
+        return needs
+
+def estimate_tokens(request: CompletionRequest, default_completion_tokens: int = 256) -> int:
+    """Rough prompt + completion token estimate used for admission."""
+    prompt = sum(len(m.content) for m in request.messages) // 4
+    return prompt + (request.max_tokens or default_completion_tokens)
+
+class _Waiter:
+    __slots__ = ("needs", "future", "enqueued")
+
+    def __init__(self, needs: List[Tuple[TokenBucket, float]], future: asyncio.Future):
+        self.needs = needs
+        self.future = future
+        self.enqueued = time.monotonic()
+
+class AdmissionController:
+    """Per-tenant and per-provider token buckets with a bounded priority queue.
+
+    Requests over a limit wait instead of failing, served in priority order
+    (higher `CompletionRequest.priority` first, FIFO within a priority). A
+    waiter only blocks lower-priority waiters that share one of its buckets.
+    Requests are rejected with `RateLimitExceededError` when the queue is
+    full or they would wait longer than `max_wait`.
+    """
+
+    def __init__(
+        self,
+        tenant_limits: Optional[Dict[str, RateLimit]] = None,
+        default_tenant_limit: Optional[RateLimit] = None,
+        provider_limits: Optional[Dict[str, RateLimit]] = None,
+        max_queue: int = 1000,
+        max_wait: float = 5.0
+    ):
+        self.tenant_limits = tenant_limits or {}
+        self.default_tenant_limit = default_tenant_limit
+        self.provider_limits = provider_limits or {}
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._pump_task: Optional[asyncio.Task] = None
+        self.admitted = 0
+        self.rejected = 0
+        self.queued = 0
+
+    def _tenant_limit(self, tenant: Optional[str]) -> Optional[RateLimit]:
+        if tenant is not None and tenant in self.tenant_limits:
+            return self.tenant_limits[tenant]
+        return self.default_tenant_limit
+
+    async def admit_tenant(self, request: CompletionRequest):
+        limit = self._tenant_limit(request.tenant_id)
+        if limit is not None:
+            await self._acquire(limit.needs(estimate_tokens(request)), request.priority)
+
+    async def admit_provider(self, provider_name: str, request: CompletionRequest):
+        limit = self.provider_limits.get(provider_name)
+        if limit is not None:
+            await self._acquire(limit.needs(estimate_tokens(request)), request.priority)
+
+    async def _acquire(self, needs: List[Tuple[TokenBucket, float]], priority: int):
+        if not needs:
+            return
+        if all(b.queued == 0 and b.wait_time(n) <= 0 for b, n in needs):
+            for bucket, amount in needs:
+                bucket.consume(amount)
+            self.admitted += 1
+            if metrics.ENABLED:
+                child(ADMISSION_WAIT_SECONDS, "admitted").observe(0.0)
+            return
+
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            if metrics.ENABLED:
+                child(ADMISSION_WAIT_SECONDS, "rejected").observe(0.0)
+            raise RateLimitExceededError("Admission queue is full")
+
+        waiter = _Waiter(needs, asyncio.get_running_loop().create_future())
+        bisect.insort(self._queue, (-priority, next(self._seq), waiter))
+        for bucket, _ in needs:
+            bucket.queued += 1
+        self.queued += 1
+        if metrics.ENABLED:
+            ADMISSION_QUEUE_DEPTH.set(len(self._queue))
+        self._wake.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+
+        try:
+            await asyncio.wait({waiter.future}, timeout=self.max_wait)
+        finally:
+            waited = time.monotonic() - waiter.enqueued
+            if not waiter.future.done():
+                # Timed out or the caller was cancelled: give up our place
+                waiter.future.cancel()
+                self._wake.set()
+
+        if waiter.future.cancelled():
+            self.rejected += 1
+            if metrics.ENABLED:
+                child(ADMISSION_WAIT_SECONDS, "rejected").observe(waited)
+            logger.warn("admission_rejected", waited=waited, priority=priority)
+            raise RateLimitExceededError(f"Rate limit wait exceeded {self.max_wait}s")
+
+        self.admitted += 1
+        if metrics.ENABLED:
+            child(ADMISSION_WAIT_SECONDS, "admitted").observe(waited)
+
+    async def _pump(self):
+        while self._queue:
+            reserved = set()
+            next_wake = self.max_wait
+            remaining = []
+            for entry in self._queue:
+                waiter = entry[2]
+                if waiter.future.done():
+                    self._release(waiter)
+                    continue
+                if any(id(b) in reserved for b, _ in waiter.needs):
+                    remaining.append(entry)
+                    continue
+                wait = max(b.wait_time(n) for b, n in waiter.needs)
+                if wait <= 0:
+                    for bucket, amount in waiter.needs:
+                        bucket.consume(amount)
+                    self._release(waiter)
+                    waiter.future.set_result(None)
+                    continue
+                # Keep the buckets for this waiter so lower priorities cannot starve it
+                reserved.update(id(b) for b, _ in waiter.needs)
+                next_wake = min(next_wake, wait)
+                remaining.append(entry)
+
+            self._queue = remaining
+            if metrics.ENABLED:
+                ADMISSION_QUEUE_DEPTH.set(len(self._queue))
+            if not self._queue:
+                break
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=next_wake)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def _release(waiter: _Waiter):
+        for bucket, _ in waiter.needs:
+            bucket.queued -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queued": self.queued,
+            "queue_depth": self.queue_depth,
+        }
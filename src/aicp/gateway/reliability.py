@@ -1,8 +1,18 @@
 import asyncio
+import contextlib
+import random
 import time
-from typing import List, Optional, Callable, Dict, Any
+from typing import List, Optional, Callable, AsyncIterator, Tuple, Union
 import structlog
-from .providers.base import LLMProvider, CompletionRequest, CompletionResponse
+from .providers.base import LLMProvider, CompletionRequest, CompletionResponse, CompletionChunk
+from .routing import ProviderStats, RoutingStrategy, PriorityRouting
+from .ratelimit import AdmissionController, RateLimitExceededError
+from .retries import RetryBudget, SlidingWindowCounter
+from ..observability import metrics, tracing
+from ..observability.metrics import (
+    BACKOFF_SECONDS, CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_TRANSITIONS,
+    LATENCY_SECONDS, REQUESTS_TOTAL, RETRIES_TOTAL, TOKENS_TOTAL, child
+)
 
 logger = structlog.get_logger()
 
@@ -10,6 +20,18 @@ class CircuitBreakerOpenError(Exception):
     """Raised when the circuit breaker is open."""
     pass
 
+class DeadlineExceededError(Exception):
+    """Raised when a request's time budget runs out."""
+    pass
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left until `deadline` (event loop clock), or None without a deadline."""
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+BREAKER_STATE_VALUES = {"CLOSED": 0, "OPEN": 1, "HALF_OPEN": 2}
+
 class CircuitBreaker:
     def __init__(
         self, 
@@ -23,19 +45,29 @@ class CircuitBreaker:
         self.failures = 0
         self.last_failure_time: Optional[float] = None
         self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
+        if metrics.ENABLED:
+            child(CIRCUIT_BREAKER_STATE, self.name).set(0)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        if metrics.ENABLED:
+            child(CIRCUIT_BREAKER_STATE, self.name).set(BREAKER_STATE_VALUES[state])
+            child(CIRCUIT_BREAKER_TRANSITIONS, self.name, state).inc()
 
-    def record_success(self):
+    def record_success(self, duration: Optional[float] = None):
         if self.state == "HALF_OPEN":
             logger.info("circuit_breaker_recovered", breaker=self.name, state=self.state)
         self.failures = 0
-        self.state = "CLOSED"
+        self._transition("CLOSED")
         self.last_failure_time = None
 
-    def record_failure(self):
+    def record_failure(self, duration: Optional[float] = None):
         self.failures += 1
         self.last_failure_time = time.time()
         if self.failures >= self.failure_threshold:
-            self.state = "OPEN"
+            self._transition("OPEN")
             logger.warn("circuit_breaker_opened", breaker=self.name, state=self.state, failures=self.failures)
 
     def can_execute(self) -> bool:
@@ -44,50 +76,676 @@ class CircuitBreaker:
         
         if self.state == "OPEN":
             if time.time() - self.last_failure_time > self.recovery_timeout:
-                self.state = "HALF_OPEN"
+                self._transition("HALF_OPEN")
                 logger.info("circuit_breaker_half_open", breaker=self.name, state=self.state)
                 return True
             return False
         
         return True # HALF_OPEN allows testing
 
+    def release(self):
+        """Give back a call admitted by `can_execute` that ends without an outcome
+        (rate limited, out of time or cancelled before the provider answered)."""
+        pass
+
+class SlidingWindowCircuitBreaker(CircuitBreaker):
+    """Opens on the failure rate or slow-call rate over a sliding window.
+
+    The window holds the last `window_size` calls (`window_type="count"`, a
+    ring buffer) or the last `window_size` seconds (`"time"`, ring buckets);
+    both update in O(1). Nothing trips before `minimum_calls` outcomes are
+    in the window. After `recovery_timeout` at most `half_open_probes`
+    calls are let through concurrently; that many successes close the
+    breaker, any failure reopens it. Probes that never report back are
+    reclaimed after `probe_timeout`. All methods are synchronous, so one
+    instance is safe to share between coroutines on a loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: Optional[float] = None,
+        slow_call_duration: float = 5.0,
+        window_type: str = "count",
+        window_size: int = 100,
+        minimum_calls: int = 10,
+        recovery_timeout: float = 30.0,
+        half_open_probes: int = 1,
+        probe_timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        super().__init__(name, recovery_timeout=recovery_timeout)
+        if window_type not in ("count", "time"):
+            raise ValueError(f"Unknown window type: {window_type}")
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.window_type = window_type
+        self.minimum_calls = minimum_calls
+        self.half_open_probes = half_open_probes
+        self.probe_timeout = probe_timeout if probe_timeout is not None else recovery_timeout
+        self.clock = clock
+        self.opened_at: Optional[float] = None
+        self._probes = 0
+        self._probe_successes = 0
+        self._probe_started = 0.0
+        if window_type == "count":
+            # Outcome codes: bit 0 = failed, bit 1 = slow
+            self._ring: List[int] = [0] * window_size
+            self._next = 0
+            self._calls = 0
+            self._failed = 0
+            self._slow = 0
+        else:
+            buckets = min(max(1, int(window_size)), 60)
+            self._calls_window = SlidingWindowCounter(window_size, buckets, clock)
+            self._failed_window = SlidingWindowCounter(window_size, buckets, clock)
+            self._slow_window = SlidingWindowCounter(window_size, buckets, clock)
+
+    def counts(self) -> Tuple[float, float, float]:
+        """(calls, failures, slow calls) currently in the window."""
+        if self.window_type == "count":
+            return self._calls, self._failed, self._slow
+        return self._calls_window.value(), self._failed_window.value(), self._slow_window.value()
+
+    @property
+    def failures(self) -> float:
+        return self.counts()[1]
+
+    @failures.setter
+    def failures(self, value):
+        # Assigned by CircuitBreaker.__init__; the window is the source of truth here
+        pass
+
+    def _add(self, failed: bool, slow: bool):
+        if self.window_type == "count":
+            code = int(failed) | (int(slow) << 1)
+            old = self._ring[self._next]
+            if self._calls == len(self._ring):
+                self._failed -= old & 1
+                self._slow -= old >> 1
+            else:
+                self._calls += 1
+            self._ring[self._next] = code
+            self._next = (self._next + 1) % len(self._ring)
+            self._failed += failed
+            self._slow += slow
+        else:
+            self._calls_window.add()
+            if failed:
+                self._failed_window.add()
+            if slow:
+                self._slow_window.add()
+
+    def _reset_window(self):
+        if self.window_type == "count":
+            self._ring = [0] * len(self._ring)
+            self._next = self._calls = self._failed = self._slow = 0
+        else:
+            for window in (self._calls_window, self._failed_window, self._slow_window):
+                window.counts = [0.0] * len(window.counts)
+                window.total = 0.0
+
+    def _open(self):
+        self.opened_at = self.clock()
+        self.last_failure_time = time.time()
+        self._probes = self._probe_successes = 0
+        self._transition("OPEN")
+
+    def _is_slow(self, duration: Optional[float]) -> bool:
+        # Slow calls only count when a slow-call threshold is configured
+        return self.slow_call_rate_threshold is not None and duration is not None and duration >= self.slow_call_duration
+
+    def record_success(self, duration: Optional[float] = None):
+        if self.state == "HALF_OPEN":
+            self._probes = max(0, self._probes - 1)
+            if self._is_slow(duration):
+                logger.warn("circuit_breaker_probe_slow", breaker=self.name, duration=duration)
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                logger.info("circuit_breaker_recovered", breaker=self.name, state=self.state)
+                self._reset_window()
+                self._transition("CLOSED")
+            return
+        if self.state == "CLOSED":
+            self._add(False, self._is_slow(duration))
+            self._evaluate()
+
+    def record_failure(self, duration: Optional[float] = None):
+        if self.state == "HALF_OPEN":
+            logger.warn("circuit_breaker_probe_failed", breaker=self.name)
+            self._open()
+            return
+        if self.state == "CLOSED":
+            self._add(True, self._is_slow(duration))
+            self._evaluate()
+
+    def _evaluate(self):
+        calls, failed, slow = self.counts()
+        if calls < self.minimum_calls:
+            return
+        failure_rate = failed / calls
+        slow_rate = slow / calls
+        slow_tripped = self.slow_call_rate_threshold is not None and slow_rate >= self.slow_call_rate_threshold
+        if failure_rate >= self.failure_rate_threshold or slow_tripped:
+            self._open()
+            logger.warn(
+                "circuit_breaker_opened", breaker=self.name, state=self.state,
+                failure_rate=round(failure_rate, 3), slow_call_rate=round(slow_rate, 3)
+            )
+
+    def can_execute(self) -> bool:
+        if self.state == "CLOSED":
+            return True
+        now = self.clock()
+        if self.state == "OPEN":
+            if now - self.opened_at < self.recovery_timeout:
+                return False
+            self._transition("HALF_OPEN")
+            logger.info("circuit_breaker_half_open", breaker=self.name, state=self.state)
+        # HALF_OPEN: admit a bounded number of concurrent probes
+        if self._probes and now - self._probe_started > self.probe_timeout:
+            self._probes = 0
+        if self._probes >= self.half_open_probes:
+            return False
+        self._probes += 1
+        self._probe_started = now
+        return True
+
+    def release(self):
+        if self.state == "HALF_OPEN":
+            self._probes = max(0, self._probes - 1)
+
+class HedgingPolicy:
+    """When to send a second attempt to the next healthy provider.
+
+    The hedge fires after `delay` seconds, or after the primary provider's
+    observed `percentile` latency once `min_samples` have been collected.
+    `budget` caps hedges as a fraction of requests: every request earns
+    `budget` tokens (up to `burst`) and every hedge spends one.
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: Optional[float] = 95.0,
+        budget: float = 0.1,
+        min_samples: int = 20,
+        burst: float = 10.0
+    ):
+        self.delay = delay
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.burst = burst
+        self.tokens = 0.0
+
+    def hedge_delay(self, stats: ProviderStats) -> Optional[float]:
+        if self.percentile is not None and len(stats.latencies) >= self.min_samples:
+            return stats.percentile(self.percentile)
+        return self.delay
+
+    def on_request(self):
+        self.tokens = min(self.burst, self.tokens + self.budget)
+
+    def try_acquire(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
 class ReliabilityLayer:
     def __init__(
         self,
         providers: List[LLMProvider],
         max_retries: int = 3,
-        base_delay: float = 1.0
+        base_delay: float = 1.0,
+        hedging: Optional[HedgingPolicy] = None,
+        routing: Optional[RoutingStrategy] = None,
+        admission: Optional[AdmissionController] = None,
+        provider_concurrency: Optional[int] = None,
+        attempt_timeout: Optional[float] = None,
+        max_delay: float = 30.0,
+        retry_budget: Optional[RetryBudget] = None,
+        provider_retry_budget: Optional[Callable[[], RetryBudget]] = None,
+        breaker_factory: Optional[Callable[[str], CircuitBreaker]] = None
     ):
         self.providers = providers
         self.max_retries = max_retries
         self.base_delay = base_delay
-        self.breakers = {p.provider_name: CircuitBreaker(p.provider_name) for p in providers}
+        # Backoff sleeps a uniformly random time up to min(max_delay, base_delay * 2**attempt)
+        self.max_delay = max_delay
+        # Upper bound on a single provider call; the request deadline may cut it shorter
+        self.attempt_timeout = attempt_timeout
+        self.rng = random.Random()
+        # e.g. `lambda name: SlidingWindowCircuitBreaker(name, failure_rate_threshold=0.3)`
+        breaker_factory = breaker_factory or CircuitBreaker
+        self.breakers = {p.provider_name: breaker_factory(p.provider_name) for p in providers}
+        self.stats = {p.provider_name: ProviderStats() for p in providers}
+        self.hedging = hedging
+        self.routing = routing or PriorityRouting()
+        # Per-provider rate limits; an exhausted provider is skipped, not counted as a failure
+        self.admission = admission
+        # Upper bound on concurrent upstream calls per provider
+        self.slots = {
+            p.provider_name: asyncio.Semaphore(provider_concurrency) for p in providers
+        } if provider_concurrency else {}
+        self.hedge_stats = {"sent": 0, "budget_denied": 0, "primary_wins": 0, "hedge_wins": 0}
+        # Retry budgets: every upstream call beyond a request's first attempt must fit in the
+        # global budget; same-provider retries must also fit in that provider's budget
+        self.retry_budget = retry_budget
+        self.retry_budgets = {
+            p.provider_name: provider_retry_budget() for p in providers
+        } if provider_retry_budget else {}
+        self.retry_stats = {"allowed": 0, "denied": 0}
+
+    async def execute_with_fallback(self, request: CompletionRequest, deadline: Optional[float] = None) -> CompletionResponse:
+        """Complete `request`, retrying and falling back across providers.
+
+        `deadline` is an absolute event-loop time (`loop.time()`); attempts are
+        cut off when it passes and no backoff sleeps beyond it.
+        """
+        if self.retry_budget is not None:
+            self.retry_budget.record_request()
+        return await self._execute_any(request, deadline)
+
+    async def _execute_any(self, request: CompletionRequest, deadline: Optional[float] = None) -> CompletionResponse:
+        if self.hedging is not None:
+            return await self._execute_hedged(request, deadline)
+        return await self._execute_chain(request, self.routing.order(self.providers, self.stats), deadline)
 
-    async def execute_with_fallback(self, request: CompletionRequest) -> CompletionResponse:
+    async def _execute_chain(
+        self,
+        request: CompletionRequest,
+        providers: List[LLMProvider],
+        deadline: Optional[float] = None
+    ) -> CompletionResponse:
         last_error = None
+        skipped: List[str] = []
         
-        for provider in self.providers:
+        for provider in providers:
             breaker = self.breakers[provider.provider_name]
-            
+
+            # Falling back after an upstream failure is another upstream call;
+            # fail fast once the global budget is spent. Checked first, since
+            # `can_execute` may claim a half-open probe.
+            if self._needs_retry_budget(last_error) and not self._allow_retry(provider, fallback=True):
+                break
+
             if not breaker.can_execute():
                 logger.debug("skipping_provider_breaker_open", provider=provider.provider_name)
+                skipped.append(provider.provider_name)
                 continue
 
+            try:
+                return await self._execute_provider(provider, request, deadline)
+            except DeadlineExceededError:
+                raise
+            except Exception as e:
+                last_error = e # Try next provider
+
+        if last_error is None and skipped:
+            # Nothing was attempted: every provider's breaker is open
+            raise CircuitBreakerOpenError(f"circuit breakers open for {', '.join(skipped)}")
+        raise last_error or Exception("All providers failed or breakers are open")
+
+    async def _execute_provider(
+        self,
+        provider: LLMProvider,
+        request: CompletionRequest,
+        deadline: Optional[float] = None
+    ) -> CompletionResponse:
+        breaker = self.breakers[provider.provider_name]
+        stats = self.stats[provider.provider_name]
+
+        budget = self.retry_budgets.get(provider.provider_name)
+        # The caller admitted this call with `breaker.can_execute()`; hand the
+        # slot back unless an outcome gets recorded
+        claimed = True
+        try:
             for attempt in range(self.max_retries):
+                if attempt == 0 and budget is not None:
+                    budget.record_request()
+                if self.admission is not None:
+                    await self.admission.admit_provider(provider.provider_name, request)
+                timeout = self._attempt_timeout(deadline)
                 try:
-                    logger.info("attempting_request", provider=provider.provider_name, attempt=attempt+1)
-                    response = await provider.complete(request)
-                    breaker.record_success()
+                    logger.debug("attempting_request", provider=provider.provider_name, attempt=attempt+1)
+                    with tracing.span("provider.attempt", provider=provider.provider_name, attempt=attempt+1):
+                        async with self._slot(provider):
+                            stats.record_start()
+                            started = time.perf_counter()
+                            try:
+                                # Expiry cancels the provider call, releasing its connection
+                                async with asyncio.timeout(timeout):
+                                    response = await provider.complete(request)
+                            finally:
+                                stats.record_end()
+                    latency = time.perf_counter() - started
+                    stats.record_latency(latency)
+                    breaker.record_success(latency)
+                    claimed = False
+                    # Tells audit records and callers which provider of the chain served the call
+                    response.provider_metadata["provider"] = provider.provider_name
+                    self._record(provider, request, "success", latency, response)
                     return response
                 except Exception as e:
-                    logger.error("request_failed", provider=provider.provider_name, error=str(e), attempt=attempt+1)
+                    if isinstance(e, TimeoutError) and self._expired(deadline):
+                        # The caller's budget ran out; not the provider's fault
+                        raise DeadlineExceededError("deadline exceeded during provider call") from e
+                    logger.error("request_failed", provider=provider.provider_name, error=str(e) or type(e).__name__, attempt=attempt+1)
                     breaker.record_failure()
-                    last_error = e
-                    
+                    stats.record_failure()
+                    claimed = False
+                    self._record(provider, request, "error")
+                    if attempt == self.max_retries - 1:
+                        raise
+                    # The breaker has opened meanwhile, or no time or retry budget is
+                    # left for another attempt here; let the chain fall back
+                    if not breaker.can_execute():
+                        raise
+                    claimed = True
+                    if not self._allow_retry(provider):
+                        raise
+                    if not await self._sleep_backoff(provider, attempt, deadline):
+                        raise
+        finally:
+            if claimed:
+                breaker.release()
+
+    @staticmethod
+    def _needs_retry_budget(last_error: Optional[Exception]) -> bool:
+        return last_error is not None and not isinstance(last_error, RateLimitExceededError)
+
+    def _allow_retry(self, provider: LLMProvider, fallback: bool = False) -> bool:
+        """Charge one retry to the global budget and, for same-provider retries, the provider's."""
+        budgets = [self.retry_budget]
+        if not fallback:
+            budgets.append(self.retry_budgets.get(provider.provider_name))
+        budgets = [b for b in budgets if b is not None]
+        if not budgets:
+            return True
+
+        allowed = all(b.can_retry() for b in budgets)
+        for b in budgets:
+            b.record_retry() if allowed else b.record_denied()
+        outcome = "allowed" if allowed else "denied"
+        self.retry_stats[outcome] += 1
+        if metrics.ENABLED:
+            child(RETRIES_TOTAL, provider.provider_name, outcome).inc()
+        if not allowed:
+            logger.warn("retry_budget_exhausted", provider=provider.provider_name, fallback=fallback)
+        return allowed
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential backoff with full jitter
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def _expired(deadline: Optional[float]) -> bool:
+        left = remaining(deadline)
+        return left is not None and left <= 0
+
+    def _attempt_timeout(self, deadline: Optional[float]) -> Optional[float]:
+        left = remaining(deadline)
+        if left is not None and left <= 0:
+            raise DeadlineExceededError(f"deadline exceeded by {-left:.3f}s")
+        if left is None:
+            return self.attempt_timeout
+        return left if self.attempt_timeout is None else min(left, self.attempt_timeout)
+
+    async def _sleep_backoff(self, provider: LLMProvider, attempt: int, deadline: Optional[float] = None) -> bool:
+        """Sleep before the next attempt; False (without sleeping) if that would pass the deadline."""
+        delay = self._backoff(attempt)
+        left = remaining(deadline)
+        if left is not None and delay >= left:
+            logger.debug("backoff_skipped_deadline", provider=provider.provider_name, delay=delay, remaining=left)
+            return False
+        if metrics.ENABLED:
+            child(BACKOFF_SECONDS, provider.provider_name).observe(delay)
+        await asyncio.sleep(delay)
+        return True
+
+    @staticmethod
+    def _record(
+        provider: LLMProvider,
+        request: CompletionRequest,
+        status: str,
+        latency: Optional[float] = None,
+        response: Optional[Union[CompletionResponse, CompletionChunk]] = None
+    ):
+        if not metrics.ENABLED:
+            return
+        name = provider.provider_name
+        child(REQUESTS_TOTAL, name, request.model, status).inc()
+        if latency is not None:
+            child(LATENCY_SECONDS, name, request.model).observe(latency)
+        usage = response.usage if response is not None else None
+        if usage is not None:
+            child(TOKENS_TOTAL, name, "prompt").inc(usage.prompt_tokens)
+            child(TOKENS_TOTAL, name, "completion").inc(usage.completion_tokens)
+
+    def _slot(self, provider: LLMProvider):
+        return self.slots.get(provider.provider_name) or contextlib.nullcontext()
+
+    async def execute_batch(
+        self,
+        requests: List[CompletionRequest],
+        deadline: Optional[float] = None
+    ) -> List[Union[CompletionResponse, Exception]]:
+        """Send a micro-batch to the first healthy provider that accepts batches.
+
+        If there is none, or the batch call fails, every request goes through
+        `execute_with_fallback` on its own so failures stay per item.
+        """
+        if self.retry_budget is not None:
+            for _ in requests:
+                self.retry_budget.record_request()
+
+        batch_error = None
+        batch_provider = None
+        for provider in self.routing.order(self.providers, self.stats):
+            if provider.max_batch_size < len(requests):
+                continue
+            breaker = self.breakers[provider.provider_name]
+            if not breaker.can_execute():
+                continue
+            stats = self.stats[provider.provider_name]
+            budget = self.retry_budgets.get(provider.provider_name)
+            claimed = True
+            try:
+                if self.admission is not None:
+                    for request in requests:
+                        await self.admission.admit_provider(provider.provider_name, request)
+                logger.debug("attempting_batch", provider=provider.provider_name, size=len(requests))
+                timeout = self._attempt_timeout(deadline)
+                if budget is not None:
+                    for _ in requests:
+                        budget.record_request()
+                with tracing.span("provider.batch", provider=provider.provider_name, size=len(requests)):
+                    async with self._slot(provider):
+                        stats.record_start()
+                        started = time.perf_counter()
+                        try:
+                            async with asyncio.timeout(timeout):
+                                responses = await provider.complete_batch(requests)
+                        finally:
+                            stats.record_end()
+                latency = time.perf_counter() - started
+                stats.record_latency(latency)
+                breaker.record_success(latency)
+                claimed = False
+                for request, response in zip(requests, responses):
+                    response.provider_metadata["provider"] = provider.provider_name
+                    self._record(provider, request, "success", latency, response)
+                return list(responses)
+            except RateLimitExceededError:
+                pass
+            except DeadlineExceededError as e:
+                return [e] * len(requests)
+            except Exception as e:
+                if isinstance(e, TimeoutError) and self._expired(deadline):
+                    # The caller's budget ran out; not the provider's fault
+                    return [DeadlineExceededError("deadline exceeded during batch call")] * len(requests)
+                logger.error("batch_failed", provider=provider.provider_name, error=str(e), size=len(requests))
+                breaker.record_failure()
+                stats.record_failure()
+                claimed = False
+                for request in requests:
+                    self._record(provider, request, "error")
+                batch_error, batch_provider = e, provider
+            finally:
+                if claimed:
+                    breaker.release()
+            break
+
+        async def one(request: CompletionRequest):
+            # After a failed batch call each item's own attempt is a retry
+            if batch_error is not None and not self._allow_retry(batch_provider, fallback=True):
+                raise batch_error
+            return await self._execute_any(request, deadline)
+
+        return list(await asyncio.gather(*(one(r) for r in requests), return_exceptions=True))
+
+    async def _execute_hedged(self, request: CompletionRequest, deadline: Optional[float] = None) -> CompletionResponse:
+        self.hedging.on_request()
+        providers = self.routing.order(self.providers, self.stats)
+        healthy = [p for p in providers if self.breakers[p.provider_name].state != "OPEN"]
+        delay = self.hedging.hedge_delay(self.stats[healthy[0].provider_name]) if healthy else None
+
+        primary = asyncio.ensure_future(self._execute_chain(request, providers, deadline))
+        if delay is None or len(healthy) < 2:
+            return await primary
+
+        attempts = {primary: "primary"}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+                hedge_provider = healthy[1]
+                if not self.hedging.try_acquire():
+                    self.hedge_stats["budget_denied"] += 1
+                elif self.breakers[hedge_provider.provider_name].can_execute():
+                    logger.info("hedging_request", provider=hedge_provider.provider_name, delay=delay)
+                    self.hedge_stats["sent"] += 1
+                    attempts[asyncio.ensure_future(self._execute_provider(hedge_provider, request, deadline))] = "hedge"
+
+            pending = set(attempts)
+            last_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    response = task.result()
+                    if len(attempts) == 1:
+                        return response
+                    winner = attempts[task]
+                    self.hedge_stats[f"{winner}_wins"] += 1
+                    return response.model_copy(update={
+                        "provider_metadata": {**response.provider_metadata, "hedge": {"winner": winner}}
+                    })
+            raise last_error
+        finally:
+            # The losing attempt is cancelled as soon as a winner is known
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    async def execute_stream(self, request: CompletionRequest, deadline: Optional[float] = None) -> AsyncIterator[CompletionChunk]:
+        """Stream from the first healthy provider.
+
+        Retries and fallbacks only happen before the first chunk is delivered;
+        once output has reached the caller a failure is raised as-is. With
+        `attempt_timeout` set, it bounds the wait for each chunk.
+        """
+        last_error = None
+        skipped: List[str] = []
+        if self.retry_budget is not None:
+            self.retry_budget.record_request()
+
+        for provider in self.routing.order(self.providers, self.stats):
+            breaker = self.breakers[provider.provider_name]
+            stats = self.stats[provider.provider_name]
+
+            if self._needs_retry_budget(last_error) and not self._allow_retry(provider, fallback=True):
+                break
+
+            if not breaker.can_execute():
+                logger.debug("skipping_provider_breaker_open", provider=provider.provider_name)
+                skipped.append(provider.provider_name)
+                continue
+
+            budget = self.retry_budgets.get(provider.provider_name)
+            # Hand the slot admitted by `can_execute` back unless an outcome gets recorded,
+            # including when the caller stops reading mid-stream
+            claimed = True
+            try:
+                for attempt in range(self.max_retries):
+                    started = False
+                    if attempt == 0 and budget is not None:
+                        budget.record_request()
+                    if self.admission is not None:
+                        try:
+                            await self.admission.admit_provider(provider.provider_name, request)
+                        except RateLimitExceededError as e:
+                            last_error = e
+                            break # Try next provider
+                    last_chunk = None
+                    try:
+                        logger.debug("attempting_stream", provider=provider.provider_name, attempt=attempt+1)
+                        async with self._slot(provider):
+                            stats.record_start()
+                            begun = time.perf_counter()
+                            chunks = provider.stream(request)
+                            try:
+                                while True:
+                                    # The timeout only spans the wait for the next chunk, never the caller's code
+                                    async with asyncio.timeout(self._attempt_timeout(deadline)):
+                                        try:
+                                            chunk = await chunks.__anext__()
+                                        except StopAsyncIteration:
+                                            break
+                                    started = True
+                                    last_chunk = chunk
+                                    chunk.provider_metadata["provider"] = provider.provider_name
+                                    yield chunk
+                            finally:
+                                stats.record_end()
+                                await chunks.aclose()
+                        duration = time.perf_counter() - begun
+                        breaker.record_success(duration)
+                        claimed = False
+                        self._record(provider, request, "success", duration, last_chunk)
+                        return
+                    except DeadlineExceededError:
+                        raise
+                    except Exception as e:
+                        if isinstance(e, TimeoutError) and self._expired(deadline):
+                            raise DeadlineExceededError("deadline exceeded during stream") from e
+                        logger.error("stream_failed", provider=provider.provider_name, error=str(e) or type(e).__name__, attempt=attempt+1)
+                        breaker.record_failure()
+                        stats.record_failure()
+                        claimed = False
+                        self._record(provider, request, "error")
+                        if started:
+                            raise
+                        last_error = e
+
                     if attempt < self.max_retries - 1:
-                        delay = self.base_delay * (2 ** attempt) # Exponential backoff
-                        await asyncio.sleep(delay)
-                    else:
-                        break # Try next provider
+                        if not breaker.can_execute():
+                            break
+                        claimed = True
+                        if not self._allow_retry(provider) or not await self._sleep_backoff(provider, attempt, deadline):
+                            break
+            finally:
+                if claimed:
+                    breaker.release()
 
+        if last_error is None and skipped:
+            # Nothing was attempted: every provider's breaker is open
+            raise CircuitBreakerOpenError(f"circuit breakers open for {', '.join(skipped)}")
         raise last_error or Exception("All providers failed or breakers are open")
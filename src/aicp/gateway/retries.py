@@ -0,0 +1,87 @@
+import time
+from typing import Callable, List
+
+class SlidingWindowCounter:
+    """Event count over the last `window` seconds, kept in `buckets` ring slots.
+
+    Adding and reading are O(1) amortised: expired slots are zeroed lazily
+    as the clock moves past them.
+    """
+
+    def __init__(self, window: float = 10.0, buckets: int = 10, clock: Callable[[], float] = time.monotonic):
+        self.width = window / buckets
+        self.counts: List[float] = [0.0] * buckets
+        self.total = 0.0
+        self.clock = clock
+        self._current = int(clock() / self.width)
+
+    def _advance(self):
+        now = int(self.clock() / self.width)
+        if now == self._current:
+            return
+        # Zero every slot skipped since the last update, at most one full turn
+        for slot in range(self._current + 1, min(now, self._current + len(self.counts)) + 1):
+            i = slot % len(self.counts)
+            self.total -= self.counts[i]
+            self.counts[i] = 0.0
+        self._current = now
+
+    def add(self, amount: float = 1.0):
+        self._advance()
+        self.counts[self._current % len(self.counts)] += amount
+        self.total += amount
+
+    def value(self) -> float:
+        self._advance()
+        return self.total
+
+class RetryBudget:
+    """Caps retries at `ratio` of first attempts over a sliding `window` of seconds.
+
+    `min_retries` per window are always allowed so that low-traffic
+    providers can still retry. Retries beyond the budget are denied,
+    which keeps load amplification bounded during an outage.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        window: float = 10.0,
+        min_retries: int = 10,
+        buckets: int = 10,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = SlidingWindowCounter(window, buckets, clock)
+        self.retries = SlidingWindowCounter(window, buckets, clock)
+        self.allowed = 0
+        self.denied = 0
+
+    def record_request(self):
+        self.requests.add()
+
+    def can_retry(self) -> bool:
+        return self.retries.value() < self.min_retries + self.ratio * self.requests.value()
+
+    def record_retry(self):
+        self.retries.add()
+        self.allowed += 1
+
+    def record_denied(self):
+        self.denied += 1
+
+    def try_retry(self) -> bool:
+        if self.can_retry():
+            self.record_retry()
+            return True
+        self.record_denied()
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests.value(),
+            "retries": self.retries.value(),
+            "allowed": self.allowed,
+            "denied": self.denied,
+        }
@@ -0,0 +1,121 @@
+import random
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from .providers.base import LLMProvider
+
+class ProviderStats:
+    """Per-provider load and latency bookkeeping, updated on every attempt.
+
+    Everything here is O(1) on the hot path: an in-flight counter, an EWMA
+    of latencies and a bounded window of successful ones for percentiles.
+    A failure counts as a `failure_penalty`-second sample in the EWMA.
+    """
+
+    def __init__(self, window: int = 256, alpha: float = 0.3, failure_penalty: float = 5.0):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.alpha = alpha
+        self.failure_penalty = failure_penalty
+        self.ewma: Optional[float] = None
+        self.inflight = 0
+        self._sorted: List[float] = []
+        self._stale = 0
+
+    def record_start(self):
+        self.inflight += 1
+
+    def record_end(self):
+        self.inflight -= 1
+
+    def record_latency(self, seconds: float):
+        self.latencies.append(seconds)
+        self._stale += 1
+        self._sample(seconds)
+
+    def record_failure(self):
+        # Otherwise a provider that never succeeds keeps no EWMA and always looks unexplored
+        self._sample(self.failure_penalty)
+
+    def _sample(self, seconds: float):
+        self.ewma = seconds if self.ewma is None else self.alpha * seconds + (1 - self.alpha) * self.ewma
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        # Re-sort lazily so the hot path stays an O(1) append
+        if self._stale >= 16 or len(self._sorted) != len(self.latencies):
+            self._sorted = sorted(self.latencies)
+            self._stale = 0
+        index = min(len(self._sorted) - 1, int(q / 100.0 * len(self._sorted)))
+        return self._sorted[index]
+
+class RoutingStrategy:
+    """Decides the order in which providers are tried for one request.
+
+    The first provider returned receives the request; the rest remain the
+    fallback chain.
+    """
+
+    def order(self, providers: List[LLMProvider], stats: Dict[str, ProviderStats]) -> List[LLMProvider]:
+        return providers
+
+class PriorityRouting(RoutingStrategy):
+    """Always try providers in the configured order (the historical behaviour)."""
+
+class EWMALatencyRouting(RoutingStrategy):
+    """Prefer the provider with the lowest latency EWMA, scaled by its in-flight load.
+
+    Providers without samples yet score zero so they get explored first;
+    failures feed the EWMA a penalty sample, so failing providers sink.
+    """
+
+    def order(self, providers: List[LLMProvider], stats: Dict[str, ProviderStats]) -> List[LLMProvider]:
+        def score(provider: LLMProvider) -> float:
+            s = stats[provider.provider_name]
+            return (s.ewma or 0.0) * (s.inflight + 1)
+        return sorted(providers, key=score)
+
+class LeastOutstandingRouting(RoutingStrategy):
+    """Prefer the provider with the fewest in-flight requests."""
+
+    def order(self, providers: List[LLMProvider], stats: Dict[str, ProviderStats]) -> List[LLMProvider]:
+        return sorted(providers, key=lambda p: stats[p.provider_name].inflight)
+
+class WeightedRoundRobinRouting(RoutingStrategy):
+    """Smooth weighted round robin; unlisted providers have weight 1."""
+
+    def __init__(self, weights: Optional[Dict[str, int]] = None):
+        self.weights = weights or {}
+        self._current: Dict[str, int] = {}
+
+    def order(self, providers: List[LLMProvider], stats: Dict[str, ProviderStats]) -> List[LLMProvider]:
+        total = 0
+        best = None
+        for provider in providers:
+            name = provider.provider_name
+            weight = self.weights.get(name, 1)
+            total += weight
+            self._current[name] = self._current.get(name, 0) + weight
+            if best is None or self._current[name] > self._current[best.provider_name]:
+                best = provider
+        if best is None:
+            return providers
+        self._current[best.provider_name] -= total
+        return [best] + [p for p in providers if p is not best]
+
+class PowerOfTwoChoicesRouting(RoutingStrategy):
+    """Sample two providers at random and prefer the less loaded one.
+
+    Load is the in-flight count, with the latency EWMA as a tie-breaker.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+
+    def order(self, providers: List[LLMProvider], stats: Dict[str, ProviderStats]) -> List[LLMProvider]:
+        if len(providers) < 2:
+            return providers
+        a, b = self.rng.sample(providers, 2)
+        load_a = (stats[a.provider_name].inflight, stats[a.provider_name].ewma or 0.0)
+        load_b = (stats[b.provider_name].inflight, stats[b.provider_name].ewma or 0.0)
+        winner = a if load_a <= load_b else b
+        return [winner] + [p for p in providers if p is not winner]
@@ -0,0 +1,144 @@
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Hit = Tuple[str, "re.Match"]
+
+class PatternScanner:
+    """Scan text once for many named regex patterns.
+
+    All patterns are compiled into a single alternation with one named group
+    per entry, so each message is walked once regardless of how many patterns
+    are active. When several patterns match at the same position, the one
+    listed first wins.
+
+    `guards` maps a pattern name to a character class its matches must start
+    with. Consecutive patterns sharing a guard are grouped behind a single
+    lookahead, which lets the engine reject most positions with one test
+    instead of trying every branch.
+    """
+
+    def __init__(self, patterns: Dict[str, str], flags: int = 0, guards: Optional[Dict[str, str]] = None):
+        self.names = list(patterns)
+        self._group_names = {f"p{i}": name for i, name in enumerate(self.names)}
+        guards = guards or {}
+
+        branches: List[Tuple[Optional[str], List[str]]] = []
+        for i, name in enumerate(self.names):
+            guard = guards.get(name)
+            group = f"(?P<p{i}>{patterns[name]})"
+            if branches and guard is not None and branches[-1][0] == guard:
+                branches[-1][1].append(group)
+            else:
+                branches.append((guard, [group]))
+
+        alternation = "|".join(
+            f"(?={guard})(?:{'|'.join(groups)})" if guard else "|".join(groups)
+            for guard, groups in branches
+        )
+        self.regex = re.compile(alternation or r"(?!)", flags)
+
+    def _name(self, match: "re.Match") -> str:
+        return self._group_names[match.lastgroup]
+
+    def search(self, text: str) -> Optional[Hit]:
+        match = self.regex.search(text)
+        return (self._name(match), match) if match else None
+
+    def finditer(self, text: str) -> Iterator[Hit]:
+        for match in self.regex.finditer(text):
+            yield self._name(match), match
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        return [m.span() for m in self.regex.finditer(text)]
+
+    def sub(self, text: str, repl: Callable[[str], str]) -> Tuple[str, int]:
+        """Replace every hit with `repl(name)`; returns the original string when nothing matched."""
+        result, count = self.regex.subn(lambda m: repl(self._name(m)), text)
+        if count == 0:
+            return text, 0
+        return result, count
+
+class LiteralScanner(PatternScanner):
+    """Scanner for fixed phrases, compiled into a trie-shaped regex.
+
+    Shared prefixes are only tested once per position, which keeps the
+    per-character cost flat as phrases are added. Case-insensitive scans
+    lower-case the text once and run a case-sensitive automaton over it,
+    which is far cheaper than `re.IGNORECASE`. Hits are reported with the
+    phrase that matched; match objects refer to the folded text, whose
+    offsets line up with the original.
+    """
+
+    def __init__(self, phrases: Iterable[str], ignore_case: bool = True):
+        self.ignore_case = ignore_case
+        self.names = list(phrases)
+        self._lookup = {self._fold(p): p for p in self.names}
+        pattern = _trie_pattern(self._lookup) or r"(?!)"
+        self.regex = re.compile(pattern)
+        # Used when lower-casing changes the text length and offsets would drift
+        self._fallback = re.compile(pattern, re.IGNORECASE) if ignore_case else self.regex
+
+    def _fold(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def _name(self, match: "re.Match") -> str:
+        return self._lookup[self._fold(match.group(0))]
+
+    def _target(self, text: str) -> Tuple["re.Pattern", str]:
+        folded = self._fold(text)
+        if len(folded) == len(text):
+            return self.regex, folded
+        return self._fallback, text
+
+    def search(self, text: str) -> Optional[Hit]:
+        regex, target = self._target(text)
+        match = regex.search(target)
+        return (self._name(match), match) if match else None
+
+    def finditer(self, text: str) -> Iterator[Hit]:
+        regex, target = self._target(text)
+        for match in regex.finditer(target):
+            yield self._name(match), match
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        regex, target = self._target(text)
+        return [m.span() for m in regex.finditer(target)]
+
+    def sub(self, text: str, repl: Callable[[str], str]) -> Tuple[str, int]:
+        parts, last, count = [], 0, 0
+        for name, match in self.finditer(text):
+            start, end = match.span()
+            parts.append(text[last:start])
+            parts.append(repl(name))
+            last = end
+            count += 1
+        if count == 0:
+            return text, 0
+        parts.append(text[last:])
+        return "".join(parts), count
+
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+def is_literal(pattern: str) -> bool:
+    """True when `pattern` has no regex metacharacters and can be matched as a phrase."""
+    return not any(ch in _REGEX_META for ch in pattern)
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        # Regex quantifiers are greedy, so the longest phrase wins at a position
+        return "(?:" + "|".join(branches) + ")" + ("?" if terminal else "")
+
+    return build(trie)
@@ -0,0 +1,750 @@
+"""Gateway state shared between worker processes.
+
+A `StateBackend` stores small fixed-size records of floats by key and
+applies named operations (`OPS`) to one record atomically. Because
+operations are named rather than arbitrary callables, the same state
+machines run in-process (`LocalStateBackend`), in a shared memory-mapped
+file (`MmapStateBackend`, one host) or behind a socket
+(`SocketStateBackend` talking to a `StateServer`, a stand-in for a
+networked store).
+
+`SharedCircuitBreaker` and `SharedTokenBucket` keep their state in a
+backend, so a provider outage trips the breaker once for every worker
+using the same backend.
+"""
+import argparse
+import asyncio
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import queue
+import socket
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import structlog
+from .reliability import BREAKER_STATE_VALUES, CircuitBreaker
+from .ratelimit import RateLimit, TokenBucket
+from ..observability import metrics
+from ..observability.metrics import CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_TRANSITIONS, SHARED_STATE_DEGRADED, child
+
+logger = structlog.get_logger()
+
+class StateBackendError(Exception):
+    """Raised when a state backend cannot be read or updated."""
+    pass
+
+# Floats per record; record slot 0 is reserved as the "initialized" flag
+RECORD_SIZE = 64
+
+# Token bucket record: [initialized, tokens, updated]
+def _bucket_refill(v, now: float, rate: float, capacity: float):
+    if not v[0]:
+        v[0], v[1], v[2] = 1.0, capacity, now
+    elif now > v[2]:
+        v[1] = min(capacity, v[1] + (now - v[2]) * rate)
+        v[2] = now
+
+def _bucket_wait(v, now: float, rate: float, capacity: float, amount: float) -> List[float]:
+    _bucket_refill(v, now, rate, capacity)
+    missing = min(amount, capacity) - v[1]
+    return [max(0.0, missing / rate)]
+
+def _bucket_consume(v, now: float, rate: float, capacity: float, amount: float) -> List[float]:
+    _bucket_refill(v, now, rate, capacity)
+    v[1] -= min(amount, capacity)
+    return [v[1]]
+
+# Breaker record: [initialized, state, opened_at, probes, probe_successes, probe_started,
+#                  current bucket, calls x buckets, failures x buckets, slow calls x buckets]
+CLOSED, OPEN, HALF_OPEN = (float(BREAKER_STATE_VALUES[s]) for s in ("CLOSED", "OPEN", "HALF_OPEN"))
+_STATE, _OPENED_AT, _PROBES, _PROBE_OK, _PROBE_STARTED, _BUCKET, _WINDOW = range(1, 8)
+BREAKER_MAX_BUCKETS = (RECORD_SIZE - _WINDOW) // 3
+
+def _window_advance(v, now: float, window: float, buckets: int):
+    current = int(now / (window / buckets))
+    if not v[0]:
+        v[0], v[_BUCKET] = 1.0, float(current)
+        return
+    last = int(v[_BUCKET])
+    if current <= last:
+        return
+    for slot in range(last + 1, min(current, last + buckets) + 1):
+        i = slot % buckets
+        v[_WINDOW + i] = v[_WINDOW + buckets + i] = v[_WINDOW + 2 * buckets + i] = 0.0
+    v[_BUCKET] = float(current)
+
+def _window_counts(v, buckets: int) -> Tuple[float, float, float]:
+    start = _WINDOW
+    return sum(v[start:start + buckets]), sum(v[start + buckets:start + 2 * buckets]), sum(v[start + 2 * buckets:start + 3 * buckets])
+
+def _window_reset(v, buckets: int):
+    for i in range(3 * buckets):
+        v[_WINDOW + i] = 0.0
+
+def _breaker_open(v, now: float):
+    v[_STATE], v[_OPENED_AT], v[_PROBES], v[_PROBE_OK] = OPEN, now, 0.0, 0.0
+
+def _breaker_record(
+    v, now: float, window: float, buckets: float, minimum_calls: float, failure_rate: float,
+    slow_rate: float, recovery_timeout: float, probes: float, probe_timeout: float,
+    failed: float, slow: float
+) -> List[float]:
+    buckets = int(buckets)
+    _window_advance(v, now, window, buckets)
+    old = v[_STATE]
+    if old == HALF_OPEN:
+        v[_PROBES] = max(0.0, v[_PROBES] - 1)
+        if failed or slow:
+            _breaker_open(v, now)
+        else:
+            v[_PROBE_OK] += 1
+            if v[_PROBE_OK] >= probes:
+                _window_reset(v, buckets)
+                v[_STATE] = CLOSED
+    elif old == CLOSED:
+        i = int(v[_BUCKET]) % buckets
+        v[_WINDOW + i] += 1
+        v[_WINDOW + buckets + i] += failed
+        v[_WINDOW + 2 * buckets + i] += slow
+        calls, failures, slow_calls = _window_counts(v, buckets)
+        if calls >= minimum_calls and (
+            failures / calls >= failure_rate or (slow_rate >= 0 and slow_calls / calls >= slow_rate)
+        ):
+            _breaker_open(v, now)
+    return [old, v[_STATE], *_window_counts(v, buckets)]
+
+def _breaker_acquire(
+    v, now: float, window: float, buckets: float, minimum_calls: float, failure_rate: float,
+    slow_rate: float, recovery_timeout: float, probes: float, probe_timeout: float
+) -> List[float]:
+    _window_advance(v, now, window, int(buckets))
+    old = v[_STATE]
+    if old == CLOSED:
+        return [1.0, old, old]
+    if old == OPEN:
+        if now - v[_OPENED_AT] < recovery_timeout:
+            return [0.0, old, old]
+        v[_STATE], v[_PROBES], v[_PROBE_OK] = HALF_OPEN, 0.0, 0.0
+    # HALF_OPEN: admit a bounded number of concurrent probes, reclaiming stale ones
+    if v[_PROBES] and now - v[_PROBE_STARTED] > probe_timeout:
+        v[_PROBES] = 0.0
+    if v[_PROBES] >= probes:
+        return [0.0, old, v[_STATE]]
+    v[_PROBES] += 1
+    v[_PROBE_STARTED] = now
+    return [1.0, old, v[_STATE]]
+
+def _breaker_release(v, now: float, window: float, buckets: float, *params: float) -> List[float]:
+    # A probe admitted by `breaker_acquire` that ended without reporting an outcome
+    if v[_STATE] == HALF_OPEN:
+        v[_PROBES] = max(0.0, v[_PROBES] - 1)
+    return [v[_STATE]]
+
+def _breaker_read(v, now: float, window: float, buckets: float, *params: float) -> List[float]:
+    _window_advance(v, now, window, int(buckets))
+    return [v[_STATE], *_window_counts(v, int(buckets))]
+
+def _snapshot(v, now: float) -> List[float]:
+    return list(v)
+
+OPS: Dict[str, Callable[..., List[float]]] = {
+    "bucket_wait": _bucket_wait,
+    "bucket_consume": _bucket_consume,
+    "breaker_record": _breaker_record,
+    "breaker_acquire": _breaker_acquire,
+    "breaker_release": _breaker_release,
+    "breaker_read": _breaker_read,
+    "snapshot": _snapshot,
+}
+
+# Operations whose effect on the record need not reach a remote backend
+READ_OPS = frozenset(("bucket_wait", "breaker_read", "snapshot"))
+
+class StateBackend(ABC):
+    """Keyed float records updated atomically by named operations from `OPS`.
+
+    A `remote` backend may block on the network, so `_SharedState` only
+    reaches it through `submit`, never from the caller's thread.
+    """
+
+    remote = False
+
+    @abstractmethod
+    def apply(self, key: str, op: str, *args: float) -> List[float]:
+        """Run `OPS[op]` on the record stored under `key` and return its result."""
+        pass
+
+    def close(self):
+        pass
+
+class LocalStateBackend(StateBackend):
+    """Records in this process only; the reference implementation and the fallback."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._records: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def apply(self, key: str, op: str, *args: float) -> List[float]:
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                record = self._records[key] = [0.0] * RECORD_SIZE
+            return OPS[op](record, self.clock(), *args)
+
+    def load(self, key: str, values: Sequence[float]):
+        """Replace the record under `key`, e.g. with a snapshot of a remote one."""
+        with self._lock:
+            self._records[key] = list(values)
+
+MMAP_MAGIC = b"AICPSTA1"
+# Each slot: 8 floats (64 bytes) of key, then the record
+KEY_FLOATS = 8
+
+class MmapStateBackend(StateBackend):
+    """Records in a memory-mapped file shared by every process on the host.
+
+    The file is an open-addressing table of `slots` records, keyed by the
+    record name (hashed when longer than 63 bytes). Each operation locks
+    only its own slot with a POSIX byte-range lock, so workers touching
+    different providers never contend. Put `path` on tmpfs (e.g. /dev/shm)
+    to keep it in memory.
+    """
+
+    def __init__(self, path: str, slots: int = 4096, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.slots = slots
+        self.clock = clock
+        self.stride = (KEY_FLOATS + RECORD_SIZE) * 8
+        size = 64 + slots * self.stride
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 64, 0)
+            try:
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, size)
+                    os.pwrite(self._fd, MMAP_MAGIC + slots.to_bytes(8, "little"), 0)
+                header = os.pread(self._fd, 16, 0)
+                if header[:8] != MMAP_MAGIC or int.from_bytes(header[8:16], "little") != slots:
+                    raise StateBackendError(f"{path} is not a state file with {slots} slots")
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 64, 0)
+            self._mm = mmap.mmap(self._fd, size)
+        except Exception:
+            os.close(self._fd)
+            raise
+        self._bytes = memoryview(self._mm)
+        self._floats = self._bytes.cast("d")
+        self._index: Dict[str, int] = {}
+        # Byte-range locks do not exclude threads of one process, so pair them with thread locks
+        self._thread_locks = [threading.Lock() for _ in range(64)]
+
+    @staticmethod
+    def _encode(key: str) -> bytes:
+        raw = key.encode("utf-8")
+        if len(raw) > KEY_FLOATS * 8 - 1:
+            raw = hashlib.sha1(raw).hexdigest().encode("ascii")
+        return raw.ljust(KEY_FLOATS * 8, b"\0")
+
+    def _offset(self, slot: int) -> int:
+        return 64 + slot * self.stride
+
+    def _slot(self, key: str) -> int:
+        slot = self._index.get(key)
+        if slot is not None:
+            return slot
+        encoded = self._encode(key)
+        start = zlib.crc32(encoded) % self.slots
+        for probe in range(self.slots):
+            slot = (start + probe) % self.slots
+            offset = self._offset(slot)
+            current = bytes(self._bytes[offset:offset + len(encoded)])
+            if current == encoded:
+                break
+            if current[0] == 0:
+                # Claim under the header lock; another process may be claiming the same slot
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, 64, 0)
+                try:
+                    current = bytes(self._bytes[offset:offset + len(encoded)])
+                    if current[0] == 0:
+                        self._bytes[offset:offset + len(encoded)] = encoded
+                        break
+                    if current == encoded:
+                        break
+                finally:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, 64, 0)
+        else:
+            raise StateBackendError(f"{self.path}: all {self.slots} slots are in use")
+        self._index[key] = slot
+        return slot
+
+    def apply(self, key: str, op: str, *args: float) -> List[float]:
+        slot = self._slot(key)
+        offset = self._offset(slot) + KEY_FLOATS * 8
+        start = offset // 8
+        record = self._floats[start:start + RECORD_SIZE]
+        with self._thread_locks[slot % len(self._thread_locks)]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, RECORD_SIZE * 8, offset)
+            try:
+                return OPS[op](record, self.clock(), *args)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, RECORD_SIZE * 8, offset)
+
+    def close(self):
+        self._floats.release()
+        self._bytes.release()
+        self._mm.close()
+        os.close(self._fd)
+
+def _parse_address(address: str):
+    # "host:port" is TCP, anything else a Unix socket path
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit() and "/" not in address:
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+class SocketStateBackend(StateBackend):
+    """Client for a `StateServer`: one JSON line per operation over a blocking socket.
+
+    Operations are synchronous, like the breaker and bucket methods that
+    call them, so keep the server local (a Unix socket or a nearby host).
+    """
+
+    remote = True
+
+    def __init__(self, address: str, timeout: float = 1.0, max_pending: int = 10_000):
+        self.address = address
+        self.timeout = timeout
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+        self._pending: queue.Queue = queue.Queue(max_pending)
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    def submit(self, key: str, op: str, *args: float, callback: Optional[Callable[[Any, Optional[Exception]], None]] = None) -> bool:
+        """Queue `apply` for a background thread, so callers never wait on the network.
+
+        `callback(result, error)` runs on that thread. When `max_pending`
+        operations are already waiting the operation is dropped and False returned.
+        """
+        if self._worker is None:
+            # Started on first use, so a backend opened before forking holds no thread
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._drain, name="aicp-state-client", daemon=True)
+                    self._worker.start()
+        try:
+            self._pending.put_nowait((key, op, args, callback))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self):
+        """Wait until every submitted operation has been applied."""
+        if self._worker is not None:
+            self._pending.join()
+
+    def _drain(self):
+        while (item := self._pending.get()) is not None:
+            key, op, args, callback = item
+            try:
+                try:
+                    result, error = self.apply(key, op, *args), None
+                except StateBackendError as e:
+                    result, error = None, e
+                if callback is not None:
+                    callback(result, error)
+            except Exception as e:
+                logger.error("state_callback_failed", key=key, op=op, error=str(e))
+            finally:
+                self._pending.task_done()
+        self._pending.task_done()
+
+    def _connect(self):
+        family, target = _parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(target)
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def apply(self, key: str, op: str, *args: float) -> List[float]:
+        line = json.dumps({"key": key, "op": op, "args": args}).encode("utf-8") + b"\n"
+        with self._lock:
+            # One reconnect per call covers a restarted server or a dropped idle connection
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._file.write(line)
+                    self._file.flush()
+                    reply = self._file.readline()
+                    if not reply:
+                        raise ConnectionError("state server closed the connection")
+                    break
+                except OSError as e:
+                    self._disconnect()
+                    if attempt:
+                        raise StateBackendError(f"state server {self.address} unavailable: {e}") from e
+        payload = json.loads(reply)
+        if "error" in payload:
+            raise StateBackendError(payload["error"])
+        return payload["result"]
+
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    def close(self):
+        if self._worker is not None:
+            self._pending.put(None)
+            self._worker.join(self.timeout * 2)
+            self._worker = None
+        with self._lock:
+            self._disconnect()
+
+class StateServer:
+    """Serves a backend (by default an in-memory one) to `SocketStateBackend` clients."""
+
+    def __init__(self, address: str, backend: Optional[StateBackend] = None):
+        self.address = address
+        self.backend = backend or LocalStateBackend()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.operations = 0
+
+    async def start(self) -> "StateServer":
+        family, target = _parse_address(self.address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(target):
+                os.unlink(target)
+            self._server = await asyncio.start_unix_server(self._serve, path=target)
+        else:
+            self._server = await asyncio.start_server(self._serve, *target)
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self) -> "StateServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if request["op"] not in OPS:
+                        raise KeyError(f"unknown op {request['op']!r}")
+                    reply = {"result": self.backend.apply(request["key"], request["op"], *request["args"])}
+                    self.operations += 1
+                except Exception as e:
+                    reply = {"error": str(e)}
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+def open_backend(kind: str, path: Optional[str] = None, **options) -> StateBackend:
+    """Build a backend by name: "local", "mmap" (file `path`) or "socket" (address `path`)."""
+    if kind == "local":
+        return LocalStateBackend()
+    if path is None:
+        raise ValueError(f"The {kind} state backend needs a path")
+    if kind == "mmap":
+        return MmapStateBackend(path, **options)
+    if kind == "socket":
+        return SocketStateBackend(path, **options)
+    raise ValueError(f"Unknown state backend: {kind}")
+
+class _SharedState:
+    """Runs operations on the shared backend, falling back to local state while it is unreachable.
+
+    A degraded record retries the backend every `retry_interval` seconds and
+    returns to shared state (dropping the local one) once a call succeeds.
+
+    A `remote` backend is never called from the caller's thread: operations
+    run on a local replica of the record, writes are forwarded through
+    `submit`, and the replica is reloaded from the backend after writes and,
+    for reads, once it is `refresh_interval` seconds old. Decisions may lag
+    other workers by a round trip; while the backend is unreachable the
+    replica carries on as local state.
+    """
+
+    def __init__(self, backend: StateBackend, key: str, retry_interval: float = 5.0, refresh_interval: float = 0.5):
+        self.backend = backend
+        self.key = key
+        self.retry_interval = retry_interval
+        self.refresh_interval = refresh_interval
+        self._fallback: Optional[LocalStateBackend] = None
+        self._retry_at = 0.0
+        self._degraded = False
+        if backend.remote:
+            self._replica = LocalStateBackend()
+            self._refreshed = 0.0
+            self._refreshing = False
+            self._stale = False
+            self._refresh()
+
+    @property
+    def degraded(self) -> bool:
+        return self._degraded
+
+    def apply(self, op: str, *args: float) -> List[float]:
+        if self.backend.remote:
+            return self._apply_replicated(op, *args)
+        if self._fallback is None or time.monotonic() >= self._retry_at:
+            try:
+                result = self.backend.apply(self.key, op, *args)
+            except StateBackendError as e:
+                if self._fallback is None:
+                    self._fallback = LocalStateBackend()
+                self._reached(e)
+            else:
+                self._fallback = None
+                self._reached(None)
+                return result
+        return self._fallback.apply(self.key, op, *args)
+
+    def _apply_replicated(self, op: str, *args: float) -> List[float]:
+        result = self._replica.apply(self.key, op, *args)
+        now = time.monotonic()
+        if self._degraded:
+            if now < self._retry_at:
+                return result
+            # One operation per interval probes the backend
+            self._retry_at = now + self.retry_interval
+        if op not in READ_OPS:
+            self.backend.submit(self.key, op, *args, callback=self._forwarded)
+            self._refresh()
+        elif now - self._refreshed >= self.refresh_interval:
+            self._refresh()
+        return result
+
+    def _refresh(self):
+        if self._refreshing:
+            # The snapshot on its way may predate this write; fetch another once it lands
+            self._stale = True
+            return
+        self._refreshing, self._stale = True, False
+        if not self.backend.submit(self.key, "snapshot", callback=self._loaded):
+            self._refreshing = False
+
+    def _forwarded(self, result: Optional[List[float]], error: Optional[Exception]):
+        self._reached(error)
+
+    def _loaded(self, record: Optional[List[float]], error: Optional[Exception]):
+        # Runs on the backend's thread
+        self._refreshing = False
+        self._refreshed = time.monotonic()
+        self._reached(error)
+        if error is None and record[0]:
+            self._replica.load(self.key, record)
+        if self._stale and error is None:
+            self._refresh()
+
+    def _reached(self, error: Optional[Exception]):
+        if error is not None:
+            if not self._degraded:
+                # Availability over consistency: keep serving with per-process state
+                logger.error("shared_state_unavailable", key=self.key, error=str(error), retry_in=self.retry_interval)
+                self._set_degraded(True)
+            self._retry_at = time.monotonic() + self.retry_interval
+        elif self._degraded:
+            logger.info("shared_state_recovered", key=self.key)
+            self._set_degraded(False)
+
+    def _set_degraded(self, degraded: bool):
+        self._degraded = degraded
+        if metrics.ENABLED:
+            child(SHARED_STATE_DEGRADED, self.key).set(1 if degraded else 0)
+
+STATE_NAMES = {float(v): k for k, v in BREAKER_STATE_VALUES.items()}
+
+class SharedCircuitBreaker(CircuitBreaker):
+    """Time-window, failure-rate circuit breaker whose state lives in a `StateBackend`.
+
+    Semantics match `SlidingWindowCircuitBreaker` with `window_type="time"`:
+    every worker reports outcomes into the same window, the first one to
+    cross the threshold opens the breaker for all of them, and half-open
+    probes are limited fleet-wide. If the backend fails, the breaker keeps
+    working on local state. On a remote backend each worker decides on its
+    replica (see `_SharedState`), so a transition reaches the other workers
+    a round trip later and each of them may admit its own probe meanwhile.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        backend: StateBackend,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: Optional[float] = None,
+        slow_call_duration: float = 5.0,
+        window_size: float = 60.0,
+        buckets: int = 10,
+        minimum_calls: int = 10,
+        recovery_timeout: float = 30.0,
+        half_open_probes: int = 1,
+        probe_timeout: Optional[float] = None,
+        key: Optional[str] = None
+    ):
+        if not 1 <= buckets <= BREAKER_MAX_BUCKETS:
+            raise ValueError(f"buckets must be between 1 and {BREAKER_MAX_BUCKETS}")
+        self.shared = _SharedState(backend, key or f"breaker:{name}")
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.params: Tuple[float, ...] = (
+            window_size, buckets, minimum_calls, failure_rate_threshold,
+            -1.0 if slow_call_rate_threshold is None else slow_call_rate_threshold,
+            recovery_timeout, half_open_probes, probe_timeout if probe_timeout is not None else recovery_timeout
+        )
+        self._seen = "CLOSED"
+        super().__init__(name, recovery_timeout=recovery_timeout)
+
+    @property
+    def state(self) -> str:
+        state, *_ = self.shared.apply("breaker_read", *self.params)
+        return self._observe(state)
+
+    @state.setter
+    def state(self, value):
+        # Assigned by CircuitBreaker.__init__; the backend is the source of truth here
+        pass
+
+    @property
+    def failures(self) -> float:
+        return self.counts()[1]
+
+    @failures.setter
+    def failures(self, value):
+        pass
+
+    def counts(self) -> Sequence[float]:
+        """(calls, failures, slow calls) currently in the shared window."""
+        return self.shared.apply("breaker_read", *self.params)[1:]
+
+    def _observe(self, state: float) -> str:
+        # Keep this process's gauge in line with transitions made by other workers
+        name = STATE_NAMES[state]
+        if name != self._seen:
+            self._seen = name
+            if metrics.ENABLED:
+                child(CIRCUIT_BREAKER_STATE, self.name).set(BREAKER_STATE_VALUES[name])
+        return name
+
+    def _transition_logged(self, old: float, new: float, **fields):
+        # Only the worker that made a transition counts and logs it
+        if old == new:
+            self._observe(new)
+            return
+        state = self._observe(new)
+        if metrics.ENABLED:
+            child(CIRCUIT_BREAKER_TRANSITIONS, self.name, state).inc()
+        if state == "OPEN":
+            logger.warn("circuit_breaker_opened", breaker=self.name, state=state, **fields)
+        elif state == "HALF_OPEN":
+            logger.info("circuit_breaker_half_open", breaker=self.name, state=state)
+        else:
+            logger.info("circuit_breaker_recovered", breaker=self.name, state=state)
+
+    def _record(self, failed: bool, duration: Optional[float]):
+        slow = self.slow_call_rate_threshold is not None and duration is not None and duration >= self.slow_call_duration
+        old, new, calls, failures, slow_calls = self.shared.apply(
+            "breaker_record", *self.params, float(failed), float(slow)
+        )
+        self._transition_logged(old, new, calls=calls, failures=failures, slow_calls=slow_calls)
+
+    def record_success(self, duration: Optional[float] = None):
+        self._record(False, duration)
+
+    def record_failure(self, duration: Optional[float] = None):
+        self._record(True, duration)
+
+    def can_execute(self) -> bool:
+        allowed, old, new = self.shared.apply("breaker_acquire", *self.params)
+        self._transition_logged(old, new)
+        return bool(allowed)
+
+    def release(self):
+        self.shared.apply("breaker_release", *self.params)
+
+    @classmethod
+    def factory(cls, backend: StateBackend, **options) -> Callable[[str], "SharedCircuitBreaker"]:
+        """`breaker_factory` for `ReliabilityLayer`/`LLMGateway` sharing `backend`."""
+        return lambda name: cls(name, backend, **options)
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket whose tokens live in a `StateBackend`, refilled on the backend's clock.
+
+    `wait_time` and `consume` are separate operations, so workers racing
+    for the last tokens may briefly overdraw the bucket; later callers wait
+    correspondingly longer.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, backend: Optional[StateBackend] = None, key: str = "bucket"):
+        super().__init__(rate, capacity)
+        self.shared = _SharedState(backend or LocalStateBackend(), key)
+
+    def wait_time(self, amount: float) -> float:
+        return self.shared.apply("bucket_wait", self.rate, self.capacity, amount)[0]
+
+    def consume(self, amount: float):
+        self.tokens = self.shared.apply("bucket_consume", self.rate, self.capacity, amount)[0]
+
+def shared_rate_limit(
+    backend: StateBackend,
+    key: str,
+    requests_per_second: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    request_burst: Optional[float] = None,
+    token_burst: Optional[float] = None
+) -> RateLimit:
+    """`RateLimit` whose buckets are shared through `backend` under `key`."""
+    limit = RateLimit()
+    if requests_per_second:
+        limit.requests = SharedTokenBucket(requests_per_second, request_burst, backend, f"{key}:requests")
+    if tokens_per_minute:
+        limit.tokens = SharedTokenBucket(
+            tokens_per_minute / 60.0, token_burst or tokens_per_minute, backend, f"{key}:tokens"
+        )
+    return limit
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared gateway state server")
+    parser.add_argument("address", help="Unix socket path or host:port")
+    args = parser.parse_args()
+
+    async def _serve():
+        server = StateServer(args.address)
+        await server.start()
+        print(f"Serving gateway state on {args.address}", flush=True)
+        await server.serve_forever()
+
+    asyncio.run(_serve())
+
+if __name__ == "__main__":
+    main()
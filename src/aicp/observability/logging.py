@@ -1,21 +1,186 @@
+import atexit
+import random
 import structlog
 import sys
 import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, TextIO
+
+class EventSampler:
+    """Processor keeping only a fraction of events by name, e.g. `{"attempting_request": 0.01}`.
+
+    Events without a rate are always kept.
+    """
+
+    def __init__(self, rates: Dict[str, float], seed: Optional[int] = None):
+        self.rates = rates
+        self.rng = random.Random(seed)
+        self.sampled_out = 0
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is not None and self.rng.random() >= rate:
+            self.sampled_out += 1
+            raise structlog.DropEvent
+        return event_dict
+
+class BatchedLogSink:
+    """Bounded in-memory buffer rendered and written to `stream` by a background thread.
+
+    Logging calls only append the event dict; rendering and the write syscall
+    happen off the event loop, `batch_size` events at a time. When the buffer
+    holds `max_buffer` events new ones are dropped and counted in `dropped`.
+    Pending events are flushed by `close()`, which also runs at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        renderer: Optional[Callable] = None,
+        max_buffer: int = 10_000,
+        batch_size: int = 512,
+        flush_interval: float = 0.1
+    ):
+        self.stream = stream or sys.stdout
+        self.renderer = renderer or structlog.processors.JSONRenderer()
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._buffer: deque = deque()
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="aicp-log-sink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, event_dict: Dict[str, Any]):
+        if self._closed:
+            # Loggers cached before shutdown still work, just synchronously
+            with self._write_lock:
+                self._write([event_dict])
+            return
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._buffer.append(event_dict)
+        if len(self._buffer) >= self.batch_size and not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything buffered so far from the calling thread."""
+        with self._write_lock:
+            while self._buffer:
+                batch = []
+                while self._buffer and len(batch) < self.batch_size:
+                    batch.append(self._buffer.popleft())
+                self._write(batch)
+
+    def close(self, timeout: float = 5.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self.flush()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _write(self, batch):
+        lines = []
+        for event_dict in batch:
+            try:
+                stamp = event_dict.get("timestamp")
+                if isinstance(stamp, float):
+                    event_dict["timestamp"] = datetime.fromtimestamp(stamp, timezone.utc).isoformat().replace("+00:00", "Z")
+                lines.append(self.renderer(None, event_dict.get("level", "info"), event_dict))
+            except Exception:
+                self.dropped += 1
+        if lines:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+            self.written += len(lines)
+
+def raw_timestamp(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    # Epoch seconds; `BatchedLogSink` formats them as ISO 8601 off the event loop
+    event_dict["timestamp"] = time.time()
+    return event_dict
+
+class BatchedLogger:
+    """structlog logger handing unrendered event dicts to a `BatchedLogSink`."""
+
+    def __init__(self, sink: BatchedLogSink):
+        self.sink = sink
+
+    def msg(self, **event_dict):
+        self.sink.enqueue(event_dict)
+
+    log = debug = info = warn = warning = error = critical = exception = fatal = msg
+
+class BatchedLoggerFactory:
+    def __init__(self, sink: BatchedLogSink):
+        self.sink = sink
+
+    def __call__(self, *args) -> BatchedLogger:
+        return BatchedLogger(self.sink)
+
+_sink: Optional[BatchedLogSink] = None
+
+def setup_logging(
+    level: str = "INFO",
+    batched: bool = False,
+    sample_rates: Optional[Dict[str, float]] = None,
+    max_buffer: int = 10_000,
+    stream: Optional[TextIO] = None
+) -> Optional[BatchedLogSink]:
+    """Configure structlog.
+
+    With `batched=True` events are rendered and written by a background
+    thread (see `BatchedLogSink`), which is returned so callers can inspect
+    `dropped` or flush explicitly. `sample_rates` maps event names to the
+    fraction of those events to keep.
+    """
+    global _sink
+    if _sink is not None:
+        _sink.close()
+        _sink = None
+
+    processors = []
+    if sample_rates:
+        processors.append(EventSampler(sample_rates))
+    processors += [
+        structlog.contextvars.merge_contextvars,
+        structlog.processors.add_log_level,
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.format_exc_info,
+        raw_timestamp if batched else structlog.processors.TimeStamper(fmt="iso"),
+    ]
+    renderer = structlog.processors.JSONRenderer() if not sys.stderr.isatty() else structlog.dev.ConsoleRenderer()
+
+    if batched:
+        _sink = BatchedLogSink(stream=stream, renderer=renderer, max_buffer=max_buffer)
+        logger_factory = BatchedLoggerFactory(_sink)
+    else:
+        processors.append(renderer)
+        logger_factory = structlog.PrintLoggerFactory(stream)
 
-def setup_logging(level: str = "INFO"):
     structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.processors.add_log_level,
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.JSONRenderer() if not sys.stderr.isatty() else structlog.dev.ConsoleRenderer()
-        ],
+        processors=processors,
         wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, level)),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=logger_factory,
         cache_logger_on_first_use=True,
     )
+    return _sink
 
 logger = structlog.get_logger()
@@ -1,4 +1,32 @@
-from prometheus_client import Counter, Histogram, Gauge
+import os
+from typing import Any, Dict, Tuple
+from prometheus_client import Counter, Histogram, Gauge, CONTENT_TYPE_LATEST, REGISTRY, generate_latest, start_http_server
+
+# Set AICP_METRICS=0 (or call `set_enabled(False)`) to skip recording on the hot paths
+ENABLED = os.environ.get("AICP_METRICS", "1") != "0"
+
+def set_enabled(enabled: bool):
+    global ENABLED
+    ENABLED = enabled
+
+_children: Dict[Tuple[Any, Tuple[str, ...]], Any] = {}
+
+def child(metric, *labels: str):
+    """Cached `metric.labels(*labels)`; avoids the per-call lookup and lock in prometheus_client."""
+    key = (metric, labels)
+    found = _children.get(key)
+    if found is None:
+        found = _children[key] = metric.labels(*labels)
+    return found
+
+def start_metrics_server(port: int = 9100, addr: str = "0.0.0.0"):
+    """Serve `/metrics` for Prometheus scraping from a background thread."""
+    return start_http_server(port, addr=addr)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition body and content type, for serving `/metrics` from an existing server."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
 
 # Gateway Metrics
 REQUESTS_TOTAL = Counter(
@@ -25,6 +53,49 @@ CIRCUIT_BREAKER_STATE = Gauge(
     ["breaker"]
 )
 
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    "aicp_circuit_breaker_transitions_total",
+    "Circuit breaker state changes",
+    ["breaker", "state"] # state entered: CLOSED, OPEN, HALF_OPEN
+)
+
+SHARED_STATE_DEGRADED = Gauge(
+    "aicp_shared_state_degraded",
+    "1 while a shared state record is served from per-process state because its backend is unreachable",
+    ["key"]
+)
+
+GATEWAY_REQUESTS_TOTAL = Counter(
+    "aicp_gateway_completions_total",
+    "Gateway completions by outcome",
+    ["model", "outcome"] # outcome: success, error, cache_hit
+)
+
+GATEWAY_LATENCY_SECONDS = Histogram(
+    "aicp_gateway_completion_latency_seconds",
+    "End-to-end gateway completion latency, including middleware and retries",
+    ["model"]
+)
+
+MIDDLEWARE_LATENCY_SECONDS = Histogram(
+    "aicp_gateway_middleware_latency_seconds",
+    "Time spent in a middleware hook",
+    ["middleware", "hook"], # hook: pre_process, post_process
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1)
+)
+
+BACKOFF_SECONDS = Histogram(
+    "aicp_gateway_backoff_seconds",
+    "Time slept between retry attempts",
+    ["provider"]
+)
+
+RETRIES_TOTAL = Counter(
+    "aicp_gateway_retries_total",
+    "Retry and fallback attempts checked against retry budgets",
+    ["provider", "outcome"] # outcome: allowed, denied
+)
+
 # Pipeline Metrics
 PIPELINE_RUNS = Counter(
     "aicp_pipeline_runs_total",
@@ -37,3 +108,16 @@ STAGE_LATENCY = Histogram(
     "Pipeline stage latency",
     ["pipeline", "stage"]
 )
+
+# Admission Control Metrics
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "aicp_admission_queue_depth",
+    "Requests waiting for rate-limit admission"
+)
+
+ADMISSION_WAIT_SECONDS = Histogram(
+    "aicp_admission_wait_seconds",
+    "Time spent waiting for rate-limit admission",
+    ["outcome"], # outcome: admitted, rejected
+    buckets=(0.0, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
@@ -0,0 +1,20 @@
+import contextlib
+import os
+from opentelemetry import trace
+
+# Spans are opt-in: set AICP_TRACING=1 or call `set_enabled(True)` after configuring
+# an OpenTelemetry TracerProvider. Disabled, `span()` costs one flag check.
+ENABLED = os.environ.get("AICP_TRACING", "0") == "1"
+
+tracer = trace.get_tracer("aicp")
+
+_NOOP = contextlib.nullcontext()
+
+def set_enabled(enabled: bool):
+    global ENABLED
+    ENABLED = enabled
+
+def span(name: str, **attributes):
+    if not ENABLED:
+        return _NOOP
+    return tracer.start_as_current_span(name, attributes=attributes)
@@ -0,0 +1,82 @@
+import hashlib
+import mmap
+import os
+import pickle
+from typing import Any, BinaryIO
+from pydantic import BaseModel
+import structlog
+
+logger = structlog.get_logger()
+
+class ArtifactRef(BaseModel):
+    """Handle to a stage output spilled to an `ArtifactStore`.
+
+    Cheap to keep in `context`, to persist and to send to worker processes;
+    the data is only read by `load`, `open` or `mmap`.
+    """
+    root: str
+    key: str
+    size: int
+    # "bytes" for raw bytes-like outputs (mappable as-is), "pickle" for everything else
+    kind: str
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.root, self.key[:2], self.key[2:])
+
+    def open(self) -> BinaryIO:
+        return open(self.path, "rb")
+
+    def mmap(self) -> mmap.mmap:
+        """Map the stored payload read-only; raw bytes outputs need no copy at all."""
+        with self.open() as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def load(self) -> Any:
+        with self.open() as f:
+            payload = f.read()
+        return payload if self.kind == "bytes" else pickle.loads(payload)
+
+class ArtifactStore:
+    """Content-addressed files for stage outputs too large to keep in memory.
+
+    `spill` writes outputs whose serialized size reaches `spill_threshold`
+    bytes and returns an `ArtifactRef`; smaller outputs are returned as-is.
+    Identical outputs share one file.
+    """
+
+    def __init__(self, root: str, spill_threshold: int = 1024 * 1024):
+        self.root = root
+        self.spill_threshold = spill_threshold
+        os.makedirs(root, exist_ok=True)
+        self.spilled = 0
+        self.spilled_bytes = 0
+
+    def spill(self, output: Any) -> Any:
+        if output is None or isinstance(output, ArtifactRef):
+            return output
+        if isinstance(output, (bytes, bytearray, memoryview)):
+            if len(output) < self.spill_threshold:
+                return output
+            return self.put(bytes(output), "bytes")
+        try:
+            payload = pickle.dumps(output, protocol=5)
+        except Exception as e:
+            logger.warn("artifact_unpicklable", error=str(e))
+            return output
+        if len(payload) < self.spill_threshold:
+            return output
+        return self.put(payload, "pickle")
+
+    def put(self, payload: bytes, kind: str = "pickle") -> ArtifactRef:
+        key = hashlib.sha256(payload).hexdigest()
+        ref = ArtifactRef(root=self.root, key=key, size=len(payload), kind=kind)
+        if not os.path.exists(ref.path):
+            os.makedirs(os.path.dirname(ref.path), exist_ok=True)
+            tmp = f"{ref.path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, ref.path)
+        self.spilled += 1
+        self.spilled_bytes += len(payload)
+        return ref
@@ -0,0 +1,105 @@
+import dataclasses
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from typing import Any, Callable, Dict, Optional, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+def function_fingerprint(func: Callable, version: Optional[str] = None) -> str:
+    """Hash of a stage function's source (or bytecode) and explicit version."""
+    try:
+        code = inspect.getsource(func).encode("utf-8")
+    except (OSError, TypeError):
+        code_obj = getattr(func, "__code__", None)
+        code = code_obj.co_code + repr(code_obj.co_consts).encode("utf-8") if code_obj else repr(func).encode("utf-8")
+    digest = hashlib.sha256(code)
+    digest.update(f"\0{getattr(func, '__qualname__', '')}\0{version or ''}".encode("utf-8"))
+    return digest.hexdigest()
+
+def _canonical(value: Any) -> Any:
+    """JSON-ready form of `value` that is the same in every process.
+
+    Sets and dicts are sorted, since their iteration order depends on hash
+    randomization; objects JSON cannot express fall back to their pickle.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return {type(value).__name__: [_canonical(v) for v in value]}
+    if isinstance(value, dict):
+        return {"dict": sorted(([_canonical(k), _canonical(v)] for k, v in value.items()), key=_dumps)}
+    if isinstance(value, (set, frozenset)):
+        return {"set": sorted((_canonical(v) for v in value), key=_dumps)}
+    if isinstance(value, bytes):
+        return {"bytes": value.hex()}
+    name = f"{type(value).__module__}.{type(value).__qualname__}"
+    if hasattr(value, "model_dump"):
+        return {name: _canonical(value.model_dump())}
+    if dataclasses.is_dataclass(value):
+        return {name: _canonical({f.name: getattr(value, f.name) for f in dataclasses.fields(value)})}
+    return {"pickle": pickle.dumps(value, protocol=5).hex()}
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+class CheckpointStore:
+    """Local content-addressed store for stage outputs.
+
+    Objects are addressed by the hash of the stage fingerprint and a
+    canonical serialization of its inputs, so an unchanged stage fed unchanged inputs is loaded
+    from disk instead of being executed again.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, fingerprint: str, inputs: Dict[str, Any]) -> Optional[str]:
+        try:
+            payload = _dumps(_canonical(inputs)).encode("utf-8")
+        except Exception as e:
+            logger.debug("checkpoint_inputs_unhashable", error=str(e))
+            return None
+        digest = hashlib.sha256(fingerprint.encode("utf-8"))
+        digest.update(payload)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, "objects", key[:2], key[2:])
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        try:
+            with open(self._path(key), "rb") as f:
+                output = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return False, None
+        except Exception as e:
+            logger.warn("checkpoint_unreadable", key=key, error=str(e))
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, output
+
+    def put(self, key: str, output: Any) -> bool:
+        path = self._path(key)
+        try:
+            payload = pickle.dumps(output, protocol=5)
+        except Exception as e:
+            logger.warn("checkpoint_output_unpicklable", key=key, error=str(e))
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
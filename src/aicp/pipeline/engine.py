@@ -1,31 +1,127 @@
 import asyncio
+import contextlib
 import functools
 import inspect
-from typing import Any, Callable, Dict, List, Optional, Type
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Type, Union
 from .models import PipelineRun, StageResult, StageStatus
+from .executors import ExecutorKind, StageExecutors, check_stage_executor
+from .checkpoint import CheckpointStore, function_fingerprint
+from .streams import Stream, StreamReader, batched, iterate, map_ordered
+from .artifacts import ArtifactRef, ArtifactStore
+from .history import RunHistory
+from ..observability import metrics, tracing
+from ..observability.metrics import PIPELINE_RUNS, STAGE_LATENCY, child
 from datetime import datetime
 import structlog
 
 logger = structlog.get_logger()
 
 class Stage:
-    def __init__(self, func: Callable, name: Optional[str] = None, depends_on: Optional[List[str]] = None):
+    def __init__(
+        self,
+        func: Callable,
+        name: Optional[str] = None,
+        depends_on: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        executor: Union[ExecutorKind, str] = ExecutorKind.INLINE,
+        version: Optional[str] = None,
+        cache: bool = True,
+        map_over: Optional[str] = None,
+        concurrency: int = 1,
+        batch_size: Optional[int] = None,
+        buffer_size: int = 64
+    ):
         self.func = func
         self.name = name or func.__name__
         self.depends_on = depends_on or []
+        # Tags select the per-tag concurrency limits configured on the Pipeline
+        self.tags = tags or []
+        # Where a sync stage runs: on the event loop, in the thread pool or in the process pool
+        self.executor = ExecutorKind(executor)
+        # Memoization: bump `version` to invalidate outputs; disable for non-deterministic stages
+        self.version = version
+        self.cache = cache
+        # Item-level stages: call `func` per item (or per list of `batch_size` items) of the
+        # `map_over` input, up to `concurrency` at a time, and stream the results downstream
+        self.map_over = map_over
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        # Items buffered per downstream consumer of a streaming stage before the producer waits
+        self.buffer_size = buffer_size
+        self._fingerprint: Optional[str] = None
 
-    async def run(self, context: Dict[str, Any]) -> StageResult:
+    @property
+    def streaming(self) -> bool:
+        return self.map_over is not None or inspect.isgeneratorfunction(self.func) or inspect.isasyncgenfunction(self.func)
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = function_fingerprint(self.func, self.version)
+        return self._fingerprint
+
+    def _inputs(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Inject context variables as arguments if they match; streams become this stage's reader
+        sig = inspect.signature(self.func)
+        kwargs = {k: context[k] for k in sig.parameters if k in context}
+        for k, value in kwargs.items():
+            if isinstance(value, Stream):
+                kwargs[k] = value.reader(self.name)
+        return kwargs
+
+    async def _resolve(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # Spilled outputs are loaded for the call unless the parameter asks for the handle itself
+        sig = inspect.signature(self.func)
+        resolved = dict(kwargs)
+        for k, value in kwargs.items():
+            if isinstance(value, ArtifactRef) and sig.parameters[k].annotation not in (ArtifactRef, "ArtifactRef"):
+                resolved[k] = await asyncio.to_thread(value.load)
+        return resolved
+
+    @staticmethod
+    def _close_readers(kwargs: Dict[str, Any]):
+        for value in kwargs.values():
+            if isinstance(value, StreamReader):
+                value.close()
+
+    async def _call(self, kwargs: Dict[str, Any], executors: Optional[StageExecutors]) -> Any:
+        if asyncio.iscoroutinefunction(self.func):
+            return await self.func(**kwargs)
+        if self.executor == ExecutorKind.INLINE:
+            return self.func(**kwargs)
+        return await (executors or _default_executors()).run(self.executor, self.func, kwargs)
+
+    async def run(
+        self,
+        context: Dict[str, Any],
+        executors: Optional[StageExecutors] = None,
+        checkpoints: Optional[CheckpointStore] = None
+    ) -> StageResult:
         result = StageResult(stage_id=self.name, status=StageStatus.RUNNING)
+        kwargs: Dict[str, Any] = {}
         try:
-            # Inject context variables as arguments if they match
-            sig = inspect.signature(self.func)
-            kwargs = {k: context[k] for k in sig.parameters if k in context}
+            kwargs = self._inputs(context)
+
+            key = None
+            # Stream inputs are consumed, not hashed, so those stages are never memoized
+            if checkpoints is not None and self.cache and not any(isinstance(v, StreamReader) for v in kwargs.values()):
+                key = checkpoints.key(self.fingerprint, kwargs)
+            if key is not None:
+                hit, output = await asyncio.to_thread(checkpoints.get, key)
+                result.metadata.update(cache_key=key, cache_hit=hit)
+                if hit:
+                    logger.info("stage_cache_hit", stage=self.name, key=key)
+                    result.output = output
+                    result.status = StageStatus.COMPLETED
+                    return result
             
-            if asyncio.iscoroutinefunction(self.func):
-                output = await self.func(**kwargs)
-            else:
-                output = self.func(**kwargs)
+            output = await self._call(await self._resolve(kwargs), executors)
             
+            if key is not None:
+                await asyncio.to_thread(checkpoints.put, key, output)
+
             result.output = output
             result.status = StageStatus.COMPLETED
         except Exception as e:
@@ -33,67 +129,359 @@ class Stage:
             result.error = str(e)
             result.status = StageStatus.FAILED
         finally:
+            self._close_readers(kwargs)
             result.end_time = datetime.now()
         
         return result
 
+    async def run_stream(
+        self,
+        context: Dict[str, Any],
+        stream: Stream,
+        executors: Optional[StageExecutors] = None
+    ) -> StageResult:
+        """Run a streaming stage, pushing its items into `stream` as they are produced.
+
+        Only the item count is kept in the result; the items themselves live
+        in the bounded stream buffers until every consumer has read them.
+        """
+        result = StageResult(stage_id=self.name, status=StageStatus.RUNNING, metadata={"streaming": True})
+        kwargs: Dict[str, Any] = {}
+        try:
+            kwargs = self._inputs(context)
+            kwargs = await self._resolve(kwargs)
+            if self.map_over is not None:
+                await self._map(kwargs, stream, executors)
+            elif inspect.isasyncgenfunction(self.func):
+                async for item in self.func(**kwargs):
+                    await stream.put(item)
+            elif self.executor == ExecutorKind.THREAD:
+                # Advance the generator in the thread pool so blocking producers do not stall the loop
+                pool = (executors or _default_executors()).thread_pool
+                items = self.func(**kwargs)
+                done = object()
+                loop = asyncio.get_running_loop()
+                while (item := await loop.run_in_executor(pool, next, items, done)) is not done:
+                    await stream.put(item)
+            else:
+                for item in self.func(**kwargs):
+                    await stream.put(item)
+            await stream.finish()
+            result.status = StageStatus.COMPLETED
+        except BaseException as e:
+            stream.fail(e)
+            if not isinstance(e, Exception):
+                raise
+            logger.error("stage_failed", stage=self.name, error=str(e))
+            result.error = str(e)
+            result.status = StageStatus.FAILED
+        finally:
+            self._close_readers(kwargs)
+            result.metadata["items"] = stream.items
+            result.end_time = datetime.now()
+
+        return result
+
+    async def _map(self, kwargs: Dict[str, Any], stream: Stream, executors: Optional[StageExecutors]):
+        if self.map_over not in kwargs:
+            raise ValueError(f"Stage '{self.name}' maps over '{self.map_over}', which is not one of its inputs")
+        items = iterate(kwargs[self.map_over])
+        if self.batch_size:
+            items = batched(items, self.batch_size)
+
+        async def call(item):
+            return await self._call({**kwargs, self.map_over: item}, executors)
+
+        async def emit(output):
+            # A batch call returns one result per item
+            for item in (output if self.batch_size else [output]):
+                await stream.put(item)
+
+        await map_ordered(items, call, emit, self.concurrency)
+
 class Pipeline:
-    def __init__(self, name: str):
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: Optional[int] = None,
+        tag_limits: Optional[Dict[str, int]] = None,
+        fail_fast: bool = True,
+        thread_workers: Optional[int] = None,
+        process_workers: Optional[int] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        artifacts: Optional[ArtifactStore] = None,
+        history: Optional[RunHistory] = None
+    ):
         self.name = name
         self.stages: Dict[str, Stage] = {}
+        self.max_concurrency = max_concurrency
+        self.tag_limits = tag_limits or {}
+        self.fail_fast = fail_fast
+        self.executors = StageExecutors(thread_workers=thread_workers, process_workers=process_workers)
+        self.checkpoints = checkpoints
+        # Large outputs are spilled to `artifacts` and `context` keeps an `ArtifactRef`
+        self.artifacts = artifacts
+        # Runs are recorded in `history` when they start and when they finish
+        self.history = history
 
     def add_stage(self, stage: Stage):
+        check_stage_executor(stage.name, stage.func, stage.executor)
         self.stages[stage.name] = stage
 
-    async def run(self, initial_context: Optional[Dict[str, Any]] = None) -> PipelineRun:
+    def close(self):
+        """Shut down the worker pools shared by this pipeline's stages."""
+        self.executors.shutdown()
+
+    async def run(
+        self,
+        initial_context: Optional[Dict[str, Any]] = None,
+        resume_from: Optional[PipelineRun] = None
+    ) -> PipelineRun:
+        """Execute the DAG.
+
+        Passing a previous (typically failed) run as `resume_from` reuses the
+        outputs of its completed stages and only executes the remainder.
+        """
+        with tracing.span("pipeline.run", pipeline=self.name):
+            run = await self._run(initial_context, resume_from)
+        await self._record(run)
+        if metrics.ENABLED:
+            child(PIPELINE_RUNS, self.name, run.status.value).inc()
+        return run
+
+    async def _run(self, initial_context: Optional[Dict[str, Any]], resume_from: Optional[PipelineRun]) -> PipelineRun:
         run = PipelineRun(pipeline_name=self.name)
         context = (initial_context or {}).copy()
         
         logger.info("pipeline_started", pipeline=self.name, run_id=run.run_id)
         run.status = StageStatus.RUNNING
-        
-        # Simple topological sort/sequential execution for MVP
-        # In a real system, we'd use a graph to determine parallel execution
-        executed = set()
-        
-        while len(executed) < len(self.stages):
-            ready = [
-                s for name, s in self.stages.items() 
-                if name not in executed and all(dep in executed for dep in s.depends_on)
-            ]
-            
-            if not ready:
-                if len(executed) < len(self.stages):
-                    run.status = StageStatus.FAILED
-                    logger.error("pipeline_deadlock", executed=list(executed))
-                    break
+        await self._record(run)
+
+        # In-degree tracking: a stage is ready once all of its dependencies completed
+        indegree = {name: len(s.depends_on) for name, s in self.stages.items()}
+        dependents: Dict[str, List[str]] = {name: [] for name in self.stages}
+        for name, s in self.stages.items():
+            for dep in s.depends_on:
+                if dep in dependents:
+                    dependents[dep].append(name)
+
+        resumed = set()
+        if resume_from is not None:
+            run.resumed_from = resume_from.run_id
+            for name, previous in resume_from.results.items():
+                # Streamed items were never kept, so streaming stages always run again
+                if name not in self.stages or previous.status != StageStatus.COMPLETED or self.stages[name].streaming:
+                    continue
+                resumed.add(name)
+                run.results[name] = previous.model_copy(
+                    update={"metadata": {**previous.metadata, "resumed_from": resume_from.run_id}}
+                )
+                if previous.output is not None:
+                    context[name] = previous.output
+                for dependent in dependents[name]:
+                    indegree[dependent] -= 1
+            logger.info("pipeline_resumed", pipeline=self.name, resumed_from=resume_from.run_id, stages=sorted(resumed))
+
+        # Only dependents that take a streaming stage's output as a parameter read its stream;
+        # the others merely wait for the producer to finish
+        consumers = {
+            name: [d for d in dependents[name] if name in inspect.signature(self.stages[d].func).parameters]
+            for name, s in self.stages.items() if s.streaming
+        }
+        reading = {d for names in consumers.values() for d in names}
+
+        ready = deque(name for name, degree in indegree.items() if degree == 0 and name not in resumed)
+
+        global_limit = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        tag_limits = {tag: asyncio.Semaphore(limit) for tag, limit in self.tag_limits.items()}
+        running: Dict[asyncio.Task, Stage] = {}
+        failed: Optional[str] = None
+
+        streams: Dict[str, Stream] = {}
+
+        while ready or running:
+            while ready and not (failed and self.fail_fast):
+                stage = self.stages[ready.popleft()]
+                if stage.streaming:
+                    # Consumers start right away and read items as they are produced
+                    stream = streams[stage.name] = Stream(stage.name, stage.buffer_size)
+                    downstream = self._downstream(stage.name, dependents)
+                    for name in consumers[stage.name]:
+                        if name in resumed:
+                            continue
+                        # A consumer that also waits for another stage fed by this stream cannot
+                        # read until that stage finished, so the producer must not wait on it
+                        unbounded = any(dep != stage.name and dep in downstream for dep in self.stages[name].depends_on)
+                        if unbounded:
+                            logger.warn("stream_reader_unbounded", pipeline=self.name, stream=stage.name, consumer=name)
+                        stream.reader(name, unbounded)
+                    context[stage.name] = stream
+                    task = asyncio.create_task(self._run_stage(stage, context, global_limit, tag_limits, stream))
+                    running[task] = stage
+                    for name in consumers[stage.name]:
+                        indegree[name] -= 1
+                        if indegree[name] == 0 and name not in resumed:
+                            ready.append(name)
+                    continue
+                task = asyncio.create_task(
+                    self._run_stage(stage, context, global_limit, tag_limits, limited=stage.name not in reading)
+                )
+                running[task] = stage
+
+            if not running:
                 break
 
-            # Execute ready stages (sequential for now)
-            for stage in ready:
-                stage_result = await stage.run(context)
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stage = running.pop(task)
+                stage_result = task.result()
                 run.results[stage.name] = stage_result
-                executed.add(stage.name)
-                
+
                 if stage_result.status == StageStatus.FAILED:
-                    run.status = StageStatus.FAILED
-                    logger.error("pipeline_aborted", stage=stage.name)
-                    run.end_time = datetime.now()
-                    return run
-                
-                # Update context with output
-                if stage_result.output is not None:
-                    context[stage.name] = stage_result.output
+                    failed = failed or stage.name
+                    logger.error("pipeline_stage_failed", pipeline=self.name, stage=stage.name)
+                    # Stages that can no longer start must not hold their streams back;
+                    # running consumers of a failed stream see the failure in-band instead
+                    started = {s.name for s in running.values()} | run.results.keys()
+                    for name in self._downstream(stage.name, dependents):
+                        if name not in started:
+                            for stream in streams.values():
+                                stream.close_reader(name)
+                    continue
+
+                if stage.streaming:
+                    # Consumers were released at launch; ordering-only dependents start now
+                    released = [name for name in dependents[stage.name] if name not in consumers[stage.name]]
+                else:
+                    if self.artifacts is not None and stage_result.output is not None:
+                        stage_result.output = await asyncio.to_thread(self.artifacts.spill, stage_result.output)
+                    # Update context with output
+                    if stage_result.output is not None:
+                        context[stage.name] = stage_result.output
+                    released = dependents[stage.name]
+                for name in released:
+                    indegree[name] -= 1
+                    if indegree[name] == 0 and name not in resumed:
+                        ready.append(name)
+
+            if failed and self.fail_fast and running:
+                await self._cancel(running, run, failed)
+
+        if failed:
+            run.status = StageStatus.FAILED
+            logger.error("pipeline_aborted", stage=failed)
+            for name in self.stages:
+                if name not in run.results:
+                    run.results[name] = StageResult(
+                        stage_id=name, status=StageStatus.SKIPPED,
+                        error=f"upstream stage '{failed}' failed", end_time=datetime.now()
+                    )
+            run.end_time = datetime.now()
+            return run
+
+        if len(run.results) < len(self.stages):
+            run.status = StageStatus.FAILED
+            logger.error("pipeline_deadlock", executed=list(run.results))
+            run.end_time = datetime.now()
+            return run
 
         run.status = StageStatus.COMPLETED
         run.end_time = datetime.now()
         logger.info("pipeline_completed", pipeline=self.name, run_id=run.run_id)
         return run
 
+    async def _run_stage(
+        self,
+        stage: Stage,
+        context: Dict[str, Any],
+        global_limit: Optional[asyncio.Semaphore],
+        tag_limits: Dict[str, asyncio.Semaphore],
+        stream: Optional[Stream] = None,
+        limited: bool = True
+    ) -> StageResult:
+        async with contextlib.AsyncExitStack() as stack:
+            # Streaming stages and their consumers skip the stage limits: a producer or a
+            # consumer holding a slot while another consumer of the same stream waits for one
+            # would deadlock. `Stage.concurrency` and the stream buffers bound them instead.
+            if stream is None and limited:
+                # Acquire in a fixed order so stages with overlapping tags cannot deadlock
+                for tag in sorted(set(stage.tags) & tag_limits.keys()):
+                    await stack.enter_async_context(tag_limits[tag])
+                if global_limit is not None:
+                    await stack.enter_async_context(global_limit)
+            started = time.perf_counter()
+            with tracing.span("pipeline.stage", pipeline=self.name, stage=stage.name):
+                if stream is not None:
+                    result = await stage.run_stream(context, stream, self.executors)
+                else:
+                    result = await stage.run(context, self.executors, self.checkpoints)
+            if metrics.ENABLED:
+                child(STAGE_LATENCY, self.name, stage.name).observe(time.perf_counter() - started)
+            return result
+
+    async def _record(self, run: PipelineRun):
+        if self.history is None:
+            return
+        try:
+            await asyncio.to_thread(self.history.record, run)
+        except Exception as e:
+            # Losing history must not fail the pipeline itself
+            logger.error("run_history_write_failed", run_id=run.run_id, error=str(e))
+
+    @staticmethod
+    def _downstream(name: str, dependents: Dict[str, List[str]]) -> List[str]:
+        seen: List[str] = []
+        pending = list(dependents[name])
+        while pending:
+            current = pending.pop()
+            if current not in seen:
+                seen.append(current)
+                pending.extend(dependents[current])
+        return seen
+
+    async def _cancel(self, running: Dict[asyncio.Task, Stage], run: PipelineRun, failed: str):
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        for task, stage in running.items():
+            if not task.cancelled():
+                run.results[stage.name] = task.result()
+                continue
+            logger.warn("stage_cancelled", stage=stage.name, failed_stage=failed)
+            run.results[stage.name] = StageResult(
+                stage_id=stage.name, status=StageStatus.SKIPPED,
+                error=f"cancelled after stage '{failed}' failed", end_time=datetime.now()
+            )
+        running.clear()
+
+_shared_executors: Optional[StageExecutors] = None
+
+def _default_executors() -> StageExecutors:
+    # Used when a stage is run on its own, outside of a Pipeline
+    global _shared_executors
+    if _shared_executors is None:
+        _shared_executors = StageExecutors()
+    return _shared_executors
+
 # Decorators
-def stage(name: Optional[str] = None, depends_on: Optional[List[str]] = None):
+def stage(
+    name: Optional[str] = None,
+    depends_on: Optional[List[str]] = None,
+    tags: Optional[List[str]] = None,
+    executor: Union[ExecutorKind, str] = ExecutorKind.INLINE,
+    version: Optional[str] = None,
+    cache: bool = True,
+    map_over: Optional[str] = None,
+    concurrency: int = 1,
+    batch_size: Optional[int] = None,
+    buffer_size: int = 64
+):
     def decorator(func):
-        return Stage(func, name=name, depends_on=depends_on)
+        return Stage(
+            func, name=name, depends_on=depends_on, tags=tags,
+            executor=executor, version=version, cache=cache,
+            map_over=map_over, concurrency=concurrency, batch_size=batch_size, buffer_size=buffer_size
+        )
     return decorator
 
 def pipeline(name: str):
@@ -0,0 +1,182 @@
+import asyncio
+import collections.abc
+import functools
+import importlib
+import inspect
+import io
+import multiprocessing
+import os
+import pickle
+import socket
+import threading
+import types
+import typing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class ExecutorKind(str, Enum):
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+# Types whose values can never cross a process boundary
+UNPICKLABLE_TYPES = (
+    types.GeneratorType,
+    types.AsyncGeneratorType,
+    types.CoroutineType,
+    types.FrameType,
+    type(threading.Lock()),
+    type(threading.RLock()),
+    threading.Thread,
+    socket.socket,
+    io.IOBase,
+    asyncio.Future,
+    asyncio.AbstractEventLoop,
+)
+UNPICKLABLE_ORIGINS = (
+    collections.abc.Generator,
+    collections.abc.AsyncGenerator,
+    collections.abc.Iterator,
+    collections.abc.AsyncIterator,
+    collections.abc.Coroutine,
+    collections.abc.Awaitable,
+)
+
+class StageExecutors:
+    """Thread and process pools shared by every stage of a pipeline.
+
+    Pools are created on first use and sized by the owning pipeline. Process
+    stage outputs are pickled with protocol 5; out-of-band buffers at least
+    `shm_threshold` bytes large travel through shared memory instead of the
+    result pipe.
+    """
+
+    def __init__(
+        self,
+        thread_workers: Optional[int] = None,
+        process_workers: Optional[int] = None,
+        shm_threshold: int = 1024 * 1024,
+        mp_context: str = "spawn"
+    ):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers or os.cpu_count() or 1
+        self.shm_threshold = shm_threshold
+        self.mp_context = mp_context
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(self.thread_workers, thread_name_prefix="aicp-stage")
+        return self._thread_pool
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                self.process_workers, mp_context=multiprocessing.get_context(self.mp_context)
+            )
+        return self._process_pool
+
+    async def run(self, kind: ExecutorKind, func: Callable, kwargs: Dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        if kind == ExecutorKind.THREAD:
+            return await loop.run_in_executor(self.thread_pool, functools.partial(func, **kwargs))
+        if kind == ExecutorKind.PROCESS:
+            payload, segments = await loop.run_in_executor(
+                self.process_pool, _call_in_process,
+                func.__module__, func.__qualname__, kwargs, self.shm_threshold
+            )
+            return _load_result(payload, segments)
+        raise ValueError(f"Unsupported executor: {kind}")
+
+    def shutdown(self, wait: bool = True):
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=wait)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+            self._process_pool = None
+
+def check_stage_executor(name: str, func: Callable, kind: ExecutorKind):
+    """Validate at registration time that `func` can run on the chosen executor."""
+    if kind == ExecutorKind.INLINE:
+        return
+    if asyncio.iscoroutinefunction(func) or inspect.isasyncgenfunction(func):
+        raise TypeError(f"Stage '{name}': async stages must use the inline executor")
+    if kind != ExecutorKind.PROCESS:
+        return
+    if inspect.isgeneratorfunction(func):
+        raise TypeError(f"Stage '{name}': generator stages cannot run in a worker process")
+
+    if "<locals>" in func.__qualname__ or "<lambda>" in func.__qualname__:
+        raise TypeError(
+            f"Stage '{name}': process stages must be module-level functions, got {func.__qualname__}"
+        )
+    try:
+        resolved = _resolve(func.__module__, func.__qualname__)
+    except (ImportError, AttributeError) as e:
+        raise TypeError(f"Stage '{name}': function is not importable by reference: {e}") from e
+    if resolved is not func:
+        raise TypeError(f"Stage '{name}': {func.__module__}.{func.__qualname__} does not refer to the stage function")
+
+    sig = inspect.signature(func)
+    annotations = [(p, param.annotation) for p, param in sig.parameters.items()]
+    annotations.append(("return", sig.return_annotation))
+    for label, annotation in annotations:
+        if not _annotation_picklable(annotation):
+            raise TypeError(f"Stage '{name}': {label} annotated as {annotation!r} cannot be sent to a worker process")
+
+def _annotation_picklable(annotation: Any) -> bool:
+    if annotation is inspect.Parameter.empty or isinstance(annotation, str):
+        return True
+    origin = typing.get_origin(annotation)
+    if origin is not None:
+        if isinstance(origin, type) and issubclass(origin, UNPICKLABLE_ORIGINS):
+            return False
+        return all(_annotation_picklable(arg) for arg in typing.get_args(annotation) if arg is not Ellipsis)
+    if isinstance(annotation, type):
+        return not issubclass(annotation, UNPICKLABLE_TYPES + UNPICKLABLE_ORIGINS)
+    return True
+
+def _resolve(module_name: str, qualname: str) -> Callable:
+    obj: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    # The @stage decorator rebinds the module attribute to the Stage wrapper
+    return getattr(obj, "func", obj)
+
+def _call_in_process(module_name: str, qualname: str, kwargs: Dict[str, Any], shm_threshold: int) -> Tuple[bytes, List[Tuple]]:
+    output = _resolve(module_name, qualname)(**kwargs)
+
+    buffers: List[pickle.PickleBuffer] = []
+    payload = pickle.dumps(output, protocol=5, buffer_callback=buffers.append)
+    segments = []
+    for buf in buffers:
+        raw = buf.raw()
+        if raw.nbytes >= shm_threshold:
+            shm = shared_memory.SharedMemory(create=True, size=raw.nbytes)
+            shm.buf[:raw.nbytes] = raw
+            segments.append(("shm", shm.name, raw.nbytes))
+            shm.close()
+        else:
+            segments.append(("inline", raw.tobytes()))
+    return payload, segments
+
+def _load_result(payload: bytes, segments: List[Tuple]) -> Any:
+    buffers = []
+    for segment in segments:
+        if segment[0] == "shm":
+            _, shm_name, size = segment
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                buffers.append(bytearray(shm.buf[:size]))
+            finally:
+                shm.close()
+                shm.unlink()
+        else:
+            buffers.append(segment[1])
+    return pickle.loads(payload, buffers=buffers)
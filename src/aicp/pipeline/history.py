@@ -0,0 +1,160 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import structlog
+from .artifacts import ArtifactRef
+from .models import PipelineRun, StageResult, StageStatus
+
+logger = structlog.get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    pipeline TEXT NOT NULL,
+    status TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT,
+    resumed_from TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_pipeline ON runs (pipeline, start_time);
+CREATE INDEX IF NOT EXISTS runs_by_status ON runs (status, start_time);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (start_time);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    stage_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT,
+    error TEXT,
+    metadata TEXT NOT NULL,
+    artifact TEXT,
+    output BLOB,
+    PRIMARY KEY (run_id, stage_id)
+);
+"""
+
+class RunHistory:
+    """SQLite index of pipeline runs and their stage results.
+
+    Run and stage metadata are queryable by pipeline, status and start
+    time. Small outputs are stored pickled in the index; outputs spilled
+    to an `ArtifactStore` are stored as their `ArtifactRef` only.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Writes come from `asyncio.to_thread`, so one connection is shared under a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(self, run: PipelineRun):
+        """Insert or update `run` and all of its stage results."""
+        rows = [self._stage_row(run.run_id, result) for result in run.results.values()]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                (run.run_id, run.pipeline_name, run.status.value, run.start_time.isoformat(),
+                 _iso(run.end_time), run.resumed_from)
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    @staticmethod
+    def _stage_row(run_id: str, result: StageResult) -> tuple:
+        artifact, output = None, None
+        if isinstance(result.output, ArtifactRef):
+            artifact = result.output.model_dump_json()
+        elif result.output is not None:
+            try:
+                output = pickle.dumps(result.output, protocol=5)
+            except Exception as e:
+                logger.warn("run_history_output_unpicklable", run_id=run_id, stage=result.stage_id, error=str(e))
+        return (
+            run_id, result.stage_id, result.status.value, result.start_time.isoformat(), _iso(result.end_time),
+            result.error, json.dumps(result.metadata, default=str), artifact, output
+        )
+
+    def list_runs(
+        self,
+        pipeline: Optional[str] = None,
+        status: Optional[StageStatus] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Newest runs first, without stage outputs."""
+        clauses, params = [], []
+        if pipeline is not None:
+            clauses.append("pipeline = ?")
+            params.append(pipeline)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(StageStatus(status).value)
+        if since is not None:
+            clauses.append("start_time >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            clauses.append("start_time < ?")
+            params.append(until.isoformat())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = (
+            "SELECT r.run_id, r.pipeline, r.status, r.start_time, r.end_time, r.resumed_from,"
+            " (SELECT COUNT(*) FROM stages s WHERE s.run_id = r.run_id) AS stages"
+            f" FROM runs r {where} ORDER BY r.start_time DESC LIMIT ?"
+        )
+        with self._lock:
+            cursor = self._conn.execute(query, (*params, limit))
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_run(self, run_id: str, outputs: bool = True) -> Optional[PipelineRun]:
+        """Rebuild a stored run, e.g. to pass as `resume_from`; spilled outputs come back as refs."""
+        with self._lock:
+            run_row = self._conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if run_row is None:
+                return None
+            stage_rows = self._conn.execute(
+                "SELECT * FROM stages WHERE run_id = ? ORDER BY start_time", (run_id,)
+            ).fetchall()
+
+        _, pipeline, status, start_time, end_time, resumed_from = run_row
+        run = PipelineRun(
+            run_id=run_id, pipeline_name=pipeline, status=StageStatus(status),
+            start_time=datetime.fromisoformat(start_time), end_time=_parse(end_time), resumed_from=resumed_from
+        )
+        for _, stage_id, stage_status, stage_start, stage_end, error, metadata, artifact, output in stage_rows:
+            value = None
+            if outputs and artifact is not None:
+                value = ArtifactRef.model_validate_json(artifact)
+            elif outputs and output is not None:
+                value = pickle.loads(output)
+            run.results[stage_id] = StageResult(
+                stage_id=stage_id, status=StageStatus(stage_status), output=value, error=error,
+                start_time=datetime.fromisoformat(stage_start), end_time=_parse(stage_end),
+                metadata=json.loads(metadata)
+            )
+        return run
+
+    def delete_run(self, run_id: str):
+        # Artifacts are content-addressed and may be shared, so their files are left in place
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
@@ -27,3 +27,4 @@ class PipelineRun(BaseModel):
     results: Dict[str, StageResult] = Field(default_factory=dict)
     start_time: datetime = Field(default_factory=datetime.now)
     end_time: Optional[datetime] = None
+    resumed_from: Optional[str] = None
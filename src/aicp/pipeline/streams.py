@@ -0,0 +1,154 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+class StreamFailedError(Exception):
+    """Raised to a stream's readers when the producing stage failed."""
+    pass
+
+_END = object()
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+class Stream:
+    """Items produced by a streaming stage, fanned out to one bounded queue per consumer.
+
+    `put` waits while any open reader's queue is full, so the slowest
+    consumer throttles the producer and each reader buffers at most
+    `maxsize` items. Readers must be registered before the first `put`;
+    closing a reader stops it from holding the producer back.
+    """
+
+    def __init__(self, name: str, maxsize: int = 64):
+        self.name = name
+        self.maxsize = maxsize
+        self.items = 0
+        self._readers: Dict[str, "StreamReader"] = {}
+
+    def reader(self, consumer: str, unbounded: bool = False) -> "StreamReader":
+        reader = self._readers.get(consumer)
+        if reader is None:
+            if self.items:
+                raise RuntimeError(f"Stream '{self.name}' already started; '{consumer}' would miss items")
+            reader = self._readers[consumer] = StreamReader(self, 0 if unbounded else self.maxsize)
+        return reader
+
+    def close_reader(self, consumer: str):
+        reader = self._readers.get(consumer)
+        if reader is not None:
+            reader.close()
+
+    async def put(self, item: Any):
+        for reader in self._readers.values():
+            if reader.closed:
+                continue
+            # Only suspend when a consumer is actually behind
+            if reader.queue.full():
+                await reader.queue.put(item)
+            else:
+                reader.queue.put_nowait(item)
+        self.items += 1
+
+    async def finish(self):
+        for reader in self._readers.values():
+            if not reader.closed:
+                await reader.queue.put(_END)
+
+    def fail(self, error: BaseException):
+        # Buffered items are dropped: the run is failing and readers should find out now
+        for reader in self._readers.values():
+            if not reader.closed:
+                reader.discard()
+                reader.queue.put_nowait(_Failure(error))
+
+class StreamReader:
+    """One consumer's async iterator over a `Stream`."""
+
+    def __init__(self, stream: Stream, maxsize: int):
+        self.stream = stream
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def __aiter__(self) -> "StreamReader":
+        return self
+
+    async def __anext__(self) -> Any:
+        if self.closed:
+            raise StopAsyncIteration
+        item = self.queue.get_nowait() if not self.queue.empty() else await self.queue.get()
+        if item is _END:
+            self.closed = True
+            raise StopAsyncIteration
+        if isinstance(item, _Failure):
+            self.closed = True
+            raise StreamFailedError(f"upstream stage '{self.stream.name}' failed: {item.error}") from item.error
+        return item
+
+    def discard(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def close(self):
+        self.closed = True
+        # Unblocks a producer waiting on this queue
+        self.discard()
+
+async def iterate(items: Union[StreamReader, Iterable[Any]]) -> AsyncIterator[Any]:
+    if isinstance(items, StreamReader):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+async def batched(items: AsyncIterator[Any], size: int) -> AsyncIterator[List[Any]]:
+    batch: List[Any] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def map_ordered(
+    items: AsyncIterator[Any],
+    call: Callable[[Any], Awaitable[Any]],
+    emit: Callable[[Any], Awaitable[None]],
+    concurrency: int = 1
+):
+    """Apply `call` to up to `concurrency` items at once, emitting results in input order.
+
+    A slot is only freed once its result was emitted, so in-flight and
+    finished-but-unemitted items together never exceed `concurrency`.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    pending: asyncio.Queue = asyncio.Queue()
+
+    async def feed():
+        try:
+            async for item in items:
+                await slots.acquire()
+                pending.put_nowait(asyncio.create_task(call(item)))
+        finally:
+            pending.put_nowait(None)
+
+    feeder = asyncio.create_task(feed())
+    task: Optional[asyncio.Task] = None
+    try:
+        while (task := await pending.get()) is not None:
+            await emit(await task)
+            slots.release()
+        await feeder
+    finally:
+        leftovers = [feeder] + ([task] if task is not None else [])
+        while not pending.empty():
+            leftover = pending.get_nowait()
+            if leftover is not None:
+                leftovers.append(leftover)
+        for leftover in leftovers:
+            leftover.cancel()
+        await asyncio.gather(*leftovers, return_exceptions=True)
@@ -0,0 +1,158 @@
+"""OpenAI-compatible HTTP front end for `LLMGateway`."""
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+import structlog
+from pydantic import ValidationError
+from .http import HTTPServer, Request, Response, StreamingResponse
+from ..gateway.gateway import LLMGateway
+from ..gateway.providers.base import CompletionChunk, CompletionRequest, CompletionResponse, Message
+from ..gateway.ratelimit import RateLimitExceededError
+from ..gateway.reliability import CircuitBreakerOpenError, DeadlineExceededError
+from ..observability.metrics import render_metrics
+
+logger = structlog.get_logger()
+
+# OpenAI request fields mapped onto `CompletionRequest`; everything else is forwarded in `extra_params`
+REQUEST_FIELDS = ("model", "messages", "temperature", "max_tokens", "stream", "stop", "user", "stream_options")
+
+class BadRequestError(Exception):
+    """Raised when a client request body cannot be translated."""
+    pass
+
+def error_response(message: str, status: int, kind: str) -> Response:
+    return Response.json({"error": {"message": message, "type": kind}}, status=status)
+
+def parse_request(body: Any) -> CompletionRequest:
+    if not isinstance(body, dict):
+        raise BadRequestError("Request body must be a JSON object")
+    messages = []
+    for message in body.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, list):
+            # Content parts: only text reaches providers
+            content = "".join(part.get("text", "") for part in content if part.get("type") == "text")
+        messages.append({"role": message.get("role"), "content": content or "", "name": message.get("name")})
+    if not messages:
+        raise BadRequestError("`messages` must be a non-empty list")
+    try:
+        return CompletionRequest(
+            model=body.get("model") or "",
+            messages=[Message(**m) for m in messages],
+            temperature=body.get("temperature", 0.7),
+            max_tokens=body.get("max_tokens"),
+            stream=bool(body.get("stream")),
+            stop=body.get("stop"),
+            tenant_id=body.get("user"),
+            extra_params={k: v for k, v in body.items() if k not in REQUEST_FIELDS}
+        )
+    except ValidationError as e:
+        raise BadRequestError(str(e)) from e
+
+def completion_body(response: CompletionResponse) -> Dict[str, Any]:
+    return {
+        "id": response.id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": response.model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": response.role.value, "content": response.content},
+            "finish_reason": response.finish_reason or "stop",
+        }],
+        "usage": response.usage.model_dump(),
+    }
+
+def chunk_event(chunk: CompletionChunk, created: int, first: bool = False) -> bytes:
+    delta: Dict[str, Any] = {"content": chunk.delta} if chunk.delta else {}
+    if first:
+        delta["role"] = chunk.role.value
+    payload: Dict[str, Any] = {
+        "id": chunk.id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": chunk.model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": chunk.finish_reason}],
+    }
+    if chunk.usage is not None:
+        payload["usage"] = chunk.usage.model_dump()
+    return b"data: " + json.dumps(payload, separators=(",", ":")).encode("utf-8") + b"\n\n"
+
+class GatewayServer(HTTPServer):
+    """Serves `/v1/chat/completions` (JSON and SSE), `/v1/models`, `/health` and `/metrics`.
+
+    While draining, `/health` answers 503 so load balancers stop routing
+    new traffic here before in-flight requests finish.
+    """
+
+    def __init__(self, gateway: LLMGateway, host: str = "127.0.0.1", port: int = 0, sock=None):
+        super().__init__(self.handle, host=host, port=port, sock=sock)
+        self.gateway = gateway
+
+    async def handle(self, request: Request):
+        if request.path == "/v1/chat/completions":
+            if request.method != "POST":
+                return error_response("Method not allowed", 405, "invalid_request_error")
+            return await self.chat_completions(request)
+        if request.method == "GET" and request.path == "/v1/models":
+            models = [{"id": p.provider_name, "object": "model", "owned_by": "aicp"} for p in self.gateway.reliability.providers]
+            return Response.json({"object": "list", "data": models})
+        if request.method == "GET" and request.path == "/health":
+            if self.draining:
+                return Response.json({"status": "draining"}, status=503)
+            return Response.json({"status": "ok"})
+        if request.method == "GET" and request.path == "/metrics":
+            body, content_type = render_metrics()
+            return Response(200, body, content_type=content_type)
+        return error_response("Not found", 404, "invalid_request_error")
+
+    async def chat_completions(self, request: Request):
+        try:
+            completion_request = parse_request(request.json())
+            # Optional per-request time budget in seconds
+            timeout = request.headers.get("x-request-timeout")
+            timeout = float(timeout) if timeout is not None else None
+        except (BadRequestError, ValueError, AttributeError, TypeError) as e:
+            return error_response(str(e), 400, "invalid_request_error")
+
+        try:
+            if completion_request.stream:
+                return await self._stream(completion_request, timeout)
+            response = await self.gateway.complete(completion_request, timeout=timeout)
+        except Exception as e:
+            return self._error(e)
+        return Response.json(completion_body(response))
+
+    async def _stream(self, request: CompletionRequest, timeout: Optional[float]) -> StreamingResponse:
+        chunks = self.gateway.stream(request, timeout=timeout).__aiter__()
+        # Pull the first chunk before sending headers so early failures get a real status code
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            return StreamingResponse(self._done())
+        return StreamingResponse(self._events(first, chunks), headers={"Cache-Control": "no-cache"})
+
+    async def _events(self, first: CompletionChunk, chunks: AsyncIterator[CompletionChunk]) -> AsyncIterator[bytes]:
+        created = int(time.time())
+        yield chunk_event(first, created, first=True)
+        try:
+            async for chunk in chunks:
+                yield chunk_event(chunk, created)
+        except Exception as e:
+            # Headers are already sent; report the failure in-band like OpenAI does
+            logger.error("stream_failed", error=str(e))
+            yield b"data: " + json.dumps({"error": {"message": str(e), "type": "server_error"}}).encode("utf-8") + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+    async def _done(self) -> AsyncIterator[bytes]:
+        yield b"data: [DONE]\n\n"
+
+    def _error(self, error: Exception) -> Response:
+        if isinstance(error, RateLimitExceededError):
+            return error_response(str(error), 429, "rate_limit_error")
+        if isinstance(error, DeadlineExceededError):
+            return error_response(str(error), 504, "timeout_error")
+        if isinstance(error, CircuitBreakerOpenError):
+            return error_response(str(error), 503, "service_unavailable")
+        logger.error("gateway_request_failed", error=str(error))
+        return error_response(str(error) or type(error).__name__, 502, "upstream_error")
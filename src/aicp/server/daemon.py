@@ -0,0 +1,92 @@
+"""Long-lived local gateway for `aicp chat`.
+
+`GatewayDaemon` builds its gateways once and answers chat requests from
+`daemon_client.request` over a Unix socket, so repeated CLI calls skip
+importing and constructing providers and middlewares. Gateways are built
+by `factory(redact)` and kept warm per `redact` setting.
+"""
+import asyncio
+import json
+import os
+import signal
+from typing import Any, Callable, Dict, Optional
+import structlog
+from ..gateway.gateway import LLMGateway
+from ..gateway.providers.base import CompletionRequest, Message, Role
+
+logger = structlog.get_logger()
+
+class GatewayDaemon:
+    def __init__(self, path: str, factory: Callable[[bool], LLMGateway], model: str = "gpt-4"):
+        self.path = path
+        self.factory = factory
+        self.model = model
+        self.requests_served = 0
+        self._gateways: Dict[bool, LLMGateway] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def gateway(self, redact: bool = True) -> LLMGateway:
+        if redact not in self._gateways:
+            self._gateways[redact] = self.factory(redact)
+        return self._gateways[redact]
+
+    async def start(self) -> "GatewayDaemon":
+        # Warm the default gateway before accepting the first call
+        self.gateway(True)
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+        os.chmod(self.path, 0o600)
+        logger.info("daemon_started", path=self.path, pid=os.getpid())
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            for gateway in self._gateways.values():
+                gateway.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            logger.info("daemon_stopped", path=self.path, requests=self.requests_served)
+
+    async def serve_until_signalled(self):
+        """Serve until SIGTERM/SIGINT, then remove the socket."""
+        await self.start()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            await stop.wait()
+        finally:
+            await self.close()
+
+    async def complete(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        request = CompletionRequest(
+            model=payload.get("model") or self.model,
+            messages=[Message(role=Role.USER, content=payload["message"])]
+        )
+        try:
+            response = await self.gateway(bool(payload.get("redact", True))).complete(request)
+        except Exception as e:
+            return {"error": str(e)}
+        return {"content": response.content, "total_tokens": response.usage.total_tokens}
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    reply = await self.complete(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"error": f"Bad request: {e}"}
+                self.requests_served += 1
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,29 @@
+"""Client side of the `aicp daemon` protocol.
+
+Imported by `aicp chat` on every call, so it uses nothing beyond the
+standard library: one JSON request line per call, one JSON reply line back.
+"""
+import json
+import socket
+from typing import Any, Dict
+
+class DaemonError(Exception):
+    """Raised when the daemon closes the connection without replying."""
+    pass
+
+def request(path: str, payload: Dict[str, Any], timeout: float = 60.0) -> Dict[str, Any]:
+    """Send `payload` to the daemon listening on `path`.
+
+    Raises `FileNotFoundError` or `ConnectionRefusedError` if nothing is
+    listening; other errors, including timeouts, may come after the request
+    was sent.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise DaemonError(f"Daemon at {path} closed the connection")
+    return json.loads(line)
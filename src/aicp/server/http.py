@@ -0,0 +1,174 @@
+import asyncio
+import json
+import socket
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Union
+import structlog
+
+logger = structlog.get_logger()
+
+MAX_HEADER_BYTES = 64 * 1024
+
+class Request:
+    def __init__(self, method: str, path: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body or b"null")
+
+class Response:
+    def __init__(self, status: int = 200, body: bytes = b"", content_type: str = "application/json", headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+
+    @classmethod
+    def json(cls, payload: Any, status: int = 200) -> "Response":
+        return cls(status, json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+class StreamingResponse:
+    """Response body produced incrementally and sent with chunked transfer encoding."""
+
+    def __init__(self, chunks: AsyncIterator[bytes], status: int = 200, content_type: str = "text/event-stream", headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.chunks = chunks
+        self.content_type = content_type
+        self.headers = headers or {}
+
+Handler = Callable[[Request], Awaitable[Union[Response, StreamingResponse]]]
+
+class HTTPServer:
+    """Minimal asyncio HTTP/1.1 server with keep-alive and chunked streaming.
+
+    Just enough protocol for the gateway's JSON/SSE APIs and local test
+    servers, without pulling in a web framework. `shutdown()` stops
+    accepting connections, closes idle keep-alive connections and waits
+    for in-flight requests to finish.
+    """
+
+    def __init__(self, handler: Handler, host: str = "127.0.0.1", port: int = 0, sock: Optional[socket.socket] = None):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.sock = sock
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._busy: Set[asyncio.StreamWriter] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._draining = False
+        self.connections_opened = 0
+        self.requests_served = 0
+
+    async def start(self) -> "HTTPServer":
+        if self.sock is not None:
+            self._server = await asyncio.start_server(self._serve_connection, sock=self.sock)
+        else:
+            self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    @property
+    def draining(self) -> bool:
+        return self._draining
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def shutdown(self, timeout: float = 30.0):
+        self._draining = True
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._connections - self._busy):
+            writer.close()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warn("http_drain_timeout", in_flight=len(self._busy))
+        for writer in list(self._connections):
+            writer.close()
+
+    async def __aenter__(self) -> "HTTPServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.shutdown(timeout=5.0)
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections_opened += 1
+        self._connections.add(writer)
+        try:
+            while not self._draining:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                self._busy.add(writer)
+                self._idle.clear()
+                try:
+                    keep_alive = request.headers.get("connection", "").lower() != "close"
+                    try:
+                        response = await self.handler(request)
+                    except Exception as e:
+                        logger.error("http_handler_failed", path=request.path, error=str(e))
+                        response = Response.json({"error": {"message": str(e), "type": "server_error"}}, status=500)
+                    keep_alive = keep_alive and not self._draining
+                    await self._write_response(writer, response, keep_alive)
+                    self.requests_served += 1
+                finally:
+                    self._busy.discard(writer)
+                    if not self._busy:
+                        self._idle.set()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        if len(head) > MAX_HEADER_BYTES:
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0"))
+        body = await reader.readexactly(length) if length else b""
+        return Request(method, target.split("?", 1)[0], headers, body)
+
+    async def _write_response(self, writer: asyncio.StreamWriter, response: Union[Response, StreamingResponse], keep_alive: bool):
+        status = HTTPStatus(response.status)
+        head = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {response.content_type}"]
+        head.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        head.extend(f"{k}: {v}" for k, v in response.headers.items())
+
+        if isinstance(response, StreamingResponse):
+            head.append("Transfer-Encoding: chunked")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+            async for chunk in response.chunks:
+                if chunk:
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    await writer.drain()
+            writer.write(b"0\r\n\r\n")
+        else:
+            head.append(f"Content-Length: {len(response.body)}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+        await writer.drain()
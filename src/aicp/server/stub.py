@@ -0,0 +1,124 @@
+"""Local OpenAI-compatible stand-in server for tests and benchmarks.
+
+Run standalone with `python -m aicp.server.stub --port 8900 --latency 0.05`.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import AsyncIterator, Optional
+from .http import HTTPServer, Request, Response, StreamingResponse
+
+class OpenAIStubServer(HTTPServer):
+    """Serves `/v1/chat/completions` with configurable latency and error injection."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        response_content: str = "This is a stub response.",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        chunk_size: int = 4,
+        chunk_delay: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        super().__init__(self.handle, host=host, port=port)
+        self.response_content = response_content
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.rng = random.Random(seed)
+        self.completions = 0
+        self.errors = 0
+
+    async def handle(self, request: Request):
+        if request.method == "GET" and request.path == "/v1/models":
+            return Response.json({"object": "list", "data": [{"id": "stub-model", "object": "model"}]})
+        if request.method != "POST" or request.path != "/v1/chat/completions":
+            return Response.json({"error": {"message": "not found"}}, status=404)
+
+        body = request.json()
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            return Response.json({"error": {"message": "injected failure", "type": "server_error"}}, status=self.error_status)
+
+        self.completions += 1
+        model = body.get("model", "stub-model")
+        prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(self.response_content) // 4,
+            "total_tokens": (prompt_chars + len(self.response_content)) // 4,
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if body.get("stream"):
+            return StreamingResponse(self._stream(completion_id, model, usage))
+
+        return Response.json({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.response_content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    async def _stream(self, completion_id: str, model: str, usage: dict) -> AsyncIterator[bytes]:
+        def event(delta: dict, finish_reason=None, usage=None) -> bytes:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage is not None:
+                payload["usage"] = usage
+            return b"data: " + json.dumps(payload, separators=(",", ":")).encode("utf-8") + b"\n\n"
+
+        yield event({"role": "assistant"})
+        content = self.response_content
+        for start in range(0, len(content), max(1, self.chunk_size)):
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield event({"content": content[start:start + self.chunk_size]})
+        yield event({}, finish_reason="stop", usage=usage)
+        yield b"data: [DONE]\n\n"
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    async def _serve():
+        server = OpenAIStubServer(
+            host=args.host, port=args.port, latency=args.latency,
+            jitter=args.jitter, error_rate=args.error_rate
+        )
+        await server.start()
+        print(f"Serving OpenAI-compatible stub on {server.base_url}/v1")
+        await server.serve_forever()
+
+    asyncio.run(_serve())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Pre-forked worker processes serving `GatewayServer` from one listening socket.
+
+The supervisor binds the socket, forks `workers` children that each run
+their own event loop and gateway, and restarts children that die. On
+SIGTERM or SIGINT it forwards SIGTERM to every child; children stop
+accepting, finish in-flight requests within `drain_timeout` and exit.
+Children still running after the grace period are killed.
+
+Children that die within `min_uptime` of starting are restarted after an
+exponential backoff; after `max_rapid_exits` such exits in a row the
+supervisor stops the remaining workers and exits with status 1.
+
+Each worker keeps its own Prometheus registry, so `/metrics` reports the
+worker that happened to answer the scrape.
+"""
+import asyncio
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, List, Optional
+import structlog
+from .api import GatewayServer
+from ..config import build_gateway
+from ..gateway.providers.openai import close_shared_clients
+
+logger = structlog.get_logger()
+
+def bind_socket(host: str, port: int, backlog: int = 1024) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+async def serve_worker(config: Dict[str, Any], sock: socket.socket, drain_timeout: float = 30.0):
+    """Serve on `sock` until SIGTERM/SIGINT, then drain and return."""
+    server = GatewayServer(build_gateway(config), sock=sock)
+    await server.start()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    logger.info("worker_started", pid=os.getpid())
+    await stop.wait()
+
+    logger.info("worker_draining", pid=os.getpid())
+    await server.shutdown(timeout=drain_timeout)
+    await close_shared_clients()
+    # Workers leave through os._exit, which skips atexit hooks
+    server.gateway.close()
+    logger.info("worker_stopped", pid=os.getpid(), requests=server.requests_served)
+
+class Supervisor:
+    """Forks and supervises the worker processes of `aicp serve`."""
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        sock: socket.socket,
+        workers: int = 1,
+        drain_timeout: float = 30.0,
+        restart_delay: float = 0.1,
+        max_restart_delay: float = 10.0,
+        min_uptime: float = 5.0,
+        max_rapid_exits: int = 10
+    ):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.drain_timeout = drain_timeout
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.min_uptime = min_uptime
+        self.max_rapid_exits = max_rapid_exits
+        # pid -> monotonic start time
+        self.children: Dict[int, float] = {}
+        # Monotonic times at which to fork replacements for exited children
+        self.restarts: List[float] = []
+        self.rapid_exits = 0
+        self.exit_code = 0
+        self.stopping = False
+        self.stop_deadline = 0.0
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                asyncio.run(serve_worker(self.config, self.sock, self.drain_timeout))
+            except Exception as e:
+                logger.error("worker_failed", pid=os.getpid(), error=str(e))
+                code = 1
+            finally:
+                # Never fall back into the supervisor's code path
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        return pid
+
+    def stop(self, *_):
+        if self.stopping:
+            return
+        self.stopping = True
+        self.stop_deadline = time.monotonic() + self.drain_timeout + 5.0
+        for pid in self.children:
+            self._signal(pid, signal.SIGTERM)
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children or (self.restarts and not self.stopping):
+            while self.restarts and not self.stopping and self.restarts[0] <= time.monotonic():
+                self.restarts.pop(0)
+                self.spawn()
+            pid, status = os.waitpid(-1, os.WNOHANG) if self.children else (0, 0)
+            if pid == 0:
+                if self.stopping and time.monotonic() > self.stop_deadline:
+                    logger.warn("workers_killed", pids=sorted(self.children))
+                    for child in self.children:
+                        self._signal(child, signal.SIGKILL)
+                time.sleep(0.05)
+                continue
+            started = self.children.pop(pid, None)
+            if not self.stopping:
+                self._schedule_restart(pid, status, started)
+        self.sock.close()
+        return self.exit_code
+
+    def _schedule_restart(self, pid: int, status: int, started: Optional[float]):
+        if started is not None and time.monotonic() - started >= self.min_uptime:
+            self.rapid_exits = 0
+        else:
+            self.rapid_exits += 1
+        if self.rapid_exits >= self.max_rapid_exits:
+            # Workers die as fast as they are forked; restarting them only burns CPU
+            logger.error("workers_crash_looping", pid=pid, status=status, exits=self.rapid_exits)
+            self.exit_code = 1
+            self.stop()
+            return
+        delay = min(self.max_restart_delay, self.restart_delay * 2 ** (self.rapid_exits - 1)) if self.rapid_exits else 0.0
+        logger.warn("worker_exited", pid=pid, status=status, restart_in=delay)
+        self.restarts.append(time.monotonic() + delay)
+        self.restarts.sort()
+
+    @staticmethod
+    def _signal(pid: int, sig: int):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+def serve(config: Dict[str, Any], host: Optional[str] = None, port: Optional[int] = None, workers: Optional[int] = None) -> int:
+    """Run the gateway server described by `config`; returns the exit code.
+
+    `host`, `port` and `workers` override the config's `server` section.
+    With a single worker the server runs in this process, without forking.
+    """
+    options = config["server"]
+    host = host or options["host"]
+    port = options["port"] if port is None else port
+    workers = workers or options["workers"]
+    drain_timeout = float(options["drain_timeout"])
+    # Surface configuration errors once, here, rather than in a crash-looping worker. The
+    # gateway is closed before forking so no middleware thread or state handle leaks into children.
+    build_gateway(config).close()
+    sock = bind_socket(host, port, options.get("backlog", 1024))
+    print(f"Serving OpenAI-compatible gateway on http://{host}:{sock.getsockname()[1]}/v1 ({workers} workers)", flush=True)
+
+    if workers <= 1:
+        asyncio.run(serve_worker(config, sock, drain_timeout))
+        sock.close()
+        return 0
+    return Supervisor(config, sock, workers, drain_timeout).run()
@@ -0,0 +1,116 @@
+import os
+import pytest
+from aicp.config import ConfigError, build_gateway, load_config
+from aicp.gateway.audit import AuditLog, AuditReader, AuditWriter
+from aicp.gateway.cache import ResponseCache
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.middleware import PIIRedactor
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+from aicp.gateway.providers.mock import MockProvider
+
+def ask(content, stream=False):
+    return CompletionRequest(model="m", messages=[Message(role=Role.USER, content=content)], temperature=0.0, stream=stream)
+
+@pytest.mark.asyncio
+async def test_gateway_exchanges_are_recorded_after_redaction(tmp_path):
+    audit = AuditLog(str(tmp_path / "audit"), writer_id="w")
+    gateway = LLMGateway(
+        [MockProvider(name="primary", response_content="Reach me at bob@example.com")],
+        middlewares=[audit, PIIRedactor()],
+        cache=ResponseCache()
+    )
+    response = await gateway.complete(ask("I am alice@example.com"))
+    await gateway.complete(ask("I am alice@example.com"))
+    streamed = [c async for c in gateway.stream(ask("Stream to carol@example.com", stream=True))]
+    gateway.close()
+
+    reader = AuditReader(str(tmp_path / "audit"))
+    records = list(reader)
+    assert len(records) == 3
+    first = records[0]
+    assert first["request_id"] == response.id
+    assert first["request"]["messages"] == [{"role": "user", "content": "I am [EMAIL_REDACTED]"}]
+    assert first["response"]["content"] == "Reach me at [EMAIL_REDACTED]"
+    assert first["usage"]["total_tokens"] == response.usage.total_tokens
+    assert first["provider"] == "primary"
+    # The second call was a cache hit and repeats the response id
+    assert records[1]["provider_metadata"]["cache_hit"] is True
+    assert [r["ts"] for r in reader.lookup(response.id)] == [first["ts"], records[1]["ts"]]
+
+    assert records[2]["stream"] is True
+    assert records[2]["request"]["messages"][0]["content"] == "Stream to [EMAIL_REDACTED]"
+    assert records[2]["response"]["content"] == "".join(c.delta for c in streamed)
+    assert records[2]["provider"] == "primary"
+    assert reader.lookup("missing") == []
+
+@pytest.mark.parametrize("compression", ["zlib", "none"])
+def test_segments_rotate_and_replay_in_order(tmp_path, compression):
+    root = str(tmp_path / "audit")
+    writer = AuditWriter(root, writer_id="w", compression=compression, max_segment_bytes=400, batch_size=4, fsync="always")
+    for i in range(40):
+        writer.append({"ts": 1000.0 + i, "request_id": f"r{i}", "body": "x" * 20})
+        if i % 4 == 3:
+            writer.flush()
+    writer.close()
+
+    reader = AuditReader(root)
+    segments = reader.segments()
+    assert len(segments) > 1 and all(s["sealed"] and s["codec"] == compression for s in segments)
+    assert sum(s["records"] for s in segments) == 40
+    assert [r["request_id"] for r in reader] == [f"r{i}" for i in range(40)]
+    assert [r["request_id"] for r in reader.records(since=1010.0, until=1013.0)] == ["r10", "r11", "r12"]
+    assert reader.lookup("r37")[0]["ts"] == 1037.0
+
+    # A later writer with the same id continues the sequence instead of reopening segments
+    again = AuditWriter(root, writer_id="w")
+    again.append({"ts": 2000.0, "request_id": "late"})
+    again.close()
+    assert [r["request_id"] for r in AuditReader(root)][-1] == "late"
+    assert len(AuditReader(root).segments()) == len(segments) + 1
+
+def test_torn_tail_block_is_skipped(tmp_path):
+    root = str(tmp_path / "audit")
+    writer = AuditWriter(root, writer_id="w")
+    writer.append({"ts": 1.0, "request_id": "kept"})
+    writer.flush()
+    segment = os.path.join(root, AuditReader(root).segments()[0]["name"])
+    with open(segment, "ab") as f:
+        # A block header promising more bytes than were written before a crash
+        f.write(b"\xff\x00\x00\x00garbage")
+
+    assert [r["request_id"] for r in AuditReader(root)] == ["kept"]
+    writer.close()
+
+def test_closed_or_full_writer_drops(tmp_path):
+    writer = AuditWriter(str(tmp_path / "audit"), max_buffer=2, flush_interval=60)
+    for i in range(3):
+        writer.append({"ts": float(i)})
+    writer.close()
+    writer.append({"ts": 9.0})
+    assert (writer.written, writer.dropped) == (2, 2)
+
+def test_writer_starts_on_first_record(tmp_path):
+    root = tmp_path / "audit"
+    writer = AuditWriter(str(root))
+    assert writer._thread is None and not root.exists()
+    writer.append({"ts": 1.0})
+    assert writer._thread.is_alive()
+    writer.close()
+    assert not writer._thread.is_alive()
+
+    unused = AuditWriter(str(tmp_path / "unused"))
+    unused.close()
+    unused.append({"ts": 2.0})
+    assert unused._thread is None and unused.dropped == 1
+    assert not (tmp_path / "unused").exists()
+
+def test_audit_log_from_config(tmp_path):
+    config = load_config()
+    config["middlewares"] = [{"type": "audit_log", "path": str(tmp_path / "audit")}, {"type": "pii_redactor"}]
+    gateway = build_gateway(config)
+    assert isinstance(gateway.pipeline.middlewares[0], AuditLog)
+    gateway.close()
+
+    config["middlewares"] = [{"type": "audit_log", "path": str(tmp_path / "audit"), "fsync": "sometimes"}]
+    with pytest.raises(ConfigError, match="fsync"):
+        build_gateway(config)
@@ -0,0 +1,40 @@
+import json
+import pytest
+from aicp.bench import RequestMix, build_gateway, run_benchmark
+from aicp.gateway.providers.mock import MockProvider, MockProviderError
+
+@pytest.mark.asyncio
+async def test_benchmark_reports_latency_and_layers():
+    gateway = build_gateway(latency=0.002, seed=1)
+    mix = RequestMix(prompt_chars=128, pii_ratio=0.5, seed=1)
+
+    report = await run_benchmark(gateway, mix, concurrency=4, duration=5.0, max_requests=40)
+
+    assert report["requests"] == 40
+    assert report["completed"] == 40
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"] <= report["latency_ms"]["max"]
+    assert report["layers_ms"]["provider"] >= 2.0
+    assert report["config"]["middlewares"] == ["PromptGuard", "PIIRedactor"]
+    json.dumps(report)
+
+@pytest.mark.asyncio
+async def test_benchmark_counts_injected_failures():
+    gateway = build_gateway(failure_rate=1.0, seed=2)
+
+    report = await run_benchmark(gateway, concurrency=2, duration=5.0, max_requests=10)
+
+    assert report["completed"] == 0
+    assert sum(report["errors"].values()) == 10
+
+@pytest.mark.asyncio
+async def test_mock_provider_latency_distributions_are_seeded():
+    a = MockProvider(latency=0.05, latency_distribution="lognormal", seed=7)
+    b = MockProvider(latency=0.05, latency_distribution="lognormal", seed=7)
+    assert [a.sample_latency() for _ in range(5)] == [b.sample_latency() for _ in range(5)]
+
+    with pytest.raises(ValueError):
+        MockProvider(latency_distribution="pareto")
+
+    failing = MockProvider(timeout_rate=1.0, hang_seconds=0.0)
+    with pytest.raises(MockProviderError):
+        await failing._simulate_upstream()
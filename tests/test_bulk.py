@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.middleware import Middleware
+from aicp.gateway.providers.base import CompletionRequest, CompletionResponse, Message, Role
+from aicp.gateway.providers.mock import MockProvider
+from aicp.gateway.reliability import DeadlineExceededError
+
+class TrackingProvider(MockProvider):
+    max_batch_size = 8
+
+    def __init__(self, name="tracking", delay=0.01):
+        super().__init__(name=name)
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.batches = []
+
+    async def complete(self, request):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            response = await super().complete(request)
+            return response.model_copy(update={"content": request.messages[0].content})
+        finally:
+            self.active -= 1
+
+    async def complete_batch(self, requests):
+        self.batches.append(len(requests))
+        return [await MockProvider.complete(self, r) for r in requests]
+
+class RejectBadPrompts(Middleware):
+    async def pre_process(self, request):
+        if request.messages[0].content == "bad":
+            raise ValueError("rejected")
+        return request
+
+def make_requests(*prompts):
+    return [CompletionRequest(model="m", messages=[Message(role=Role.USER, content=p)]) for p in prompts]
+
+@pytest.mark.asyncio
+async def test_complete_many_preserves_order_and_isolates_failures():
+    gateway = LLMGateway([TrackingProvider()], middlewares=[RejectBadPrompts()])
+    results = await gateway.complete_many(make_requests("a", "bad", "c"))
+
+    assert results[0].content == "a"
+    assert isinstance(results[1], ValueError)
+    assert results[2].content == "c"
+
+@pytest.mark.asyncio
+async def test_bounded_global_and_provider_concurrency():
+    provider = TrackingProvider()
+    gateway = LLMGateway([provider], provider_concurrency=3)
+    await gateway.complete_many(make_requests(*map(str, range(20))), max_concurrency=10)
+    assert provider.peak == 3
+
+    provider = TrackingProvider()
+    gateway = LLMGateway([provider])
+    await gateway.complete_many(make_requests(*map(str, range(20))), max_concurrency=4)
+    assert provider.peak == 4
+
+@pytest.mark.asyncio
+async def test_complete_iter_yields_as_completed():
+    gateway = LLMGateway([TrackingProvider()])
+    seen = [index async for index, _ in gateway.complete_iter(make_requests(*map(str, range(6))), max_concurrency=2)]
+    assert sorted(seen) == list(range(6))
+
+@pytest.mark.asyncio
+async def test_micro_batches_use_provider_batch_hook():
+    provider = TrackingProvider()
+    gateway = LLMGateway([provider])
+    results = await gateway.complete_many(make_requests(*map(str, range(10))), max_concurrency=2, batch_size=4)
+
+    assert sorted(provider.batches) == [2, 4, 4]
+    assert all(isinstance(r, CompletionResponse) for r in results)
+
+@pytest.mark.asyncio
+async def test_expired_batch_deadline_is_not_a_provider_failure():
+    provider = TrackingProvider()
+    provider.complete_batch = lambda requests: asyncio.sleep(1)
+    gateway = LLMGateway([provider])
+    deadline = asyncio.get_running_loop().time() + 0.05
+
+    results = await gateway.reliability.execute_batch(make_requests("a", "b"), deadline)
+
+    assert all(isinstance(r, DeadlineExceededError) for r in results)
+    assert gateway.reliability.breakers["tracking"].failures == 0
@@ -0,0 +1,84 @@
+import pytest
+from aicp.gateway.cache import ResponseCache, request_key
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.providers.base import LLMProvider, CompletionRequest, CompletionResponse, Message, Role, Usage
+
+class CountingProvider(LLMProvider):
+    def __init__(self, name="counting"):
+        self.name = name
+        self.calls = 0
+
+    @property
+    def provider_name(self):
+        return self.name
+
+    async def complete(self, request):
+        self.calls += 1
+        return CompletionResponse(
+            id=f"resp-{self.calls}", model=request.model, content="cached?",
+            usage=Usage(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+        )
+
+def make_request(content="hi", temperature=0.0):
+    return CompletionRequest(
+        model="test", temperature=temperature,
+        messages=[Message(role=Role.USER, content=content)]
+    )
+
+def make_response(id="r", content="x"):
+    return CompletionResponse(
+        id=id, model="test", content=content,
+        usage=Usage(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+    )
+
+def test_request_key_is_canonical():
+    a = make_request().model_copy(update={"extra_params": {"a": 1, "b": 2}})
+    b = make_request().model_copy(update={"extra_params": {"b": 2, "a": 1}})
+    assert request_key(a) == request_key(b)
+    assert request_key(a) != request_key(make_request("other"))
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", make_response("a"))
+    cache.set("b", make_response("b"))
+    assert cache.get("a") is not None
+    cache.set("c", make_response("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.evictions == 1
+
+def test_ttl_and_byte_bounds():
+    cache = ResponseCache(ttl=-1)
+    cache.set("a", make_response())
+    assert cache.get("a") is None
+
+    big = make_response(content="x" * 1000)
+    cache = ResponseCache(max_bytes=1500)
+    cache.set("a", big)
+    cache.set("b", big)
+    assert len(cache) == 1
+    assert cache.current_bytes <= 1500
+
+def test_disk_tier(tmp_path):
+    ResponseCache(disk_path=str(tmp_path)).set("k", make_response("disk"))
+    cache = ResponseCache(disk_path=str(tmp_path))
+    assert cache.get("k").id == "disk"
+    assert cache.stats()["disk_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_gateway_serves_repeated_requests_from_cache():
+    provider = CountingProvider()
+    cache = ResponseCache()
+    gateway = LLMGateway([provider], cache=cache)
+
+    first = await gateway.complete(make_request())
+    second = await gateway.complete(make_request())
+    assert provider.calls == 1
+    assert second.id == first.id
+    assert second.provider_metadata["cache_hit"] is True
+
+    # Sampled requests opt out of caching by default
+    await gateway.complete(make_request(temperature=0.7))
+    await gateway.complete(make_request(temperature=0.7))
+    assert provider.calls == 3
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import pytest
+from aicp.pipeline.checkpoint import CheckpointStore
+from aicp.pipeline.engine import Pipeline, stage
+from aicp.pipeline.models import StageStatus
+
+def build(store, calls, fail_score=False):
+    p = Pipeline("memo", checkpoints=store)
+
+    @stage(name="generate")
+    def generate(prompt: str):
+        calls.append("generate")
+        return prompt.upper()
+
+    @stage(name="score", depends_on=["generate"])
+    def score(generate: str):
+        calls.append("score")
+        if fail_score:
+            raise ValueError("scorer crashed")
+        return len(generate)
+
+    p.add_stage(generate)
+    p.add_stage(score)
+    return p
+
+@pytest.mark.asyncio
+async def test_unchanged_stages_are_loaded_from_store(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    calls = []
+
+    first = await build(store, calls).run({"prompt": "hello"})
+    second = await build(store, calls).run({"prompt": "hello"})
+
+    assert calls == ["generate", "score"]
+    assert second.results["score"].output == 5
+    assert first.results["generate"].metadata["cache_hit"] is False
+    assert second.results["generate"].metadata["cache_hit"] is True
+
+    await build(store, calls).run({"prompt": "changed"})
+    assert calls[2:] == ["generate", "score"]
+
+@pytest.mark.asyncio
+async def test_resume_failed_run(tmp_path):
+    calls = []
+    failed = await build(None, calls, fail_score=True).run({"prompt": "hello"})
+    assert failed.status == StageStatus.FAILED
+
+    resumed = await build(None, calls).run({"prompt": "hello"}, resume_from=failed)
+
+    assert calls == ["generate", "score", "score"]
+    assert resumed.status == StageStatus.COMPLETED
+    assert resumed.resumed_from == failed.run_id
+    assert resumed.results["generate"].metadata["resumed_from"] == failed.run_id
+    assert resumed.results["score"].output == 5
+
+def test_input_key_is_stable_across_hash_seeds(tmp_path):
+    script = (
+        "from aicp.pipeline.checkpoint import CheckpointStore;"
+        f"print(CheckpointStore({str(tmp_path)!r}).key('f', {{'tags': {{'alpha', 'beta', 'gamma', 'delta'}}, 'n': 1}}))"
+    )
+    keys = {
+        subprocess.run(
+            [sys.executable, "-c", script], env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True, text=True, check=True,
+        ).stdout
+        for seed in ("1", "2", "3")
+    }
+    assert len(keys) == 1
+
+    store = CheckpointStore(str(tmp_path))
+    assert store.key("f", {"a": {"x": 1, "y": 2}, "b": 1}) == store.key("f", {"b": 1, "a": {"y": 2, "x": 1}})
+    assert store.key("f", {"a": [1, 2]}) != store.key("f", {"a": (1, 2)})
@@ -0,0 +1,82 @@
+import asyncio
+import socket
+import subprocess
+import sys
+import threading
+import pytest
+from typer.testing import CliRunner
+from aicp.cli import app, chat_gateway
+from aicp.server.daemon import GatewayDaemon
+from aicp.server.daemon_client import request
+
+def test_cli_import_is_lazy():
+    heavy = ["aicp.gateway.gateway", "aicp.pipeline.engine", "prometheus_client", "structlog", "rich.console", "asyncio"]
+    code = f"import sys, aicp.cli; print([m for m in {heavy!r} if m in sys.modules])"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+@pytest.fixture
+def daemon(tmp_path):
+    path = str(tmp_path / "gateway.sock")
+    loop = asyncio.new_event_loop()
+    server = GatewayDaemon(path, chat_gateway)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.run_until_complete(server.close())
+    loop.close()
+
+def test_chat_reuses_warm_daemon_gateway(daemon):
+    runner = CliRunner()
+    warm = daemon.gateway(True)
+    for _ in range(2):
+        result = runner.invoke(app, ["chat", "hi", "--daemon", daemon.path])
+        assert result.exit_code == 0
+        assert "Response: Hello! My email is [EMAIL_REDACTED]" in result.output
+
+    unredacted = runner.invoke(app, ["chat", "hi", "--no-redact"], env={"AICP_DAEMON": daemon.path})
+    assert "test@example.com" in unredacted.output
+    assert daemon.requests_served == 3
+    assert daemon.gateway(True) is warm
+
+    assert "Bad request" in request(daemon.path, {"text": "no message"})["error"]
+
+def test_chat_falls_back_in_process_without_daemon(tmp_path):
+    result = CliRunner().invoke(app, ["chat", "hi", "--daemon", str(tmp_path / "missing.sock")])
+    assert result.exit_code == 0
+    assert "running in-process" in result.output
+    assert "Response: Hello!" in result.output
+
+    # A stale socket file left by a dead daemon refuses connections
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(str(tmp_path / "stale.sock"))
+        result = CliRunner().invoke(app, ["chat", "hi", "--daemon", str(tmp_path / "stale.sock")])
+    assert result.exit_code == 0
+    assert "running in-process" in result.output
+
+def test_chat_does_not_rerun_a_request_the_daemon_received(tmp_path):
+    path = str(tmp_path / "broken.sock")
+    received = []
+
+    def serve_once(listener):
+        conn, _ = listener.accept()
+        with conn, conn.makefile("rb") as stream:
+            # Read the request, then drop the connection without replying
+            received.append(stream.readline())
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(path)
+        listener.listen()
+        thread = threading.Thread(target=serve_once, args=(listener,))
+        thread.start()
+        result = CliRunner().invoke(app, ["chat", "hi", "--daemon", path])
+        thread.join(5)
+
+    assert len(received) == 1
+    assert result.exit_code == 1
+    assert "closed the connection" in result.output
+    assert "running in-process" not in result.output
+    assert "Response:" not in result.output
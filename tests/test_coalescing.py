@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from aicp.gateway.coalescing import RequestCoalescer
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.reliability import DeadlineExceededError
+from aicp.gateway.providers.base import LLMProvider, CompletionRequest, CompletionResponse, Message, Role, Usage
+
+class SlowProvider(LLMProvider):
+    def __init__(self, name="slow", delay=0.05, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    @property
+    def provider_name(self):
+        return self.name
+
+    async def complete(self, request):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return CompletionResponse(
+            id=f"resp-{self.calls}", model=request.model, content="shared",
+            usage=Usage(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+        )
+
+def make_request():
+    return CompletionRequest(model="test", messages=[Message(role=Role.USER, content="popular")])
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call():
+    provider = SlowProvider()
+    gateway = LLMGateway([provider], coalesce=True)
+
+    responses = await asyncio.gather(*(gateway.complete(make_request()) for _ in range(10)))
+
+    assert provider.calls == 1
+    assert {r.id for r in responses} == {"resp-1"}
+    assert gateway.coalescer.stats() == {"leaders": 1, "coalesced": 9, "inflight": 0}
+
+@pytest.mark.asyncio
+async def test_exception_is_shared():
+    provider = SlowProvider(fail=True)
+    gateway = LLMGateway([provider], coalesce=True, max_retries=1)
+
+    results = await asyncio.gather(
+        *(gateway.complete(make_request()) for _ in range(3)), return_exceptions=True
+    )
+
+    assert provider.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+@pytest.mark.asyncio
+async def test_follower_keeps_its_own_deadline():
+    provider = SlowProvider(delay=0.3)
+    gateway = LLMGateway([provider], coalesce=True)
+
+    leader, follower = await asyncio.gather(
+        gateway.complete(make_request(), timeout=0.1),
+        gateway.complete(make_request(), timeout=10),
+        return_exceptions=True
+    )
+
+    assert isinstance(leader, DeadlineExceededError)
+    assert follower.content == "shared"
+    assert provider.calls == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    coalescer = RequestCoalescer()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(coalescer.run("k", work))
+    second = asyncio.create_task(coalescer.run("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+    assert first.cancelled()
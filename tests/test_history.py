@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+import pytest
+from typer.testing import CliRunner
+from aicp.cli import app
+from aicp.pipeline.artifacts import ArtifactRef, ArtifactStore
+from aicp.pipeline.engine import Pipeline, stage
+from aicp.pipeline.history import RunHistory
+from aicp.pipeline.models import StageStatus
+
+def build(tmp_path, history, fail=False):
+    p = Pipeline(
+        "eval", history=history,
+        artifacts=ArtifactStore(str(tmp_path / "artifacts"), spill_threshold=1024)
+    )
+
+    @stage(name="blob")
+    def blob(size: int):
+        return b"x" * size
+
+    @stage(name="rows", depends_on=["blob"])
+    def rows(blob: bytes):
+        return [{"i": i, "text": f"{i:03}" + "y" * 100} for i in range(len(blob) // 100)]
+
+    @stage(name="summary", depends_on=["blob", "rows"])
+    def summary(blob: ArtifactRef, rows):
+        if fail:
+            raise ValueError("summary broke")
+        # Annotated parameters receive the handle and can map the bytes instead of loading them
+        with blob.mmap() as view:
+            return {"bytes": len(view), "rows": len(rows)}
+
+    for s in (blob, rows, summary):
+        p.add_stage(s)
+    return p
+
+@pytest.mark.asyncio
+async def test_large_outputs_spill_to_artifacts(tmp_path):
+    history = RunHistory(str(tmp_path / "runs.db"))
+    run = await build(tmp_path, history).run({"size": 5000})
+
+    assert run.status == StageStatus.COMPLETED
+    assert isinstance(run.results["blob"].output, ArtifactRef)
+    assert run.results["blob"].output.kind == "bytes"
+    assert isinstance(run.results["rows"].output, ArtifactRef)
+    assert run.results["rows"].output.load()[0] == {"i": 0, "text": "000" + "y" * 100}
+    # Small outputs stay in memory
+    assert run.results["summary"].output == {"bytes": 5000, "rows": 50}
+
+    stored = history.get_run(run.run_id)
+    assert stored.status == StageStatus.COMPLETED
+    assert stored.results["blob"].output == run.results["blob"].output
+    assert stored.results["summary"].output == {"bytes": 5000, "rows": 50}
+
+@pytest.mark.asyncio
+async def test_runs_are_queryable_and_resumable(tmp_path):
+    history = RunHistory(str(tmp_path / "runs.db"))
+    failed = await build(tmp_path, history, fail=True).run({"size": 2000})
+    await build(tmp_path, history).run({"size": 2000})
+
+    assert [r["status"] for r in history.list_runs(pipeline="eval")] == ["completed", "failed"]
+    assert [r["run_id"] for r in history.list_runs(status=StageStatus.FAILED)] == [failed.run_id]
+    assert history.list_runs(pipeline="other") == []
+    assert history.list_runs(since=datetime.now() + timedelta(minutes=1)) == []
+    assert history.list_runs(limit=1)[0]["stages"] == 3
+
+    # A stored run is a valid `resume_from`: spilled outputs come back as handles
+    resumed = await build(tmp_path, history).run({"size": 2000}, resume_from=history.get_run(failed.run_id))
+    assert resumed.status == StageStatus.COMPLETED
+    assert resumed.results["blob"].metadata["resumed_from"] == failed.run_id
+    assert resumed.results["summary"].output == {"bytes": 2000, "rows": 20}
+
+    history.delete_run(failed.run_id)
+    assert history.get_run(failed.run_id) is None
+
+@pytest.mark.asyncio
+async def test_runs_cli(tmp_path):
+    history = RunHistory(str(tmp_path / "runs.db"))
+    run = await build(tmp_path, history).run({"size": 5000})
+    history.close()
+
+    runner = CliRunner()
+    listed = runner.invoke(app, ["runs", "list", "--store", str(tmp_path)])
+    assert listed.exit_code == 0
+    assert run.run_id[:8] in listed.output
+
+    bogus = runner.invoke(app, ["runs", "list", "--status", "bogus", "--store", str(tmp_path)])
+    assert bogus.exit_code == 2
+    assert "completed" in bogus.output
+
+    shown = runner.invoke(app, ["runs", "show", run.run_id, "--store", str(tmp_path)])
+    assert shown.exit_code == 0
+    assert "artifact" in shown.output and "5000 bytes" in shown.output
+
+    missing = runner.invoke(app, ["runs", "show", "nope", "--store", str(tmp_path)])
+    assert missing.exit_code == 1
@@ -0,0 +1,66 @@
+import io
+import json
+import structlog
+from aicp.observability.logging import BatchedLogSink, BatchedLogger, EventSampler, setup_logging
+
+def make_logger(sink, *processors):
+    return structlog.wrap_logger(
+        BatchedLogger(sink),
+        processors=[*processors, structlog.processors.add_log_level],
+        context_class=dict,
+    )
+
+def test_sink_writes_batches_and_flushes_on_close():
+    stream = io.StringIO()
+    sink = BatchedLogSink(stream=stream, batch_size=10, flush_interval=60.0)
+    log = make_logger(sink)
+
+    for i in range(25):
+        log.info("event", i=i)
+    sink.close()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["i"] for line in lines] == list(range(25))
+    assert lines[0]["level"] == "info"
+    assert sink.written == 25
+
+def test_sink_drops_when_buffer_is_full():
+    stream = io.StringIO()
+    sink = BatchedLogSink(stream=stream, max_buffer=5, batch_size=100, flush_interval=60.0)
+    log = make_logger(sink)
+
+    for i in range(8):
+        log.info("event", i=i)
+    sink.close()
+
+    assert sink.dropped == 3
+    assert len(stream.getvalue().splitlines()) == 5
+
+def test_sampler_keeps_a_fraction_of_named_events():
+    stream = io.StringIO()
+    sink = BatchedLogSink(stream=stream, flush_interval=60.0)
+    sampler = EventSampler({"noisy": 0.1}, seed=3)
+    log = make_logger(sink, sampler)
+
+    for _ in range(1000):
+        log.info("noisy")
+    log.info("important")
+    sink.close()
+
+    events = [json.loads(line)["event"] for line in stream.getvalue().splitlines()]
+    assert events.count("important") == 1
+    assert 50 < events.count("noisy") < 150
+    assert sampler.sampled_out == 1000 - events.count("noisy")
+
+def test_setup_logging_batched_returns_sink():
+    stream = io.StringIO()
+    try:
+        sink = setup_logging(batched=True, stream=stream, sample_rates={"skip_me": 0.0})
+        log = structlog.get_logger()
+        log.info("kept", value=1)
+        log.info("skip_me")
+        sink.flush()
+        assert [json.loads(line)["event"] for line in stream.getvalue().splitlines()] == ["kept"]
+    finally:
+        sink.close()
+        structlog.reset_defaults()
@@ -0,0 +1,85 @@
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from prometheus_client import REGISTRY
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.middleware import PIIRedactor
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+from aicp.gateway.providers.mock import MockProvider
+from aicp.gateway.reliability import CircuitBreaker
+from aicp.observability import metrics, tracing
+from aicp.pipeline.engine import Pipeline, stage
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def request(model="metrics-model"):
+    return CompletionRequest(model=model, messages=[Message(role=Role.USER, content="hi")])
+
+@pytest.mark.asyncio
+async def test_gateway_records_requests_middleware_and_attempts():
+    gateway = LLMGateway([MockProvider(name="metrics-primary")], middlewares=[PIIRedactor()])
+    before = sample("aicp_gateway_requests_total", provider="metrics-primary", model="metrics-model", status="success")
+
+    await gateway.complete(request())
+
+    assert sample("aicp_gateway_requests_total", provider="metrics-primary", model="metrics-model", status="success") == before + 1
+    assert sample("aicp_gateway_completions_total", model="metrics-model", outcome="success") >= 1
+    assert sample("aicp_gateway_middleware_latency_seconds_count", middleware="PIIRedactor", hook="pre_process") >= 1
+    assert sample("aicp_gateway_tokens_total", provider="metrics-primary", type="completion") > 0
+
+def test_breaker_transitions_are_counted():
+    breaker = CircuitBreaker("metrics-breaker", failure_threshold=2, recovery_timeout=0.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert sample("aicp_circuit_breaker_state", breaker="metrics-breaker") == 1
+    assert sample("aicp_circuit_breaker_transitions_total", breaker="metrics-breaker", state="OPEN") == 1
+
+    assert breaker.can_execute()
+    breaker.record_success()
+    assert sample("aicp_circuit_breaker_state", breaker="metrics-breaker") == 0
+    assert sample("aicp_circuit_breaker_transitions_total", breaker="metrics-breaker", state="HALF_OPEN") == 1
+
+@pytest.mark.asyncio
+async def test_pipeline_records_runs_and_stage_latency():
+    @stage(name="only")
+    def only():
+        return 1
+
+    p = Pipeline("metrics-pipeline")
+    p.add_stage(only)
+    await p.run()
+
+    assert sample("aicp_pipeline_runs_total", pipeline="metrics-pipeline", status="completed") == 1
+    assert sample("aicp_pipeline_stage_latency_seconds_count", pipeline="metrics-pipeline", stage="only") == 1
+
+@pytest.mark.asyncio
+async def test_disabled_metrics_record_nothing():
+    gateway = LLMGateway([MockProvider(name="metrics-disabled")])
+    metrics.set_enabled(False)
+    try:
+        await gateway.complete(request("disabled-model"))
+    finally:
+        metrics.set_enabled(True)
+    assert sample("aicp_gateway_completions_total", model="disabled-model", outcome="success") == 0
+
+@pytest.mark.asyncio
+async def test_spans_are_emitted_when_tracing_enabled(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer("aicp"))
+    monkeypatch.setattr(tracing, "ENABLED", True)
+
+    gateway = LLMGateway([MockProvider(name="traced")], middlewares=[PIIRedactor()])
+    await gateway.complete(request())
+
+    names = [s.name for s in exporter.get_finished_spans()]
+    assert names == ["middleware.pre_process", "provider.attempt", "middleware.post_process", "gateway.complete"]
+
+def test_render_metrics_exposes_gateway_metrics():
+    body, content_type = metrics.render_metrics()
+    assert b"aicp_gateway_requests_total" in body
+    assert content_type.startswith("text/plain")
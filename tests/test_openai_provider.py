@@ -0,0 +1,55 @@
+import pytest
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.middleware import PIIRedactor
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+from aicp.gateway.providers.mock import MockProvider
+from aicp.gateway.providers.openai import OpenAIProvider, close_shared_clients
+from aicp.server.stub import OpenAIStubServer
+
+def make_request(content="hello"):
+    return CompletionRequest(model="stub-model", messages=[Message(role=Role.USER, content=content)])
+
+@pytest.mark.asyncio
+async def test_completions_reuse_pooled_connections():
+    async with OpenAIStubServer(response_content="pong") as server:
+        provider = OpenAIProvider(base_url=f"{server.base_url}/v1", api_key="test")
+        try:
+            for _ in range(5):
+                response = await provider.complete(make_request())
+            assert response.content == "pong"
+            assert response.usage.completion_tokens == 1
+            assert server.requests_served == 5
+            assert server.connections_opened == 1
+
+            # Another provider on the same URL shares the pool
+            other = OpenAIProvider(name="other", base_url=f"{server.base_url}/v1")
+            assert other.client is provider.client
+        finally:
+            await close_shared_clients()
+
+@pytest.mark.asyncio
+async def test_streaming_through_gateway():
+    content = "contact me at someone@example.com please"
+    async with OpenAIStubServer(response_content=content, chunk_size=5) as server:
+        provider = OpenAIProvider(base_url=f"{server.base_url}/v1")
+        gateway = LLMGateway([provider], middlewares=[PIIRedactor()])
+        try:
+            chunks = [c async for c in gateway.stream(make_request())]
+        finally:
+            await close_shared_clients()
+
+    assert "".join(c.delta for c in chunks) == "contact me at [EMAIL_REDACTED] please"
+    assert chunks[-1].usage is not None
+
+@pytest.mark.asyncio
+async def test_injected_errors_trigger_fallback():
+    async with OpenAIStubServer(error_rate=1.0) as server:
+        provider = OpenAIProvider(base_url=f"{server.base_url}/v1")
+        gateway = LLMGateway([provider, MockProvider(response_content="fallback")], max_retries=1)
+        try:
+            response = await gateway.complete(make_request())
+        finally:
+            await close_shared_clients()
+
+    assert response.content == "fallback"
+    assert server.errors == 1
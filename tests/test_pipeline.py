@@ -0,0 +1,131 @@
+import asyncio
+import typing
+import time
+import pytest
+from aicp.pipeline.engine import Pipeline, stage
+from aicp.pipeline.models import StageStatus
+
+def fan_out_pipeline(width, delay, **kwargs):
+    p = Pipeline("fan-out", **kwargs)
+
+    @stage(name="source")
+    def source():
+        return 1
+
+    for i in range(width):
+        @stage(name=f"branch_{i}", depends_on=["source"], tags=["llm"])
+        async def branch(source: int):
+            await asyncio.sleep(delay)
+            return source
+        p.add_stage(branch)
+
+    p.add_stage(source)
+    return p
+
+@pytest.mark.asyncio
+async def test_independent_stages_run_concurrently():
+    p = fan_out_pipeline(width=10, delay=0.05)
+    started = time.perf_counter()
+    run = await p.run()
+
+    assert run.status == StageStatus.COMPLETED
+    assert len(run.results) == 11
+    assert time.perf_counter() - started < 0.3
+
+@pytest.mark.asyncio
+async def test_concurrency_limits():
+    active = 0
+    peak = 0
+
+    p = Pipeline("limited", tag_limits={"llm": 2})
+    for i in range(6):
+        @stage(name=f"s{i}", tags=["llm"])
+        async def limited():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+        p.add_stage(limited)
+
+    run = await p.run()
+    assert run.status == StageStatus.COMPLETED
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_fail_fast_cancels_running_siblings():
+    p = Pipeline("fail-fast")
+
+    @stage(name="slow")
+    async def slow():
+        await asyncio.sleep(10)
+
+    @stage(name="broken")
+    async def broken():
+        raise ValueError("boom")
+
+    @stage(name="after", depends_on=["broken"])
+    def after(broken):
+        return broken
+
+    for s in (slow, broken, after):
+        p.add_stage(s)
+
+    run = await asyncio.wait_for(p.run(), timeout=2)
+    assert run.status == StageStatus.FAILED
+    assert run.results["broken"].status == StageStatus.FAILED
+    assert run.results["slow"].status == StageStatus.SKIPPED
+    assert run.results["after"].status == StageStatus.SKIPPED
+
+@pytest.mark.asyncio
+async def test_cycle_is_reported_as_deadlock():
+    p = Pipeline("cycle")
+    p.add_stage(stage(name="a", depends_on=["b"])(lambda: 1))
+    p.add_stage(stage(name="b", depends_on=["a"])(lambda: 2))
+
+    run = await p.run()
+    assert run.status == StageStatus.FAILED
+    assert run.results == {}
+
+@stage(name="checksum", executor="process")
+def checksum(payload: bytes) -> bytearray:
+    return bytearray(payload * 4)
+
+@stage(name="summed", depends_on=["checksum"], executor="thread")
+def summed(checksum: bytearray) -> int:
+    return len(checksum)
+
+@pytest.mark.asyncio
+async def test_process_and_thread_executors():
+    p = Pipeline("executors", process_workers=1)
+    p.add_stage(checksum)
+    p.add_stage(summed)
+    # Large enough for the output to travel through shared memory
+    p.executors.shm_threshold = 1024
+    try:
+        run = await p.run({"payload": b"x" * 4096})
+    finally:
+        p.close()
+
+    assert run.status == StageStatus.COMPLETED
+    assert run.results["checksum"].output == bytearray(b"x" * 16384)
+    assert run.results["summed"].output == 16384
+
+def test_process_stages_are_validated_at_registration():
+    p = Pipeline("invalid")
+
+    with pytest.raises(TypeError, match="module-level"):
+        p.add_stage(stage(name="local", executor="process")(lambda: 1))
+
+    @stage(name="async_thread", executor="thread")
+    async def async_thread():
+        return 1
+
+    with pytest.raises(TypeError, match="inline"):
+        p.add_stage(async_thread)
+
+    with pytest.raises(TypeError, match="worker process"):
+        p.add_stage(stage(name="gen", executor="process")(generator_stage))
+
+def generator_stage() -> typing.Iterator[int]:
+    return iter([1])
@@ -0,0 +1,212 @@
+import asyncio
+import time
+import pytest
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+from aicp.gateway.providers.mock import MockProvider
+from aicp.pipeline.engine import Pipeline, stage
+from aicp.pipeline.models import StageStatus
+
+@pytest.mark.asyncio
+async def test_items_flow_with_backpressure():
+    produced = 0
+    lag = []
+
+    @stage(name="numbers", buffer_size=4)
+    async def numbers(n: int):
+        nonlocal produced
+        for i in range(n):
+            produced += 1
+            yield i
+
+    @stage(name="squares", depends_on=["numbers"], map_over="numbers", concurrency=3, buffer_size=4)
+    async def squares(numbers: int):
+        await asyncio.sleep(0.001 * (numbers % 3))
+        return numbers * numbers
+
+    @stage(name="total", depends_on=["squares"])
+    async def total(squares):
+        seen = []
+        async for value in squares:
+            # The producer may only run a bounded distance ahead of this consumer
+            lag.append(produced - len(seen))
+            seen.append(value)
+            await asyncio.sleep(0)
+        return seen
+
+    p = Pipeline("streams")
+    for s in (numbers, squares, total):
+        p.add_stage(s)
+    run = await p.run({"n": 200})
+
+    assert run.status == StageStatus.COMPLETED
+    assert run.results["total"].output == [i * i for i in range(200)]  # order is preserved
+    assert run.results["numbers"].output is None
+    assert run.results["numbers"].metadata == {"streaming": True, "items": 200}
+    assert run.results["squares"].metadata["items"] == 200
+    # Two stream buffers, the map's slots and the items being handed over
+    assert max(lag) <= 4 + 4 + 3 + 3
+
+@pytest.mark.asyncio
+async def test_first_results_arrive_before_the_producer_finishes():
+    first_seen = None
+    finished = None
+
+    @stage(name="slow_source")
+    async def slow_source():
+        nonlocal finished
+        for i in range(5):
+            await asyncio.sleep(0.02)
+            yield i
+        finished = time.perf_counter()
+
+    @stage(name="sink", depends_on=["slow_source"])
+    async def sink(slow_source):
+        nonlocal first_seen
+        async for _ in slow_source:
+            first_seen = first_seen or time.perf_counter()
+
+    p = Pipeline("latency")
+    p.add_stage(slow_source)
+    p.add_stage(sink)
+    run = await p.run()
+
+    assert run.status == StageStatus.COMPLETED
+    assert first_seen < finished
+
+@pytest.mark.asyncio
+async def test_batches_map_onto_gateway_bulk_calls():
+    gateway = LLMGateway([MockProvider(response_content="ok")])
+    batches = []
+
+    @stage(name="prompts", executor="thread")
+    def prompts(n: int):
+        for i in range(n):
+            yield f"prompt {i}"
+
+    @stage(name="answers", depends_on=["prompts"], map_over="prompts", batch_size=8, concurrency=2)
+    async def answers(prompts):
+        batches.append(len(prompts))
+        requests = [CompletionRequest(model="m", messages=[Message(role=Role.USER, content=p)]) for p in prompts]
+        return [r.content for r in await gateway.complete_many(requests)]
+
+    @stage(name="count", depends_on=["answers"])
+    async def count(answers):
+        return sum([1 async for a in answers if a == "ok"])
+
+    p = Pipeline("bulk")
+    for s in (prompts, answers, count):
+        p.add_stage(s)
+    try:
+        run = await p.run({"n": 20})
+    finally:
+        p.close()
+
+    assert run.status == StageStatus.COMPLETED
+    assert run.results["count"].output == 20
+    assert batches == [8, 8, 4]
+
+@pytest.mark.asyncio
+async def test_producer_failure_reaches_consumers():
+    @stage(name="flaky")
+    async def flaky():
+        yield 1
+        raise ValueError("source broke")
+
+    @stage(name="reader", depends_on=["flaky"])
+    async def reader(flaky):
+        return [item async for item in flaky]
+
+    p = Pipeline("failing", fail_fast=False)
+    p.add_stage(flaky)
+    p.add_stage(reader)
+    run = await asyncio.wait_for(p.run(), timeout=2)
+
+    assert run.status == StageStatus.FAILED
+    assert run.results["flaky"].error == "source broke"
+    assert run.results["reader"].status == StageStatus.FAILED
+    assert "upstream stage 'flaky' failed" in run.results["reader"].error
+
+@pytest.mark.asyncio
+async def test_failed_consumer_does_not_stall_the_producer():
+    @stage(name="many", buffer_size=2)
+    def many():
+        yield from range(100)
+
+    @stage(name="quitter", depends_on=["many"])
+    async def quitter(many):
+        await many.__anext__()
+        raise RuntimeError("gave up")
+
+    @stage(name="keeper", depends_on=["many"])
+    async def keeper(many):
+        return sum([i async for i in many])
+
+    p = Pipeline("partial", fail_fast=False)
+    for s in (many, quitter, keeper):
+        p.add_stage(s)
+    run = await asyncio.wait_for(p.run(), timeout=2)
+
+    assert run.results["quitter"].status == StageStatus.FAILED
+    assert run.results["keeper"].output == sum(range(100))
+    assert run.results["many"].status == StageStatus.COMPLETED
+
+@stage(name="gen")
+def gen():
+    yield from range(200)
+
+@pytest.mark.asyncio
+async def test_ordering_only_dependent_waits_for_the_stream():
+    @stage(name="after", depends_on=["gen"])
+    def after():
+        return "done"
+
+    @stage(name="total", depends_on=["gen"])
+    async def total(gen):
+        return sum([i async for i in gen])
+
+    p = Pipeline("ordering")
+    for s in (gen, after, total):
+        p.add_stage(s)
+    run = await asyncio.wait_for(p.run(), timeout=2)
+
+    assert run.status == StageStatus.COMPLETED
+    assert run.results["total"].output == sum(range(200))
+    # `after` takes no `gen` parameter, so it starts once the producer finished
+    assert run.results["after"].start_time >= run.results["gen"].end_time
+
+@pytest.mark.asyncio
+async def test_consumer_behind_a_sibling_consumer_does_not_deadlock():
+    @stage(name="total", depends_on=["gen"])
+    async def total(gen):
+        return sum([i async for i in gen])
+
+    @stage(name="both", depends_on=["gen", "total"])
+    async def both(gen, total):
+        return [i async for i in gen][-1], total
+
+    p = Pipeline("diamond")
+    for s in (gen, total, both):
+        p.add_stage(s)
+    run = await asyncio.wait_for(p.run(), timeout=2)
+
+    assert run.status == StageStatus.COMPLETED
+    assert run.results["both"].output == (199, sum(range(200)))
+
+@pytest.mark.asyncio
+async def test_consumers_are_exempt_from_stage_limits():
+    @stage(name="first", depends_on=["gen"])
+    async def first(gen):
+        return len([i async for i in gen])
+
+    @stage(name="second", depends_on=["gen"])
+    async def second(gen):
+        return len([i async for i in gen])
+
+    p = Pipeline("limited", max_concurrency=1)
+    for s in (gen, first, second):
+        p.add_stage(s)
+    run = await asyncio.wait_for(p.run(), timeout=2)
+
+    assert run.status == StageStatus.COMPLETED
+    assert run.results["first"].output == run.results["second"].output == 200
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+from aicp.gateway.providers.mock import MockProvider
+from aicp.gateway.ratelimit import AdmissionController, RateLimit, RateLimitExceededError, TokenBucket
+
+def make_request(priority=0, tenant="acme"):
+    return CompletionRequest(
+        model="m", tenant_id=tenant, priority=priority, max_tokens=10,
+        messages=[Message(role=Role.USER, content="hi")]
+    )
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.wait_time(2) == 0
+    bucket.consume(2)
+    assert bucket.wait_time(1) == pytest.approx(0.1, abs=0.02)
+
+@pytest.mark.asyncio
+async def test_requests_over_limit_wait_instead_of_failing():
+    admission = AdmissionController(default_tenant_limit=RateLimit(requests_per_second=50, request_burst=1))
+    gateway = LLMGateway([MockProvider()], admission=admission)
+
+    responses = await asyncio.gather(*(gateway.complete(make_request()) for _ in range(4)))
+
+    assert len(responses) == 4
+    assert admission.stats()["queued"] == 3
+    assert admission.stats()["queue_depth"] == 0
+
+@pytest.mark.asyncio
+async def test_higher_priority_is_admitted_first():
+    admission = AdmissionController(default_tenant_limit=RateLimit(requests_per_second=100, request_burst=1))
+    order = []
+
+    async def admit(name, priority):
+        await admission.admit_tenant(make_request(priority=priority))
+        order.append(name)
+
+    await admission.admit_tenant(make_request())  # drain the burst
+    await asyncio.gather(admit("batch-1", 0), admit("batch-2", 0), admit("interactive", 10))
+
+    assert order == ["interactive", "batch-1", "batch-2"]
+
+@pytest.mark.asyncio
+async def test_rejects_after_max_wait_and_when_queue_full():
+    limit = RateLimit(requests_per_second=1, request_burst=1)
+    admission = AdmissionController(default_tenant_limit=limit, max_wait=0.05, max_queue=1)
+
+    await admission.admit_tenant(make_request())
+    results = await asyncio.gather(
+        admission.admit_tenant(make_request()),
+        admission.admit_tenant(make_request()),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, RateLimitExceededError) for r in results)
+    assert admission.stats()["rejected"] == 2
+
+@pytest.mark.asyncio
+async def test_exhausted_provider_falls_back():
+    admission = AdmissionController(
+        provider_limits={"primary": RateLimit(tokens_per_minute=60, token_burst=15)}, max_wait=0.01
+    )
+    gateway = LLMGateway(
+        [MockProvider(name="primary", response_content="primary"), MockProvider(name="backup", response_content="backup")],
+        admission=admission,
+    )
+
+    first = await gateway.complete(make_request())
+    second = await gateway.complete(make_request())
+
+    assert first.content == "primary"
+    assert second.content == "backup"
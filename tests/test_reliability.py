@@ -1,7 +1,11 @@
 import pytest
 import asyncio
-from aicp.gateway.reliability import CircuitBreaker, ReliabilityLayer
+from aicp.gateway.reliability import CircuitBreaker, ReliabilityLayer, HedgingPolicy, DeadlineExceededError, SlidingWindowCircuitBreaker
+from aicp.gateway.gateway import LLMGateway
 from aicp.gateway.providers.base import LLMProvider, CompletionRequest, CompletionResponse, Usage, Role
+from aicp.gateway.providers.mock import MockProvider
+from aicp.gateway.ratelimit import AdmissionController, RateLimit
+from aicp.gateway.retries import RetryBudget
 
 class FailingProvider(LLMProvider):
     def __init__(self, name="failing"):
@@ -56,3 +60,269 @@ async def test_reliability_layer_fallback():
     assert failing.calls == 1
     # On second call, the primary breaker should be OPEN (if threshold reached)
     # Actually, in ReliabilityLayer, it records failure on every attempt.
+
+class DelayedProvider(SuccessProvider):
+    def __init__(self, name, delay):
+        super().__init__(name)
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def complete(self, request):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        response = await super().complete(request)
+        return response.model_copy(update={"content": self.name})
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_against_slow_primary():
+    slow = DelayedProvider("slow", delay=1.0)
+    fast = DelayedProvider("fast", delay=0.01)
+    hedging = HedgingPolicy(delay=0.02, percentile=None, budget=1.0)
+    layer = ReliabilityLayer(providers=[slow, fast], hedging=hedging)
+
+    resp = await layer.execute_with_fallback(CompletionRequest(model="test", messages=[]))
+
+    assert resp.content == "fast"
+    assert resp.provider_metadata["hedge"] == {"winner": "hedge"}
+    await asyncio.sleep(0)
+    assert slow.cancelled == 1
+    assert layer.hedge_stats["hedge_wins"] == 1
+
+@pytest.mark.asyncio
+async def test_hedge_budget_limits_extra_requests():
+    slow = DelayedProvider("slow", delay=0.03)
+    fast = DelayedProvider("fast", delay=0.0)
+    hedging = HedgingPolicy(delay=0.001, percentile=None, budget=0.25)
+    layer = ReliabilityLayer(providers=[slow, fast], hedging=hedging)
+
+    for _ in range(8):
+        await layer.execute_with_fallback(CompletionRequest(model="test", messages=[]))
+
+    assert layer.hedge_stats["sent"] == 2
+    assert layer.hedge_stats["budget_denied"] == 6
+
+class HangingProvider(SuccessProvider):
+    def __init__(self, name="hanging"):
+        super().__init__(name)
+        self.cancelled = 0
+
+    async def complete(self, request):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+@pytest.mark.asyncio
+async def test_attempt_timeout_cancels_hung_call_and_falls_back():
+    hanging = HangingProvider("primary")
+    layer = ReliabilityLayer(providers=[hanging, SuccessProvider("secondary")], max_retries=1, attempt_timeout=0.05)
+
+    resp = await layer.execute_with_fallback(CompletionRequest(model="test", messages=[]))
+
+    assert resp.content == "success"
+    assert hanging.cancelled == 1
+    assert layer.breakers["primary"].failures == 1
+
+@pytest.mark.asyncio
+async def test_request_deadline_raises_without_penalising_provider():
+    hanging = HangingProvider("primary")
+    gateway = LLMGateway([hanging], max_retries=3)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(DeadlineExceededError):
+        await gateway.complete(CompletionRequest(model="test", messages=[], timeout=0.05))
+
+    assert loop.time() - started < 1.0
+    assert hanging.cancelled == 1
+    assert gateway.reliability.breakers["primary"].failures == 0
+
+@pytest.mark.asyncio
+async def test_attempt_timeout_within_deadline_is_not_a_deadline_error():
+    gateway = LLMGateway([MockProvider(name="primary", latency=5)], max_retries=1, attempt_timeout=0.05)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(TimeoutError) as raised:
+        await gateway.complete(CompletionRequest(model="test", messages=[], timeout=10))
+
+    assert not isinstance(raised.value, DeadlineExceededError)
+    assert loop.time() - started < 1.0
+    assert gateway.reliability.breakers["primary"].failures == 1
+
+@pytest.mark.asyncio
+async def test_backoff_that_would_pass_the_deadline_is_skipped():
+    failing = FailingProvider("primary")
+    gateway = LLMGateway([failing, SuccessProvider("secondary")], max_retries=3, timeout=0.5)
+    gateway.reliability.base_delay = 10.0
+    gateway.reliability.rng.uniform = lambda low, high: high
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    resp = await gateway.complete(CompletionRequest(model="test", messages=[]))
+
+    assert resp.content == "success"
+    assert failing.calls == 1
+    assert loop.time() - started < 0.5
+
+def test_backoff_uses_full_jitter_with_cap():
+    layer = ReliabilityLayer(providers=[], base_delay=1.0, max_delay=5.0)
+    delays = [layer._backoff(10) for _ in range(200)]
+    assert all(0 <= d <= 5.0 for d in delays)
+    assert min(delays) < 1.0 < max(delays)
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def test_sliding_window_breaker_trips_on_failure_rate():
+    breaker = SlidingWindowCircuitBreaker("sw", failure_rate_threshold=0.5, window_size=4, minimum_calls=4)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == "CLOSED"  # below minimum_calls
+
+    breaker = SlidingWindowCircuitBreaker("sw", failure_rate_threshold=0.5, window_size=4, minimum_calls=4)
+    for _ in range(5):
+        breaker.record_success()
+    assert breaker.counts() == (4, 0, 0)
+
+    # The ring drops the oldest outcome for each new one: 1/4 then 2/4 failed
+    breaker.record_failure()
+    assert breaker.state == "CLOSED"
+    breaker.record_failure()
+    assert breaker.counts() == (4, 2, 0)
+    assert breaker.state == "OPEN"
+
+def test_sliding_window_breaker_trips_on_slow_calls_in_time_window():
+    clock = Clock()
+    breaker = SlidingWindowCircuitBreaker(
+        "slow", slow_call_rate_threshold=0.5, slow_call_duration=1.0,
+        window_type="time", window_size=10, minimum_calls=4, clock=clock
+    )
+    breaker.record_success(2.0)
+    breaker.record_success(2.0)
+    clock.now += 11  # both slow calls leave the window
+    for _ in range(3):
+        breaker.record_success(0.1)
+    breaker.record_success(2.0)
+    assert breaker.state == "CLOSED"
+    breaker.record_success(2.0)
+    breaker.record_success(2.0)
+    assert breaker.state == "OPEN"
+
+def test_half_open_admits_limited_probes():
+    clock = Clock()
+    breaker = SlidingWindowCircuitBreaker(
+        "probe", window_size=4, minimum_calls=2, recovery_timeout=5.0, half_open_probes=2, clock=clock
+    )
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.can_execute()
+
+    clock.now += 6
+    assert [breaker.can_execute() for _ in range(4)] == [True, True, False, False]
+    assert breaker.state == "HALF_OPEN"
+    breaker.record_success()
+    assert breaker.state == "HALF_OPEN"
+    assert breaker.can_execute()
+    breaker.record_success()
+    assert breaker.state == "CLOSED"
+    assert breaker.counts() == (0, 0, 0)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 6
+    assert breaker.can_execute()
+    breaker.record_failure()
+    assert breaker.state == "OPEN" and not breaker.can_execute()
+
+@pytest.mark.asyncio
+async def test_reliability_layer_uses_breaker_factory():
+    failing = FailingProvider("primary")
+    layer = ReliabilityLayer(
+        providers=[failing, SuccessProvider("secondary")], max_retries=5, base_delay=0.0,
+        breaker_factory=lambda name: SlidingWindowCircuitBreaker(name, window_size=10, minimum_calls=2)
+    )
+    assert isinstance(layer.breakers["primary"], SlidingWindowCircuitBreaker)
+
+    resp = await layer.execute_with_fallback(CompletionRequest(model="test", messages=[]))
+
+    # The breaker opened after two failures, cutting the retries short
+    assert resp.content == "success"
+    assert failing.calls == 2
+    assert layer.breakers["primary"].state == "OPEN"
+
+def half_open(layer_providers, names, **options):
+    """A layer whose breakers for `names` are due for a half-open probe."""
+    clock = Clock()
+    layer = ReliabilityLayer(
+        providers=layer_providers, max_retries=1,
+        breaker_factory=lambda name: SlidingWindowCircuitBreaker(name, minimum_calls=1, recovery_timeout=10, clock=clock),
+        **options
+    )
+    for name in names:
+        layer.breakers[name].record_failure()
+    clock.now += 11
+    return layer
+
+def assert_probe_free(breaker):
+    # An admitted call that reported no outcome must not keep the probe slot
+    assert breaker._probes == 0
+    assert breaker.can_execute()
+
+@pytest.mark.asyncio
+async def test_retry_budget_break_releases_fallback_probe():
+    layer = half_open(
+        [FailingProvider("primary"), SuccessProvider("secondary")], ["secondary"],
+        retry_budget=RetryBudget(ratio=0.0, min_retries=0)
+    )
+    with pytest.raises(Exception, match="Service Unavailable"):
+        await layer.execute_with_fallback(CompletionRequest(model="test", messages=[]))
+    assert_probe_free(layer.breakers["secondary"])
+
+@pytest.mark.asyncio
+async def test_rate_limited_probe_is_released():
+    admission = AdmissionController(provider_limits={"primary": RateLimit(requests_per_second=0.01, request_burst=1)}, max_wait=0.01)
+    layer = half_open([SuccessProvider("primary"), SuccessProvider("secondary")], ["primary"], admission=admission)
+    await admission.admit_provider("primary", CompletionRequest(model="test", messages=[]))
+
+    resp = await layer.execute_with_fallback(CompletionRequest(model="test", messages=[]))
+
+    assert resp.content == "success"
+    assert_probe_free(layer.breakers["primary"])
+
+@pytest.mark.asyncio
+async def test_deadline_expiry_releases_probe():
+    layer = half_open([HangingProvider("primary")], ["primary"])
+    with pytest.raises(DeadlineExceededError):
+        await layer.execute_with_fallback(CompletionRequest(model="test", messages=[]), asyncio.get_running_loop().time() + 0.05)
+    assert_probe_free(layer.breakers["primary"])
+
+@pytest.mark.asyncio
+async def test_cancelled_call_releases_probe():
+    hanging = HangingProvider("primary")
+    layer = half_open([hanging], ["primary"])
+    task = asyncio.create_task(layer.execute_with_fallback(CompletionRequest(model="test", messages=[])))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert hanging.cancelled == 1
+    assert_probe_free(layer.breakers["primary"])
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_releases_probe():
+    layer = half_open([MockProvider(name="primary", response_content="abcdefgh", chunk_size=1)], ["primary"])
+    chunks = layer.execute_stream(CompletionRequest(model="test", messages=[], stream=True))
+    await chunks.__anext__()
+    await chunks.aclose()
+    assert_probe_free(layer.breakers["primary"])
@@ -0,0 +1,74 @@
+import pytest
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+from aicp.gateway.providers.mock import MockProvider, MockProviderError
+from aicp.gateway.retries import RetryBudget, SlidingWindowCounter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def request():
+    return CompletionRequest(model="m", messages=[Message(role=Role.USER, content="hi")])
+
+def test_sliding_window_counter_expires_old_buckets():
+    clock = FakeClock()
+    counter = SlidingWindowCounter(window=10.0, buckets=10, clock=clock)
+    counter.add(3)
+    clock.now += 5
+    counter.add(2)
+    assert counter.value() == 5
+    clock.now += 6
+    assert counter.value() == 2
+    clock.now += 100
+    assert counter.value() == 0
+
+def test_retry_budget_allows_ratio_of_requests():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.1, min_retries=0, clock=clock)
+    for _ in range(50):
+        budget.record_request()
+
+    assert [budget.try_retry() for _ in range(7)] == [True] * 5 + [False] * 2
+    assert budget.stats()["allowed"] == 5 and budget.stats()["denied"] == 2
+
+    clock.now += 11
+    assert not budget.can_retry()
+    budget.record_request()
+    assert budget.retries.value() == 0
+
+def failing(name):
+    return MockProvider(name=name, failure_rate=1.0)
+
+@pytest.mark.asyncio
+async def test_exhausted_provider_budget_falls_back_immediately():
+    primary = failing("primary")
+    gateway = LLMGateway(
+        [primary, MockProvider(name="secondary", response_content="fallback")],
+        max_retries=3,
+        provider_retry_budget=lambda: RetryBudget(ratio=0.0, min_retries=0)
+    )
+    gateway.reliability.base_delay = 0.0
+
+    response = await gateway.complete(request())
+
+    assert response.content == "fallback"
+    assert gateway.reliability.retry_budgets["primary"].denied == 1
+    assert gateway.reliability.retry_stats == {"allowed": 0, "denied": 1}
+
+@pytest.mark.asyncio
+async def test_exhausted_global_budget_fails_fast():
+    secondary = MockProvider(name="secondary")
+    budget = RetryBudget(ratio=0.0, min_retries=1)
+    gateway = LLMGateway([failing("primary"), secondary], max_retries=2, retry_budget=budget)
+    gateway.reliability.base_delay = 0.0
+
+    # The single allowed retry goes to the primary; falling back needs a second one
+    with pytest.raises(MockProviderError):
+        await gateway.complete(request())
+
+    assert budget.allowed == 1 and budget.denied == 1
+    assert gateway.reliability.stats["secondary"].ewma is None
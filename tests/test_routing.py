@@ -0,0 +1,73 @@
+import asyncio
+import random
+from collections import Counter
+import pytest
+from aicp.gateway.reliability import ReliabilityLayer
+from aicp.gateway.routing import (
+    EWMALatencyRouting, LeastOutstandingRouting, PowerOfTwoChoicesRouting,
+    ProviderStats, WeightedRoundRobinRouting,
+)
+from aicp.gateway.providers.mock import MockProvider
+from aicp.gateway.providers.base import CompletionRequest
+
+def providers(*names):
+    return [MockProvider(name=n, response_content=n) for n in names]
+
+def stats_for(ps):
+    return {p.provider_name: ProviderStats() for p in ps}
+
+def test_ewma_prefers_fast_provider():
+    ps = providers("a", "b")
+    stats = stats_for(ps)
+    stats["a"].record_latency(0.5)
+    stats["b"].record_latency(0.1)
+    assert [p.name for p in EWMALatencyRouting().order(ps, stats)] == ["b", "a"]
+
+def test_ewma_ranks_failing_provider_last():
+    ps = providers("failing", "slow")
+    stats = stats_for(ps)
+    stats["slow"].record_latency(1.0)
+    assert EWMALatencyRouting().order(ps, stats)[0].name == "failing"  # unexplored
+    stats["failing"].record_failure()
+    assert [p.name for p in EWMALatencyRouting().order(ps, stats)] == ["slow", "failing"]
+
+def test_least_outstanding():
+    ps = providers("a", "b", "c")
+    stats = stats_for(ps)
+    stats["a"].record_start()
+    stats["b"].record_start()
+    stats["b"].record_start()
+    assert [p.name for p in LeastOutstandingRouting().order(ps, stats)] == ["c", "a", "b"]
+
+def test_weighted_round_robin_distribution():
+    ps = providers("a", "b")
+    routing = WeightedRoundRobinRouting({"a": 3, "b": 1})
+    picks = Counter(routing.order(ps, stats_for(ps))[0].name for _ in range(8))
+    assert picks == {"a": 6, "b": 2}
+
+def test_power_of_two_choices_picks_less_loaded():
+    ps = providers("a", "b")
+    stats = stats_for(ps)
+    stats["a"].record_start()
+    routing = PowerOfTwoChoicesRouting(random.Random(0))
+    assert all(routing.order(ps, stats)[0].name == "b" for _ in range(5))
+
+@pytest.mark.asyncio
+async def test_reliability_layer_spreads_load():
+    ps = providers("a", "b", "c")
+    layer = ReliabilityLayer(ps, routing=LeastOutstandingRouting())
+
+    def slowed(original):
+        async def complete(request):
+            await asyncio.sleep(0.01)
+            return await original(request)
+        return complete
+
+    for p in ps:
+        p.complete = slowed(p.complete)
+
+    responses = await asyncio.gather(*(
+        layer.execute_with_fallback(CompletionRequest(model="m", messages=[])) for _ in range(9)
+    ))
+    assert Counter(r.content for r in responses) == {"a": 3, "b": 3, "c": 3}
+    assert all(s.inflight == 0 for s in layer.stats.values())
@@ -0,0 +1,162 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import httpx
+import pytest
+from aicp.config import ConfigError, build_gateway, load_config
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.middleware import PIIRedactor
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+from aicp.gateway.providers.mock import MockProvider
+from aicp.gateway.providers.openai import OpenAIProvider, close_shared_clients
+from aicp.server.api import GatewayServer
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+def chat_body(content="hello", **extra):
+    return {"model": "gpt-4", "messages": [{"role": "user", "content": content}], **extra}
+
+@pytest.mark.asyncio
+async def test_chat_completions_round_trip():
+    gateway = LLMGateway([MockProvider(response_content="mail a@example.com")], middlewares=[PIIRedactor()])
+    async with GatewayServer(gateway) as server:
+        async with httpx.AsyncClient(base_url=server.base_url) as client:
+            resp = await client.post("/v1/chat/completions", json=chat_body(top_p=0.5))
+            assert resp.status_code == 200
+            body = resp.json()
+            assert body["object"] == "chat.completion"
+            assert body["choices"][0]["message"] == {"role": "assistant", "content": "mail [EMAIL_REDACTED]"}
+            assert body["usage"]["total_tokens"] > 0
+
+            assert (await client.post("/v1/chat/completions", json={"model": "gpt-4"})).status_code == 400
+            assert (await client.post("/v1/chat/completions", content=b"{not json")).status_code == 400
+            assert (await client.get("/v1/nope")).status_code == 404
+            assert (await client.get("/health")).json() == {"status": "ok"}
+            assert (await client.get("/metrics")).status_code == 200
+
+@pytest.mark.asyncio
+async def test_streaming_through_openai_client():
+    gateway = LLMGateway([MockProvider(response_content="streamed over SSE", chunk_size=3)])
+    async with GatewayServer(gateway) as server:
+        # The gateway's own OpenAI adapter can talk to the gateway server
+        provider = OpenAIProvider(base_url=f"{server.base_url}/v1")
+        try:
+            request = CompletionRequest(model="gpt-4", messages=[Message(role=Role.USER, content="hi")])
+            chunks = [c async for c in provider.stream(request)]
+        finally:
+            await close_shared_clients()
+
+    assert "".join(c.delta for c in chunks) == "streamed over SSE"
+    assert chunks[-1].finish_reason == "stop"
+    assert chunks[-1].usage is not None
+
+@pytest.mark.asyncio
+async def test_provider_failures_map_to_status_codes():
+    gateway = LLMGateway([MockProvider(failure_rate=1.0)], max_retries=1)
+    async with GatewayServer(gateway) as server:
+        async with httpx.AsyncClient(base_url=server.base_url) as client:
+            resp = await client.post("/v1/chat/completions", json=chat_body())
+            assert resp.status_code == 502
+            resp = await client.post("/v1/chat/completions", json=chat_body(stream=True))
+            assert resp.status_code == 502
+            assert resp.json()["error"]["type"] == "upstream_error"
+
+            # Once the breaker opens nothing is attempted upstream
+            breaker = gateway.reliability.breakers["mock-provider"]
+            for _ in range(breaker.failure_threshold):
+                breaker.record_failure()
+            for stream in (False, True):
+                resp = await client.post("/v1/chat/completions", json=chat_body(stream=stream))
+                assert resp.status_code == 503
+                assert resp.json()["error"]["type"] == "service_unavailable"
+
+    slow = LLMGateway([MockProvider(latency=1.0)])
+    async with GatewayServer(slow) as server:
+        async with httpx.AsyncClient(base_url=server.base_url) as client:
+            resp = await client.post("/v1/chat/completions", json=chat_body(), headers={"x-request-timeout": "0.05"})
+            assert resp.status_code == 504
+
+def test_config_builds_gateway(tmp_path):
+    path = tmp_path / "gateway.yaml"
+    path.write_text(
+        "gateway:\n  max_retries: 2\n  cache: {ttl: 60}\n"
+        "providers:\n  - {type: mock, name: a}\n  - {type: mock, name: b, latency: 0.01}\n"
+        "middlewares:\n  - {type: pii_redactor, entities: [EMAIL]}\n"
+    )
+    config = load_config(str(path))
+    assert config["server"]["port"] == 8080  # defaults survive a partial file
+    gateway = build_gateway(config)
+    assert [p.provider_name for p in gateway.reliability.providers] == ["a", "b"]
+    assert gateway.cache.ttl == 60
+    assert [type(m) for m in gateway.pipeline.middlewares] == [PIIRedactor]
+
+    with pytest.raises(ConfigError):
+        build_gateway({**config, "providers": [{"type": "nope"}]})
+    with pytest.raises(ConfigError):
+        build_gateway({**config, "gateway": {"retries": 1}})
+
+def test_closing_a_built_gateway_releases_threads_and_state(tmp_path):
+    config = load_config()
+    config["middlewares"] = [{"type": "audit_log", "path": str(tmp_path / "audit")}]
+    config["state"] = {"backend": "mmap", "path": str(tmp_path / "gw.state")}
+    threads = threading.active_count()
+    gateway = build_gateway(config)
+    backend = gateway.state_backend
+    gateway.close()
+    # What `serve` relies on before forking its workers
+    assert threading.active_count() == threads
+    assert backend._mm.closed
+
+def test_prefork_workers_drain_on_sigterm(tmp_path):
+    path = tmp_path / "gateway.yaml"
+    path.write_text(
+        "server: {port: 0, workers: 2, drain_timeout: 5}\n"
+        "providers:\n  - {type: mock, name: slow, latency: 0.5}\n"
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-c", "from aicp.cli import app; app()", "serve", "--config", str(path), "--log-level", "WARNING"],
+        stdout=subprocess.PIPE, text=True, env={**os.environ, "PYTHONPATH": SRC}
+    )
+    try:
+        url = proc.stdout.readline().split(" on ")[1].split()[0]
+        with httpx.Client(base_url=url.removesuffix("/v1"), timeout=10) as client:
+            for _ in range(20):
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+
+            results = []
+            inflight = threading.Thread(target=lambda: results.append(client.post("/v1/chat/completions", json=chat_body())))
+            inflight.start()
+            # Let the request reach a worker, then ask for shutdown mid-request
+            threading.Event().wait(0.2)
+            proc.send_signal(signal.SIGTERM)
+            inflight.join()
+
+        assert results[0].status_code == 200
+        assert proc.wait(timeout=10) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+def test_supervisor_backs_off_and_gives_up_on_crashing_workers():
+    # Every worker fails while building its gateway, right after the fork
+    script = (
+        "from aicp.server.workers import Supervisor, bind_socket\n"
+        "supervisor = Supervisor({'providers': [{'type': 'nope'}]}, bind_socket('127.0.0.1', 0), workers=2,"
+        " restart_delay=0.05, max_rapid_exits=5)\n"
+        "raise SystemExit(supervisor.run())\n"
+    )
+    started = time.monotonic()
+    proc = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, timeout=30,
+        env={**os.environ, "PYTHONPATH": SRC}
+    )
+    assert proc.returncode == 1
+    # The fifth exit comes from a worker forked after two backoffs (0.05s, then 0.2s)
+    assert time.monotonic() - started >= 0.25
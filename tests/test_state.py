@@ -0,0 +1,208 @@
+import asyncio
+import multiprocessing
+import socket
+import threading
+import time
+import pytest
+from aicp.config import build_gateway, load_config
+from aicp.gateway.ratelimit import AdmissionController, RateLimitExceededError
+from aicp.gateway.providers.base import CompletionRequest, Message, Role
+from aicp.gateway.reliability import ReliabilityLayer
+from aicp.gateway.state import (
+    LocalStateBackend, MmapStateBackend, SharedCircuitBreaker, SocketStateBackend, StateServer, shared_rate_limit
+)
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_breaker_state_is_shared_between_instances():
+    clock = Clock()
+    backend = LocalStateBackend(clock)
+    # Two workers' views of the same provider
+    a = SharedCircuitBreaker("p", backend, minimum_calls=4, window_size=10, recovery_timeout=5)
+    b = SharedCircuitBreaker("p", backend, minimum_calls=4, window_size=10, recovery_timeout=5)
+
+    a.record_success()
+    b.record_failure()
+    a.record_failure()
+    assert a.state == b.state == "CLOSED"
+    b.record_failure()  # 3 of 4 calls failed across both workers
+    assert a.state == "OPEN" and not a.can_execute() and not b.can_execute()
+
+    clock.now += 6
+    assert a.can_execute()
+    assert not b.can_execute()  # one probe for the whole fleet
+    a.release()  # the probe ended without an outcome, e.g. rate limited
+    assert b.can_execute() and not a.can_execute()
+    a.record_success()
+    assert b.state == "CLOSED" and b.counts() == [0.0, 0.0, 0.0]
+
+    # Outcomes age out of the time window
+    for _ in range(3):
+        a.record_failure()
+    clock.now += 11
+    a.record_failure()
+    assert a.state == "CLOSED"
+
+def _fail_provider(path, count):
+    breaker = SharedCircuitBreaker("upstream", MmapStateBackend(path, slots=64), minimum_calls=10)
+    for _ in range(count):
+        breaker.record_failure()
+
+def test_mmap_backend_shares_state_across_processes(tmp_path):
+    path = str(tmp_path / "gateway.state")
+    breaker = SharedCircuitBreaker("upstream", MmapStateBackend(path, slots=64), minimum_calls=10)
+    assert breaker.can_execute()
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_fail_provider, args=(path, 5)) for _ in range(2)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(10)
+        assert w.exitcode == 0
+
+    # Neither worker saw 10 calls alone; together they tripped the shared breaker
+    assert breaker.counts() == [10.0, 10.0, 0.0]
+    assert breaker.state == "OPEN"
+    assert not breaker.can_execute()
+
+def test_mmap_backend_rejects_mismatched_files(tmp_path):
+    path = str(tmp_path / "gateway.state")
+    MmapStateBackend(path, slots=64).close()
+    with pytest.raises(Exception, match="64 slots|16 slots"):
+        MmapStateBackend(path, slots=16)
+
+@pytest.fixture
+def state_server(tmp_path):
+    address = str(tmp_path / "state.sock")
+    loop = asyncio.new_event_loop()
+    server = StateServer(address)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield address, server, loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.run_until_complete(server.close())
+    loop.close()
+
+def test_socket_backend_shares_breakers_and_buckets(state_server):
+    address, server, _ = state_server
+    a = SocketStateBackend(address)
+    b = SocketStateBackend(address)
+    try:
+        SharedCircuitBreaker("p", a, minimum_calls=2).record_failure()
+        SharedCircuitBreaker("p", b, minimum_calls=2).record_failure()
+        a.flush()
+        b.flush()
+        # A new view loads the shared record in the background
+        breaker = SharedCircuitBreaker("p", a, minimum_calls=2)
+        a.flush()
+        assert breaker.state == "OPEN"
+
+        limit_a = shared_rate_limit(a, "tenant:x", requests_per_second=1, request_burst=2)
+        limit_b = shared_rate_limit(b, "tenant:x", requests_per_second=1, request_burst=2)
+        limit_a.requests.consume(1)
+        limit_b.requests.consume(1)
+        a.flush()
+        b.flush()
+        limit_a.requests.consume(0)  # any write refreshes the replica
+        a.flush()
+        assert limit_a.requests.wait_time(1) > 0.5
+        assert server.operations >= 6
+    finally:
+        a.close()
+        b.close()
+
+def test_slow_backend_does_not_block_callers(tmp_path):
+    # A server that accepts connections but never answers
+    address = str(tmp_path / "stuck.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(address)
+    listener.listen()
+    backend = SocketStateBackend(address, timeout=0.5)
+    try:
+        breaker = SharedCircuitBreaker("p", backend, minimum_calls=1)
+        start = time.monotonic()
+        assert breaker.can_execute()
+        breaker.record_failure()
+        assert breaker.state == "OPEN"
+        assert time.monotonic() - start < 0.1
+    finally:
+        backend.close()
+        listener.close()
+
+def test_unreachable_backend_falls_back_to_local_state(tmp_path):
+    backend = SocketStateBackend(str(tmp_path / "missing.sock"))
+    breaker = SharedCircuitBreaker("p", backend, minimum_calls=1)
+    assert breaker.can_execute()
+    breaker.record_failure()
+    assert breaker.state == "OPEN"
+    backend.flush()
+    assert breaker.shared.degraded
+    backend.close()
+
+def test_degraded_breaker_returns_to_shared_state(state_server):
+    address, server, loop = state_server
+    on_loop = lambda coro: asyncio.run_coroutine_threadsafe(coro, loop).result(5)
+    backend = SocketStateBackend(address)
+    breaker = SharedCircuitBreaker("p", backend, minimum_calls=2)
+    breaker.shared.retry_interval = 0.5
+    try:
+        backend.flush()
+        # The server goes away along with its connections
+        backend.close()
+        on_loop(server.close())
+        breaker.record_failure()
+        backend.flush()
+        assert breaker.shared.degraded
+        assert breaker.state == "CLOSED"
+
+        on_loop(server.start())
+        breaker.record_failure()
+        backend.flush()
+        assert breaker.shared.degraded  # still inside the cooldown
+        time.sleep(0.6)
+        breaker.record_failure()
+        backend.flush()
+        assert not breaker.shared.degraded
+        breaker.record_failure()
+        backend.flush()
+        other = SocketStateBackend(address)
+        view = SharedCircuitBreaker("p", other, minimum_calls=2)
+        other.flush()
+        assert view.state == "OPEN"
+        other.close()
+    finally:
+        backend.close()
+
+@pytest.mark.asyncio
+async def test_shared_rate_limit_spans_admission_controllers():
+    backend = LocalStateBackend()
+    controllers = [
+        AdmissionController(default_tenant_limit=shared_rate_limit(backend, "tenant", requests_per_second=0.01, request_burst=2), max_wait=0.01)
+        for _ in range(2)
+    ]
+    request = CompletionRequest(model="m", messages=[Message(role=Role.USER, content="hi")])
+
+    await controllers[0].admit_tenant(request)
+    await controllers[1].admit_tenant(request)
+    with pytest.raises(RateLimitExceededError):
+        await controllers[0].admit_tenant(request)
+
+def test_config_state_section_shares_breakers(tmp_path):
+    config = load_config()
+    config["state"] = {"backend": "mmap", "path": str(tmp_path / "gw.state"), "breaker": {"minimum_calls": 3}}
+    gateways = [build_gateway(config), build_gateway(config)]
+    breakers = [g.reliability.breakers["mock-provider"] for g in gateways]
+    assert all(isinstance(b, SharedCircuitBreaker) for b in breakers)
+
+    for _ in range(3):
+        breakers[0].record_failure()
+    assert breakers[1].state == "OPEN"
+    assert isinstance(gateways[0].reliability, ReliabilityLayer)
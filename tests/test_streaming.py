@@ -0,0 +1,66 @@
+import pytest
+from aicp.gateway.gateway import LLMGateway
+from aicp.gateway.middleware import PIIRedactor
+from aicp.gateway.providers.base import LLMProvider, CompletionRequest, Message, Role
+from aicp.gateway.providers.mock import MockProvider
+
+class BrokenStreamProvider(LLMProvider):
+    def __init__(self, name="broken"):
+        self.name = name
+        self.calls = 0
+
+    @property
+    def provider_name(self):
+        return self.name
+
+    async def complete(self, request):
+        self.calls += 1
+        raise Exception("Service Unavailable")
+
+def make_request():
+    return CompletionRequest(model="test", stream=True, messages=[Message(role=Role.USER, content="hi")])
+
+async def collect(gateway):
+    return [chunk async for chunk in gateway.stream(make_request())]
+
+@pytest.mark.asyncio
+async def test_mock_provider_streams_in_chunks():
+    gateway = LLMGateway([MockProvider(response_content="streamed text", chunk_size=4)])
+    chunks = await collect(gateway)
+
+    assert "".join(c.delta for c in chunks) == "streamed text"
+    assert len(chunks) > 2
+    assert chunks[-1].finish_reason == "stop"
+    assert chunks[-1].usage is not None
+
+@pytest.mark.asyncio
+async def test_redaction_across_chunk_boundaries():
+    content = "Reach me at someone@example.com or 555-123-4567, thanks. " * 3
+    provider = MockProvider(response_content=content, chunk_size=3)
+    gateway = LLMGateway([provider], middlewares=[PIIRedactor(stream_holdback=16)])
+    chunks = await collect(gateway)
+
+    streamed = "".join(c.delta for c in chunks)
+    assert streamed == PIIRedactor().redact(content)
+    assert "@example.com" not in streamed
+    # Output starts flowing before the whole response has been generated
+    assert chunks[0].delta and len(chunks) > 3
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_before_first_chunk():
+    broken = BrokenStreamProvider()
+    gateway = LLMGateway([broken, MockProvider(response_content="fallback")], max_retries=1)
+    chunks = await collect(gateway)
+
+    assert broken.calls == 1
+    assert "".join(c.delta for c in chunks) == "fallback"
+
+@pytest.mark.asyncio
+async def test_stalled_stream_times_out_and_falls_back():
+    stalled = MockProvider(name="stalled", response_content="never", chunk_delay=5.0)
+    gateway = LLMGateway([stalled, MockProvider(name="backup", response_content="ok")], max_retries=1, attempt_timeout=0.05)
+
+    chunks = await collect(gateway)
+
+    assert "".join(c.delta for c in chunks) == "ok"
+    assert gateway.reliability.breakers["stalled"].failures == 1